@@ -1,30 +1,58 @@
+import click
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from config import Config
+from logging_config import configurar_logging
 from controllers.empleados_controller import empleados_bp
 from controllers.home_controller import home_bp
 from controllers.interlocutor_controller import interlocutor_bp
 from controllers.login_controller import login_dp
 from controllers.inventario_controller import inventario_bp
+from controllers.salud_controller import salud_bp
+from controllers.autocompletado_controller import autocompletado_bp
 from models import db
+from services.monitor_pool import monitor_pool
+from services.estimador_filas import estimador_filas
+from services.alertas_stock import AlertasStock, emisor_alertas_stock
+from services.libro_stock import LibroStock, generador_saldos_stock
+from services.kpi_service import KpiService
+from services.estadisticas_service import EstadisticasService
+from services.importacion import formato_archivo
+from services.importacion_interlocutores import importar_interlocutores
+from services.importacion_productos import importar_productos
+from services.migraciones import migrar_esquema
 
 # Inicialización de la app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Logging centralizado (asíncrono, nivel según el entorno)
+configurar_logging(app)
+
 # Habilitar CORS
 CORS(app)
 
 # Inicializar la base de datos con la app
 db.init_app(app)
 
+# Monitor de salud del pool de conexiones y estimación de filas para /readyz
+monitor_pool.init_app(app)
+estimador_filas.init_app(app)
+
+# Emisión periódica de las alertas de bajo stock
+emisor_alertas_stock.init_app(app)
+# Puntos de control periódicos del libro de stock
+generador_saldos_stock.init_app(app)
+
 # Registrar Blueprints
 app.register_blueprint(empleados_bp, url_prefix='/empleados')
 app.register_blueprint(home_bp, url_prefix='/home')
 app.register_blueprint(login_dp)
 app.register_blueprint(interlocutor_bp)
 app.register_blueprint(inventario_bp)
+app.register_blueprint(salud_bp)
+app.register_blueprint(autocompletado_bp)
 
 # Rutas base
 @app.route('/')
@@ -63,7 +91,91 @@ def inventario():
 def inventario_detalle():
     return render_template('inventario-detalle.html')
 
+# Comandos de mantenimiento (flask --app app <comando>)
+@app.cli.command('migrar-esquema')
+def migrar_esquema_cli():
+    """Crea las tablas, columnas e índices que falten en una base de datos existente"""
+    cambios = migrar_esquema()
+    click.echo(f"Esquema actualizado: {', '.join(cambios) if cambios else 'sin cambios'}")
+
+@app.cli.command('reconstruir-kpis')
+def reconstruir_kpis():
+    """Recalcula el resumen diario de órdenes desde la tabla orden"""
+    filas = KpiService.reconstruir()
+    click.echo(f"Resumen de órdenes reconstruido: {filas} filas")
+
+@app.cli.command('reconstruir-estadisticas')
+def reconstruir_estadisticas():
+    """Recalcula las estadísticas por cliente y proveedor desde la tabla orden"""
+    filas = EstadisticasService.reconstruir()
+    click.echo(f"Estadísticas de interlocutores reconstruidas: {filas} filas")
+
+@app.cli.command('reconstruir-alertas-stock')
+def reconstruir_alertas_stock():
+    """Recalcula los indicadores de bajo stock de todo el catálogo"""
+    total = AlertasStock.reconstruir()
+    click.echo(f"Indicadores de stock recalculados: {total} productos bajo el mínimo")
+
+@app.cli.command('emitir-alertas-stock')
+def emitir_alertas_stock():
+    """Emite las alertas de bajo stock pendientes sin esperar al hilo periódico"""
+    alertas = AlertasStock.emitir_pendientes()
+    click.echo(f"Alertas de stock emitidas: {len(alertas)}")
+
+@app.cli.command('generar-saldos-stock')
+@click.option('--margen', type=int, default=None, help='Antigüedad mínima del corte en segundos')
+def generar_saldos_stock(margen):
+    """Crea los puntos de control del libro de stock sin esperar al hilo periódico"""
+    if margen is None:
+        margen = app.config.get('SALDOS_STOCK_MARGEN', 300)
+    total = LibroStock.generar_saldos(margen)
+    click.echo(f"Puntos de control de stock creados: {total}")
+
+def _imprimir_eventos_importacion(eventos):
+    """Muestra el avance de una importación; los errores van a stderr.
+
+    Devuelve True si alguna fila tuvo errores.
+    """
+    hubo_errores = False
+    for evento in eventos:
+        if evento['evento'] == 'error':
+            hubo_errores = True
+            filas = evento.get('fila', evento.get('filas'))
+            click.echo(f"Fila {filas}: {evento['error']}", err=True)
+        else:
+            prefijo = 'Importación terminada: ' if evento['evento'] == 'fin' else ''
+            click.echo(f"{prefijo}{evento['procesadas']} filas procesadas: {evento['creadas']} creadas, "
+                       f"{evento['actualizadas']} actualizadas, {evento['errores']} con errores")
+    return hubo_errores
+
+@app.cli.command('importar-interlocutores')
+@click.argument('tipo', type=click.Choice(['cliente', 'proveedor']))
+@click.argument('ruta', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=None, type=int, help='Filas por lote (por defecto IMPORTACION_LOTE)')
+def importar_interlocutores_cli(tipo, ruta, lote):
+    """Importa clientes o proveedores desde un CSV o XLSX, actualizando por rut"""
+    tamano_lote = lote or app.config.get('IMPORTACION_LOTE', 1000)
+    with open(ruta, 'rb') as archivo:
+        hubo_errores = _imprimir_eventos_importacion(
+            importar_interlocutores(archivo, formato_archivo(ruta), tipo.capitalize(), tamano_lote)
+        )
+    if hubo_errores:
+        click.get_current_context().exit(1)
+
+@app.cli.command('importar-productos')
+@click.argument('ruta', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=None, type=int, help='Filas por lote (por defecto IMPORTACION_LOTE)')
+def importar_productos_cli(ruta, lote):
+    """Importa productos desde un CSV o XLSX, actualizando por código"""
+    tamano_lote = lote or app.config.get('IMPORTACION_LOTE', 1000)
+    with open(ruta, 'rb') as archivo:
+        hubo_errores = _imprimir_eventos_importacion(
+            importar_productos(archivo, formato_archivo(ruta), tamano_lote)
+        )
+    if hubo_errores:
+        click.get_current_context().exit(1)
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()  # Crear tablas si no existen
+        migrar_esquema()  # Crear tablas, columnas e índices que falten
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -5,5 +5,7 @@ from .home_controller import home_bp
 from .login_controller import login_dp
 from .interlocutor_controller import interlocutor_bp
 from .inventario_controller import inventario_bp
+from .salud_controller import salud_bp
+from .autocompletado_controller import autocompletado_bp
 
 # Esto permite importar los blueprints directamente desde el paquete controllers
\ No newline at end of file
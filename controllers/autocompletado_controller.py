@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, request, current_app
+import logging
+from services.autocompletado import autocompletado, TIPOS_AUTOCOMPLETADO
+
+# El logging se configura de forma central en logging_config.py
+logger = logging.getLogger(__name__)
+
+autocompletado_bp = Blueprint('autocompletado', __name__, url_prefix='/api')
+
+@autocompletado_bp.route('/autocomplete')
+def autocomplete():
+    """Sugerencias por prefijo de nombre para los buscadores (typeahead)"""
+    try:
+        termino = request.args.get('q', '')
+        tipo = request.args.get('tipo', 'todos')  # 'cliente', 'proveedor', 'producto' o 'todos'
+        limite = request.args.get('limite', current_app.config.get('AUTOCOMPLETADO_LIMITE', 10), type=int)
+        if limite is None or limite < 1:
+            return jsonify({"error": "limite debe ser un entero positivo"}), 400
+        limite = min(limite, current_app.config.get('AUTOCOMPLETADO_LIMITE_MAXIMO', 50))
+
+        if tipo == 'todos':
+            tipos = TIPOS_AUTOCOMPLETADO
+        elif tipo.capitalize() in TIPOS_AUTOCOMPLETADO:
+            tipos = (tipo.capitalize(),)
+        else:
+            return jsonify({"error": "tipo debe ser 'cliente', 'proveedor', 'producto' o 'todos'"}), 400
+
+        return jsonify(autocompletado.sugerir(termino, tipos, limite))
+
+    except Exception as e:
+        logger.error("Error en el autocompletado: %s", e)
+        return jsonify({"error": str(e)}), 500
@@ -4,8 +4,7 @@ from services.user_management_service import UserManagementService
 import mysql.connector
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# El logging se configura de forma central en logging_config.py
 logger = logging.getLogger(__name__)
 
 empleados_bp = Blueprint('empleados', __name__)
@@ -22,7 +21,7 @@ def get_db_connection():
         logger.info("Conexión exitosa con la base de datos")
         return connection
     except Exception as e:
-        logger.error(f"Error al conectar con la base de datos: {str(e)}")
+        logger.error("Error al conectar con la base de datos: %s", e)
         raise
 
 @empleados_bp.route('/')
@@ -30,7 +29,7 @@ def index():
     try:
         return render_template('empleados.html')
     except Exception as e:
-        logger.error(f"Error al renderizar la página: {str(e)}")
+        logger.error("Error al renderizar la página: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @empleados_bp.route('/tabla_empleados')
@@ -53,11 +52,11 @@ def tabla_empleados():
             FROM usuario u
             LEFT JOIN cuenta c ON u.id = c.usuario_id
         '''
-        logger.info(f"Ejecutando query: {query}")
+        logger.info("Ejecutando query: %s", query)
         
         cursor.execute(query)
         empleados = cursor.fetchall()
-        logger.info(f"Datos obtenidos: {len(empleados)} empleados")
+        logger.info("Datos obtenidos: %s empleados", len(empleados))
         
         # Formatear RUT
         for empleado in empleados:
@@ -68,7 +67,7 @@ def tabla_empleados():
         return jsonify(empleados)
     
     except Exception as e:
-        logger.error(f"Error en tabla_empleados: {str(e)}")
+        logger.error("Error en tabla_empleados: %s", e)
         return jsonify({"error": str(e)}), 500
     
     finally:
@@ -83,10 +82,10 @@ def get_regiones():
         cursor = conn.cursor(dictionary=True)
         cursor.execute('SELECT id, nombre FROM region ORDER BY nombre')
         regiones = cursor.fetchall()
-        logger.info(f"Regiones obtenidas: {len(regiones)}")
+        logger.info("Regiones obtenidas: %s", len(regiones))
         return jsonify(regiones)
     except Exception as e:
-        logger.error(f"Error obteniendo regiones: {str(e)}")
+        logger.error("Error obteniendo regiones: %s", e)
         return jsonify({"error": str(e)}), 500
     finally:
         if 'conn' in locals():
@@ -99,10 +98,10 @@ def get_comunas(region_id):
         cursor = conn.cursor(dictionary=True)
         cursor.execute('SELECT id, nombre FROM comuna WHERE region_id = %s ORDER BY nombre', (region_id,))
         comunas = cursor.fetchall()
-        logger.info(f"Comunas obtenidas para región {region_id}: {len(comunas)}")
+        logger.info("Comunas obtenidas para región %s: %s", region_id, len(comunas))
         return jsonify(comunas)
     except Exception as e:
-        logger.error(f"Error obteniendo comunas: {str(e)}")
+        logger.error("Error obteniendo comunas: %s", e)
         return jsonify({"error": str(e)}), 500
     finally:
         if 'conn' in locals():
@@ -113,7 +112,7 @@ def guardar_empleado():
     logger.info("Iniciando proceso de guardar empleado")
     try:
         data = request.get_json()
-        logger.info(f"Datos recibidos: {data}")
+        logger.info("Datos recibidos: %s", data)
         
         # Validar campos requeridos
         required_fields = [
@@ -123,7 +122,7 @@ def guardar_empleado():
         
         for field in required_fields:
             if field not in data or not data[field]:
-                logger.error(f"Campo requerido faltante: {field}")
+                logger.error("Campo requerido faltante: %s", field)
                 return jsonify({
                     "success": False,
                     "error": f"El campo {field} es obligatorio"
@@ -164,7 +163,7 @@ def guardar_empleado():
         return result
         
     except Exception as e:
-        logger.error(f"Error inesperado: {str(e)}")
+        logger.error("Error inesperado: %s", e)
         return jsonify({
             "success": False,
             "error": str(e)
@@ -172,15 +171,15 @@ def guardar_empleado():
 
 @empleados_bp.route('/eliminar/<int:empleado_id>', methods=['DELETE'])
 def eliminar_empleado(empleado_id):
-    logger.info(f"Iniciando eliminación de empleado ID: {empleado_id}")
+    logger.info("Iniciando eliminación de empleado ID: %s", empleado_id)
     try:
         empleado = Usuario.query.get_or_404(empleado_id)
         db.session.delete(empleado)
         db.session.commit()
-        logger.info(f"Empleado {empleado_id} eliminado exitosamente")
+        logger.info("Empleado %s eliminado exitosamente", empleado_id)
         return jsonify({"success": True, "message": "Empleado eliminado correctamente"})
     except Exception as e:
-        logger.error(f"Error eliminando empleado: {str(e)}")
+        logger.error("Error eliminando empleado: %s", e)
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
     
@@ -188,7 +187,7 @@ def eliminar_empleado(empleado_id):
 
 @empleados_bp.route('/obtener/<int:empleado_id>', methods=['GET'])
 def obtener_empleado(empleado_id):
-    logger.info(f"Obteniendo datos del empleado ID: {empleado_id}")
+    logger.info("Obteniendo datos del empleado ID: %s", empleado_id)
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
@@ -221,7 +220,7 @@ def obtener_empleado(empleado_id):
         })
 
     except Exception as e:
-        logger.error(f"Error obteniendo empleado: {str(e)}")
+        logger.error("Error obteniendo empleado: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
     finally:
         if 'conn' in locals():
@@ -265,7 +264,7 @@ def validar_region_comuna():
         })
         
     except Exception as e:
-        logger.error(f"Error en validación región-comuna: {str(e)}")
+        logger.error("Error en validación región-comuna: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -276,7 +275,7 @@ def validar_region_comuna():
             
 @empleados_bp.route('/actualizar/<int:empleado_id>', methods=['PUT'])
 def actualizar_empleado(empleado_id):
-    logger.info(f"Actualizando empleado ID: {empleado_id}")
+    logger.info("Actualizando empleado ID: %s", empleado_id)
     try:
         data = request.get_json()
         usuario = Usuario.query.get_or_404(empleado_id)
@@ -300,10 +299,10 @@ def actualizar_empleado(empleado_id):
                     setattr(direccion, campo, data['direccion'][campo])
 
         db.session.commit()
-        logger.info(f"Empleado {empleado_id} actualizado exitosamente")
+        logger.info("Empleado %s actualizado exitosamente", empleado_id)
         return jsonify({"success": True, "message": "Empleado actualizado correctamente"})
 
     except Exception as e:
-        logger.error(f"Error actualizando empleado: {str(e)}")
+        logger.error("Error actualizando empleado: %s", e)
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
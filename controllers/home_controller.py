@@ -1,287 +1,663 @@
-from flask import Blueprint, jsonify, request
-from models import db, Orden, Cliente, Proveedor
+from flask import Blueprint, current_app, jsonify, request, Response, stream_with_context
+from models import db, Orden, Cliente, Proveedor, Producto, ResumenOrdenes
 from datetime import datetime
+import json
 import logging
-from sqlalchemy import or_, and_, text
+from sqlalchemy import or_, and_, text, insert, func
 from sqlalchemy.exc import SQLAlchemyError,IntegrityError
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from services.stock_service import StockService
+from services.version_datos import con_etag, incrementar_version, versiones_actuales
+from services.cache_local import cache_listas
+from services.kpi_service import KpiService
+from services.estadisticas_service import EstadisticasService
+from services.paginacion import codificar_cursor_fecha_id, decodificar_cursor_fecha_id, leer_per_page, condicion_keyset
 
-# Configuración de logging detallada
-logging.basicConfig(
-    level=logging.DEBUG,  # Cambiado a DEBUG para más detalle
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# El logging se configura de forma central en logging_config.py
 logger = logging.getLogger(__name__)
 
 home_bp = Blueprint('home', __name__)
 
-@home_bp.route('/debug-db')
-def debug_db():
-    """Ruta para depuración de la base de datos"""
+ESTADOS_ORDEN = ['Pendiente', 'Procesada', 'Cancelada', 'Completada']
+TIPOS_ORDEN = ['Entrada', 'Salida']
+CAMPOS_REQUERIDOS_ORDEN = ['tipo_orden', 'interlocutor_id', 'valor_orden', 'fecha_orden', 'estado_orden']
+
+# Máximo de órdenes aceptadas en una sola petición de carga masiva
+MAX_ORDENES_BULK = 5000
+
+def _validar_datos_orden(data, valor_requerido=True):
+    """Valida los datos recibidos de una orden y devuelve las columnas a insertar.
+
+    Con valor_requerido=False (órdenes con productos) el valor puede omitirse,
+    ya que se calcula a partir de las líneas.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('La orden debe ser un objeto JSON')
+
+    for field in CAMPOS_REQUERIDOS_ORDEN:
+        if field == 'valor_orden' and not valor_requerido:
+            continue
+        if data.get(field) in (None, ''):
+            raise ValueError(f'El campo {field} es requerido')
+
+    if data['tipo_orden'] not in TIPOS_ORDEN:
+        raise ValueError('Tipo de orden inválido')
+    if data['estado_orden'] not in ESTADOS_ORDEN:
+        raise ValueError('Estado de orden inválido')
+
+    valor_orden = None
+    if data.get('valor_orden') not in (None, ''):
+        try:
+            valor_orden = Decimal(str(data['valor_orden']))
+        except InvalidOperation:
+            raise ValueError('El valor de la orden debe ser un número válido')
+        if not valor_orden.is_finite() or valor_orden < 0:
+            raise ValueError('El valor de la orden debe ser un número positivo')
+
     try:
-        # Verificar conexión
-        db.session.execute(text('SELECT 1'))
-        logger.info("Conexión a BD verificada")
-
-        # Obtener información de las tablas
-        orden_sample = Orden.query.first()
-        cliente_sample = Cliente.query.first()
-        proveedor_sample = Proveedor.query.first()
-
-        debug_info = {
-            'estado_conexion': 'activa',
-            'tablas': {
-                'ordenes': {
-                    'total': Orden.query.count(),
-                    'muestra': {
-                        'id': orden_sample.id if orden_sample else None,
-                        'tipo_orden': orden_sample.tipo_orden if orden_sample else None,
-                        'valor_orden': str(orden_sample.valor_orden) if orden_sample else None,
-                        'estado': orden_sample.estado_orden if orden_sample else None
-                    } if orden_sample else None
-                },
-                'clientes': {
-                    'total': Cliente.query.count(),
-                    'muestra': {
-                        'id': cliente_sample.id if cliente_sample else None,
-                        'nombre': cliente_sample.nombre_cliente if cliente_sample else None
-                    } if cliente_sample else None
-                },
-                'proveedores': {
-                    'total': Proveedor.query.count(),
-                    'muestra': {
-                        'id': proveedor_sample.id if proveedor_sample else None,
-                        'nombre': proveedor_sample.nombre_proveedor if proveedor_sample else None
-                    } if proveedor_sample else None
-                }
-            }
-        }
-        logger.info(f"Información de depuración recopilada: {debug_info}")
-        return jsonify(debug_info)
-    except Exception as e:
-        logger.error(f"Error en debug-db: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        fecha_orden = datetime.strptime(str(data['fecha_orden']), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+    try:
+        interlocutor_id = int(data['interlocutor_id'])
+    except (TypeError, ValueError):
+        raise ValueError('El interlocutor_id debe ser un entero')
+
+    # Entrada -> proveedor, Salida -> cliente
+    es_entrada = data['tipo_orden'] == 'Entrada'
+    return {
+        'tipo_orden': data['tipo_orden'],
+        'valor_orden': valor_orden,
+        'fecha_orden': fecha_orden,
+        'estado_orden': data['estado_orden'],
+        'proveedor_id': interlocutor_id if es_entrada else None,
+        'cliente_id': None if es_entrada else interlocutor_id
+    }
+
+def _datos_orden(orden):
+    """Copia de los campos de una orden antes de modificarla o eliminarla"""
+    return {
+        'tipo_orden': orden.tipo_orden,
+        'valor_orden': orden.valor_orden,
+        'fecha_orden': orden.fecha_orden,
+        'estado_orden': orden.estado_orden,
+        'cliente_id': orden.cliente_id,
+        'proveedor_id': orden.proveedor_id
+    }
+
+def _confirmar_escritura_ordenes(altas=(), bajas=(), tablas=()):
+    """Actualiza los datos derivados de las órdenes en la misma transacción y la confirma.
+
+    Las versiones de datos se incrementan después del commit.
+    """
+    KpiService.registrar(altas=altas, bajas=bajas)
+    EstadisticasService.registrar(altas=altas, bajas=bajas)
+    db.session.commit()
+    incrementar_version(Orden.__tablename__, *tablas)
+
+def _leer_filtros_ordenes(args):
+    """Valida los filtros de /ordenes y devuelve las condiciones SQL a aplicar"""
+    condiciones = []
+
+    estado = args.get('estado')
+    if estado:
+        if estado not in ESTADOS_ORDEN:
+            raise ValueError('Estado de orden inválido')
+        condiciones.append(Orden.estado_orden == estado)
+
+    tipo = args.get('tipo')
+    if tipo:
+        if tipo not in TIPOS_ORDEN:
+            raise ValueError('Tipo de orden inválido')
+        condiciones.append(Orden.tipo_orden == tipo)
+
+    try:
+        fecha_desde = args.get('fecha_desde')
+        if fecha_desde:
+            condiciones.append(Orden.fecha_orden >= datetime.strptime(fecha_desde, '%Y-%m-%d').date())
+        fecha_hasta = args.get('fecha_hasta')
+        if fecha_hasta:
+            condiciones.append(Orden.fecha_orden <= datetime.strptime(fecha_hasta, '%Y-%m-%d').date())
+    except ValueError:
+        raise ValueError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+    # Búsqueda libre: nombre o empresa del interlocutor, o el estado de la orden
+    q = (args.get('q') or '').strip()
+    if q:
+        coincidencias = [
+            Cliente.nombre_cliente.contains(q, autoescape=True),
+            Cliente.empresa_cliente.contains(q, autoescape=True),
+            Proveedor.nombre_proveedor.contains(q, autoescape=True),
+            Proveedor.empresa_proveedor.contains(q, autoescape=True),
+        ]
+        estados = [e for e in ESTADOS_ORDEN if q.lower() in e.lower()]
+        if estados:
+            coincidencias.append(Orden.estado_orden.in_(estados))
+        condiciones.append(or_(*coincidencias))
+
+    return condiciones
+
+def _consulta_ordenes():
+    """Consulta base de órdenes con los datos del cliente y proveedor asociados"""
+    return db.session.query(
+        Orden.id.label('ID'),
+        Orden.valor_orden.label('Valor_de_Orden'),
+        Orden.fecha_orden.label('Fecha_de_Orden'),
+        Orden.estado_orden.label('Estado'),
+        Orden.tipo_orden.label('tipo'),
+        Cliente.nombre_cliente,
+        Cliente.empresa_cliente,
+        Proveedor.nombre_proveedor,
+        Proveedor.empresa_proveedor
+    ).outerjoin(Cliente, Orden.cliente_id == Cliente.id)\
+     .outerjoin(Proveedor, Orden.proveedor_id == Proveedor.id)
+
+def _serializar_orden(orden):
+    # Determinar el interlocutor y empresa basado en el tipo de orden
+    if orden.tipo == 'Entrada':
+        interlocutor = orden.nombre_proveedor or 'Sin proveedor'
+        empresa = orden.empresa_proveedor or 'Sin empresa'
+    else:  # Salida
+        interlocutor = orden.nombre_cliente or 'Sin cliente'
+        empresa = orden.empresa_cliente or 'Sin empresa'
+
+    return {
+        'ID': orden.ID,
+        'Interlocutor': interlocutor,
+        'Empresa': empresa,
+        'Valor_de_Orden': float(orden.Valor_de_Orden) if orden.Valor_de_Orden else 0,
+        'Fecha_de_Orden': orden.Fecha_de_Orden.strftime('%Y-%m-%d') if orden.Fecha_de_Orden else None,
+        'Estado': orden.Estado,
+        'tipo': orden.tipo
+    }
+
+# Filas que se leen por vuelta del cursor del servidor al exportar en streaming
+STREAM_YIELD_PER = 1000
+
+def _quiere_stream():
+    """Indica si el cliente pidió la exportación NDJSON en streaming"""
+    if request.args.get('stream') in ['1', 'true']:
+        return True
+    mejor = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return mejor == 'application/x-ndjson'
+
+def _stream_ordenes(condiciones, orden_sql):
+    """Genera una línea JSON por orden leyendo con un cursor del lado del servidor"""
+    try:
+        ordenes = _consulta_ordenes()\
+            .filter(*condiciones)\
+            .order_by(*orden_sql)\
+            .execution_options(stream_results=True)\
+            .yield_per(STREAM_YIELD_PER)
+
+        total = 0
+        debug_activo = logger.isEnabledFor(logging.DEBUG)
+        for orden in ordenes:
+            orden_dict = _serializar_orden(orden)
+            if debug_activo:
+                logger.debug("Procesando orden: %s", orden_dict, extra={'muestreo': True})
+            yield json.dumps(orden_dict) + '\n'
+            total += 1
+        logger.info("Exportación de órdenes en streaming completada: %s órdenes", total)
+    except SQLAlchemyError as e:
+        # La respuesta ya comenzó, solo se puede registrar el error y cortar el stream
+        logger.error("Error en la exportación de órdenes en streaming: %s", e)
 
 @home_bp.route('/ordenes')
+@con_etag(Orden.__tablename__, Cliente.__tablename__, Proveedor.__tablename__)
 def get_ordenes():
+    """Lista de órdenes paginada por cursor sobre (fecha_orden, id).
+
+    Parámetros: cursor, per_page, estado, tipo, fecha_desde, fecha_hasta, q
+    (texto buscado en el nombre o la empresa del interlocutor y en el estado) y
+    direction (asc/desc, por defecto desc). La respuesta incluye next_cursor
+    para pedir la página siguiente, o None si no quedan más órdenes.
+
+    Con stream=1 o Accept: application/x-ndjson se devuelven todas las órdenes
+    que cumplen los filtros como NDJSON, sin paginar y sin cargarlas en memoria.
+    """
     try:
         logger.info("Iniciando consulta de órdenes")
-        
+
         try:
-            db.session.execute(text('SELECT 1'))
-            logger.info("Conexión a la base de datos verificada")
-        except SQLAlchemyError as e:
-            logger.error(f"Error de conexión a la base de datos: {str(e)}")
-            return jsonify({"error": "Error de conexión a la base de datos"}), 500
+            condiciones = _leer_filtros_ordenes(request.args)
+            per_page = leer_per_page(request.args)
+
+            direction = request.args.get('direction', 'desc')
+            if direction not in ['asc', 'desc']:
+                raise ValueError('direction debe ser asc o desc')
+            descendente = direction == 'desc'
+
+            cursor = request.args.get('cursor')
+            if cursor:
+                ultima_fecha, ultimo_id = decodificar_cursor_fecha_id(cursor)
+                condiciones.append(condicion_keyset(
+                    [Orden.fecha_orden, Orden.id], [ultima_fecha, ultimo_id], descendente
+                ))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if descendente:
+            orden_sql = [Orden.fecha_orden.desc(), Orden.id.desc()]
+        else:
+            orden_sql = [Orden.fecha_orden.asc(), Orden.id.asc()]
+
+        if _quiere_stream():
+            return Response(
+                stream_with_context(_stream_ordenes(condiciones, orden_sql)),
+                mimetype='application/x-ndjson'
+            )
 
         try:
-            # Consulta para todas las órdenes
-            ordenes = db.session.query(
-                Orden.id.label('ID'),
-                Orden.valor_orden.label('Valor_de_Orden'),
-                Orden.fecha_orden.label('Fecha_de_Orden'),
-                Orden.estado_orden.label('Estado'),
-                Orden.tipo_orden.label('tipo'),
-                Cliente.nombre_cliente,
-                Cliente.empresa_cliente,
-                Proveedor.nombre_proveedor,
-                Proveedor.empresa_proveedor
-            ).outerjoin(Cliente, Orden.cliente_id == Cliente.id)\
-             .outerjoin(Proveedor, Orden.proveedor_id == Proveedor.id)\
-             .all()
-
-            logger.info(f"Total de órdenes encontradas: {len(ordenes)}")
+            # Se pide una fila extra para saber si existe una página siguiente
+            ordenes = _consulta_ordenes()\
+                .filter(*condiciones)\
+                .order_by(*orden_sql)\
+                .limit(per_page + 1)\
+                .all()
+
+            hay_mas = len(ordenes) > per_page
+            ordenes = ordenes[:per_page]
 
             resultado = []
+            debug_activo = logger.isEnabledFor(logging.DEBUG)
             for orden in ordenes:
-                # Determinar el interlocutor y empresa basado en el tipo de orden
-                if orden.tipo == 'Entrada':
-                    interlocutor = orden.nombre_proveedor or 'Sin proveedor'
-                    empresa = orden.empresa_proveedor or 'Sin empresa'
-                else:  # Salida
-                    interlocutor = orden.nombre_cliente or 'Sin cliente'
-                    empresa = orden.empresa_cliente or 'Sin empresa'
-
-                orden_dict = {
-                    'ID': orden.ID,
-                    'Interlocutor': interlocutor,
-                    'Empresa': empresa,
-                    'Valor_de_Orden': float(orden.Valor_de_Orden) if orden.Valor_de_Orden else 0,
-                    'Fecha_de_Orden': orden.Fecha_de_Orden.strftime('%Y-%m-%d') if orden.Fecha_de_Orden else None,
-                    'Estado': orden.Estado,
-                    'tipo': orden.tipo
-                }
-                logger.debug(f"Procesando orden: {orden_dict}")
+                orden_dict = _serializar_orden(orden)
+                if debug_activo:
+                    logger.debug("Procesando orden: %s", orden_dict, extra={'muestreo': True})
                 resultado.append(orden_dict)
 
-            logger.info(f"Total de órdenes procesadas: {len(resultado)}")
-            if resultado:
-                logger.debug(f"Muestra del primer resultado: {resultado[0]}")
+            next_cursor = None
+            if hay_mas:
+                ultima = ordenes[-1]
+                next_cursor = codificar_cursor_fecha_id(ultima.Fecha_de_Orden, ultima.ID)
+
+            logger.info("Total de órdenes devueltas: %s", len(resultado))
 
-            return jsonify(resultado)
+            return jsonify({
+                'ordenes': resultado,
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            })
 
         except SQLAlchemyError as e:
-            logger.error(f"Error en la consulta de órdenes: {str(e)}")
+            logger.error("Error en la consulta de órdenes: %s", e)
             return jsonify({"error": "Error al consultar las órdenes"}), 500
             
     except Exception as e:
-        logger.error(f"Error inesperado obteniendo órdenes: {str(e)}")
+        logger.error("Error inesperado obteniendo órdenes: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @home_bp.route('/orden', methods=['POST'])
 def create_orden():
+    """Crea una orden, opcionalmente con sus líneas de productos.
+
+    Si se envía "productos" ([{producto_id, cantidad, precio_unitario?}]), las
+    líneas se registran en la misma transacción, el stock se ajusta (+ para
+    Entrada, - para Salida) y el valor de la orden se calcula en el servidor.
+    """
     try:
         logger.info("Iniciando creación de orden")
         data = request.get_json()
-        logger.info(f"Datos recibidos: {data}")
+        logger.info("Datos recibidos: %s", data)
+
+        try:
+            if not isinstance(data, dict):
+                raise ValueError('La orden debe ser un objeto JSON')
+            lineas = StockService.validar_lineas(data.get('productos') or [])
+            campos = _validar_datos_orden(data, valor_requerido=not lineas)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
 
         # Crear la nueva orden solo con los campos existentes
         nueva_orden = Orden(
-            tipo_orden=data['tipo_orden'],
-            valor_orden=Decimal(str(data['valor_orden'])),
-            fecha_orden=datetime.strptime(data['fecha_orden'], '%Y-%m-%d').date(),
-            estado_orden=data['estado_orden']
+            tipo_orden=campos['tipo_orden'],
+            valor_orden=campos['valor_orden'] if campos['valor_orden'] is not None else Decimal('0'),
+            fecha_orden=campos['fecha_orden'],
+            estado_orden=campos['estado_orden']
         )
 
         # Asignar cliente o proveedor según el tipo
-        if data['tipo_orden'] == 'Entrada':
-            nueva_orden.proveedor_id = data['interlocutor_id']
-            nueva_orden.cliente_id = None
-        else:
-            nueva_orden.cliente_id = data['interlocutor_id']
-            nueva_orden.proveedor_id = None
+        nueva_orden.proveedor_id = campos['proveedor_id']
+        nueva_orden.cliente_id = campos['cliente_id']
 
         db.session.add(nueva_orden)
-        db.session.commit()
+
+        if lineas:
+            db.session.flush()
+            try:
+                nueva_orden.valor_orden = StockService.aplicar_lineas(nueva_orden.id, nueva_orden.tipo_orden, lineas)
+            except ValueError as e:
+                db.session.rollback()
+                return jsonify({"success": False, "error": str(e)}), 400
+
+        _confirmar_escritura_ordenes(
+            altas=[nueva_orden],
+            tablas=[Producto.__tablename__] if lineas else []
+        )
         
         return jsonify({
             "success": True, 
             "message": "Orden creada exitosamente",
-            "id": nueva_orden.id
+            "id": nueva_orden.id,
+            "valor_orden": float(nueva_orden.valor_orden)
         })
 
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error en create_orden: {str(e)}")
+        logger.error("Error en create_orden: %s", e)
         return jsonify({
             "success": False, 
             "error": str(e)
         }), 500
 
+@home_bp.route('/ordenes/bulk', methods=['POST'])
+def create_ordenes_bulk():
+    """Crea varias órdenes en una sola transacción.
+
+    Recibe una lista de órdenes (o {"ordenes": [...], "parcial": true}). Los
+    interlocutores se verifican con una consulta IN por tabla y las órdenes
+    válidas se insertan con un único executemany. Sin modo parcial, cualquier
+    orden rechazada cancela toda la carga; con parcial=1 se insertan las válidas
+    y se informan las rechazadas.
+    """
+    try:
+        data = request.get_json()
+        if isinstance(data, dict):
+            items = data.get('ordenes')
+            parcial = bool(data.get('parcial'))
+        else:
+            items = data
+            parcial = False
+        parcial = parcial or request.args.get('parcial') in ['1', 'true']
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"success": False, "error": "Se requiere una lista de órdenes"}), 400
+        if len(items) > MAX_ORDENES_BULK:
+            return jsonify({
+                "success": False,
+                "error": f"No se pueden cargar más de {MAX_ORDENES_BULK} órdenes por petición"
+            }), 400
+
+        logger.info("Iniciando carga masiva de %s órdenes (parcial=%s)", len(items), parcial)
+
+        resultados = []
+        filas = {}
+        for indice, item in enumerate(items):
+            try:
+                # Las líneas de productos ajustan stock orden por orden; la carga
+                # masiva no las procesa, así que se rechazan en lugar de ignorarlas
+                if isinstance(item, dict) and item.get('productos'):
+                    raise ValueError('La carga masiva no admite productos; use POST /home/orden')
+                filas[indice] = _validar_datos_orden(item)
+                resultados.append({'indice': indice, 'success': True})
+            except ValueError as e:
+                resultados.append({'indice': indice, 'success': False, 'error': str(e)})
+
+        # Verificar todos los interlocutores con una consulta IN por tabla
+        ids_proveedor = {f['proveedor_id'] for f in filas.values() if f['proveedor_id'] is not None}
+        ids_cliente = {f['cliente_id'] for f in filas.values() if f['cliente_id'] is not None}
+        proveedores_existentes = {p.id for p in db.session.query(Proveedor.id).filter(Proveedor.id.in_(ids_proveedor))} if ids_proveedor else set()
+        clientes_existentes = {c.id for c in db.session.query(Cliente.id).filter(Cliente.id.in_(ids_cliente))} if ids_cliente else set()
+
+        for indice, fila in list(filas.items()):
+            if fila['proveedor_id'] is not None and fila['proveedor_id'] not in proveedores_existentes:
+                resultados[indice] = {'indice': indice, 'success': False, 'error': 'Proveedor no encontrado'}
+                del filas[indice]
+            elif fila['cliente_id'] is not None and fila['cliente_id'] not in clientes_existentes:
+                resultados[indice] = {'indice': indice, 'success': False, 'error': 'Cliente no encontrado'}
+                del filas[indice]
+
+        rechazadas = len(items) - len(filas)
+        if rechazadas and not parcial:
+            logger.info("Carga masiva cancelada: %s órdenes rechazadas", rechazadas)
+            return jsonify({
+                "success": False,
+                "error": "Hay órdenes inválidas, no se insertó ninguna",
+                "insertadas": 0,
+                "rechazadas": rechazadas,
+                "resultados": resultados
+            }), 400
+
+        if filas:
+            db.session.execute(insert(Orden), list(filas.values()))
+            _confirmar_escritura_ordenes(altas=list(filas.values()))
+
+        logger.info("Carga masiva completada: %s insertadas, %s rechazadas", len(filas), rechazadas)
+        return jsonify({
+            "success": True,
+            "message": "Carga masiva de órdenes completada",
+            "insertadas": len(filas),
+            "rechazadas": rechazadas,
+            "resultados": resultados
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error en create_ordenes_bulk: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @home_bp.route('/orden/<int:orden_id>', methods=['PUT'])
 def update_orden(orden_id):
     try:
         orden = Orden.query.get_or_404(orden_id)
+        anterior = _datos_orden(orden)
         data = request.get_json()
-        logger.info(f"Actualizando orden {orden_id} con datos: {data}")
+        logger.info("Actualizando orden %s con datos: %s", orden_id, data)
+
+        # Misma validación que create_orden: interlocutor_id llega como texto
+        # desde los formularios y debe quedar como entero. En una orden con
+        # productos el valor sale de sus líneas, como al crearla
+        total_lineas = StockService.total_lineas(orden_id)
+        try:
+            campos = _validar_datos_orden(data, valor_requerido=total_lineas is None)
+            if total_lineas is not None:
+                if campos['valor_orden'] is not None and campos['valor_orden'] != total_lineas:
+                    raise ValueError('El valor de una orden con productos se calcula a partir de sus líneas')
+                campos['valor_orden'] = total_lineas
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
         # Actualizar campos
-        orden.tipo_orden = data['tipo_orden']
-        orden.valor_orden = Decimal(str(data['valor_orden']))
-        orden.fecha_orden = datetime.strptime(data['fecha_orden'], '%Y-%m-%d').date()
-        orden.estado_orden = data['estado_orden']
+        orden.tipo_orden = campos['tipo_orden']
+        orden.valor_orden = campos['valor_orden']
+        orden.fecha_orden = campos['fecha_orden']
+        orden.estado_orden = campos['estado_orden']
         
         # Actualizar interlocutor
-        if data['tipo_orden'] == 'Entrada':
-            orden.proveedor_id = data['interlocutor_id']
-            orden.cliente_id = None
-            logger.info(f"Actualizando a proveedor_id: {data['interlocutor_id']}")
-        else:
-            orden.cliente_id = data['interlocutor_id']
-            orden.proveedor_id = None
-            logger.info(f"Actualizando a cliente_id: {data['interlocutor_id']}")
+        orden.proveedor_id = campos['proveedor_id']
+        orden.cliente_id = campos['cliente_id']
+        logger.info("Actualizando a proveedor_id: %s, cliente_id: %s", orden.proveedor_id, orden.cliente_id)
+
+        # Si cambia el tipo, las líneas de productos pasan a sumar en vez de restar (o al revés)
+        try:
+            stock_ajustado = StockService.ajustar_orden(orden_id, anterior['tipo_orden'], orden.tipo_orden)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 400
         
-        db.session.commit()
-        logger.info(f"Orden {orden_id} actualizada exitosamente")
+        _confirmar_escritura_ordenes(
+            altas=[orden],
+            bajas=[anterior],
+            tablas=[Producto.__tablename__] if stock_ajustado else []
+        )
+        logger.info("Orden %s actualizada exitosamente", orden_id)
         
-        return jsonify({"success": True, "message": "Orden actualizada exitosamente"})
+        return jsonify({
+            "success": True,
+            "message": "Orden actualizada exitosamente",
+            "valor_orden": float(orden.valor_orden)
+        })
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error actualizando orden {orden_id}: {str(e)}")
+        logger.error("Error actualizando orden %s: %s", orden_id, e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @home_bp.route('/orden/<int:orden_id>', methods=['DELETE'])
 def delete_orden(orden_id):
     try:
         orden = Orden.query.get_or_404(orden_id)
-        logger.info(f"Eliminando orden {orden_id}")
+        logger.info("Eliminando orden %s", orden_id)
+        anterior = _datos_orden(orden)
+
+        # El stock que movieron sus líneas se devuelve en la misma transacción
+        try:
+            stock_ajustado = StockService.ajustar_orden(orden_id, orden.tipo_orden)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 400
         
         db.session.delete(orden)
-        db.session.commit()
+        _confirmar_escritura_ordenes(
+            bajas=[anterior],
+            tablas=[Producto.__tablename__] if stock_ajustado else []
+        )
         
-        logger.info(f"Orden {orden_id} eliminada exitosamente")
+        logger.info("Orden %s eliminada exitosamente", orden_id)
         return jsonify({"success": True, "message": "Orden eliminada exitosamente"})
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error eliminando orden {orden_id}: {str(e)}")
+        logger.error("Error eliminando orden %s: %s", orden_id, e)
         return jsonify({"success": False, "error": str(e)}), 500
 
+@home_bp.route('/kpis')
+@con_etag(Orden.__tablename__, ResumenOrdenes.__tablename__)
+def get_kpis():
+    """Indicadores del dashboard leídos del resumen diario de órdenes.
+
+    Parámetros opcionales: fecha_desde, fecha_hasta (YYYY-MM-DD) y por_dia=1
+    para incluir la serie diaria además de los totales por tipo y estado.
+    """
+    try:
+        condiciones = []
+        try:
+            fecha_desde = request.args.get('fecha_desde')
+            if fecha_desde:
+                condiciones.append(ResumenOrdenes.fecha >= datetime.strptime(fecha_desde, '%Y-%m-%d').date())
+            fecha_hasta = request.args.get('fecha_hasta')
+            if fecha_hasta:
+                condiciones.append(ResumenOrdenes.fecha <= datetime.strptime(fecha_hasta, '%Y-%m-%d').date())
+        except ValueError:
+            return jsonify({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}), 400
+
+        totales = db.session.query(
+            ResumenOrdenes.tipo_orden,
+            ResumenOrdenes.estado_orden,
+            func.sum(ResumenOrdenes.cantidad).label('cantidad'),
+            func.sum(ResumenOrdenes.valor_total).label('valor_total')
+        ).filter(*condiciones)\
+         .group_by(ResumenOrdenes.tipo_orden, ResumenOrdenes.estado_orden)\
+         .all()
+
+        # Las órdenes de salida (clientes) suman y las de entrada (proveedores) restan
+        ganancia = sum(
+            float(t.valor_total or 0) * (1 if t.tipo_orden == 'Salida' else -1)
+            for t in totales
+        )
+
+        resultado = {
+            'totales': [{
+                'tipo': t.tipo_orden,
+                'estado': t.estado_orden,
+                'cantidad': int(t.cantidad or 0),
+                'valor_total': float(t.valor_total or 0)
+            } for t in totales if t.cantidad],
+            'total_ordenes': sum(int(t.cantidad or 0) for t in totales),
+            'ganancia': ganancia
+        }
+
+        if request.args.get('por_dia') in ['1', 'true']:
+            dias = db.session.query(ResumenOrdenes)\
+                .filter(*condiciones, ResumenOrdenes.cantidad != 0)\
+                .order_by(ResumenOrdenes.fecha)\
+                .all()
+            resultado['por_dia'] = [{
+                'fecha': d.fecha.strftime('%Y-%m-%d'),
+                'tipo': d.tipo_orden,
+                'estado': d.estado_orden,
+                'cantidad': d.cantidad,
+                'valor_total': float(d.valor_total)
+            } for d in dias]
+
+        return jsonify(resultado)
+
+    except SQLAlchemyError as e:
+        logger.error("Error obteniendo KPIs de órdenes: %s", e)
+        return jsonify({"error": "Error al consultar los indicadores"}), 500
+
 @home_bp.route('/proveedores')
+@con_etag(Proveedor.__tablename__)
 def get_proveedores():
     try:
-        # Verificar la conexión primero
-        db.session.execute(text('SELECT 1'))
-        logger.info("Conexión verificada para consulta de proveedores")
-        
         try:
-            # Solo seleccionar los campos que existen
-            proveedores = db.session.query(
-                Proveedor.id,
-                Proveedor.nombre_proveedor,
-                Proveedor.empresa_proveedor
-            ).order_by(Proveedor.nombre_proveedor).all()
-            
-            logger.info(f"Consulta de proveedores ejecutada. Total encontrados: {len(proveedores)}")
-            
-            resultado = [{
-                'id': proveedor.id,
-                'nombre_proveedor': proveedor.nombre_proveedor,
-                'empresa_proveedor': proveedor.empresa_proveedor
-            } for proveedor in proveedores]
+            # Servir desde la caché mientras la versión de la tabla no cambie
+            version = versiones_actuales([Proveedor.__tablename__])[Proveedor.__tablename__]
+            cuerpo = cache_listas.obtener('proveedores', version)
+            if cuerpo is None:
+                # Solo seleccionar los campos que existen
+                proveedores = db.session.query(
+                    Proveedor.id,
+                    Proveedor.nombre_proveedor,
+                    Proveedor.empresa_proveedor
+                ).order_by(Proveedor.nombre_proveedor).all()
+                
+                logger.info("Consulta de proveedores ejecutada. Total encontrados: %s", len(proveedores))
+                
+                resultado = [{
+                    'id': proveedor.id,
+                    'nombre_proveedor': proveedor.nombre_proveedor,
+                    'empresa_proveedor': proveedor.empresa_proveedor
+                } for proveedor in proveedores]
+                cuerpo = current_app.json.dumps(resultado)
+                cache_listas.guardar('proveedores', version, cuerpo)
             
-            return jsonify(resultado)
+            return Response(cuerpo, mimetype='application/json')
             
         except SQLAlchemyError as e:
-            logger.error(f"Error en la consulta de proveedores: {str(e)}")
+            logger.error("Error en la consulta de proveedores: %s", e)
             return jsonify({"error": f"Error en la consulta: {str(e)}"}), 500
             
     except Exception as e:
-        logger.error(f"Error general en get_proveedores: {str(e)}")
+        logger.error("Error general en get_proveedores: %s", e)
         return jsonify({"error": f"Error del servidor: {str(e)}"}), 500
 
 @home_bp.route('/clientes')
+@con_etag(Cliente.__tablename__)
 def get_clientes():
     try:
-        # Verificar la conexión primero
-        db.session.execute(text('SELECT 1'))
-        logger.info("Conexión verificada para consulta de clientes")
-        
         try:
-            # Solo seleccionar los campos que existen
-            clientes = db.session.query(
-                Cliente.id,
-                Cliente.nombre_cliente,
-                Cliente.empresa_cliente
-            ).order_by(Cliente.nombre_cliente).all()
-            
-            logger.info(f"Consulta de clientes ejecutada. Total encontrados: {len(clientes)}")
+            # Servir desde la caché mientras la versión de la tabla no cambie
+            version = versiones_actuales([Cliente.__tablename__])[Cliente.__tablename__]
+            cuerpo = cache_listas.obtener('clientes', version)
+            if cuerpo is None:
+                # Solo seleccionar los campos que existen
+                clientes = db.session.query(
+                    Cliente.id,
+                    Cliente.nombre_cliente,
+                    Cliente.empresa_cliente
+                ).order_by(Cliente.nombre_cliente).all()
+                
+                logger.info("Consulta de clientes ejecutada. Total encontrados: %s", len(clientes))
+                
+                resultado = [{
+                    'id': cliente.id,
+                    'nombre_cliente': cliente.nombre_cliente,
+                    'empresa_cliente': cliente.empresa_cliente
+                } for cliente in clientes]
+                cuerpo = current_app.json.dumps(resultado)
+                cache_listas.guardar('clientes', version, cuerpo)
             
-            resultado = [{
-                'id': cliente.id,
-                'nombre_cliente': cliente.nombre_cliente,
-                'empresa_cliente': cliente.empresa_cliente
-            } for cliente in clientes]
-            
-            return jsonify(resultado)
+            return Response(cuerpo, mimetype='application/json')
             
         except SQLAlchemyError as e:
-            logger.error(f"Error en la consulta de clientes: {str(e)}")
+            logger.error("Error en la consulta de clientes: %s", e)
             return jsonify({"error": f"Error en la consulta: {str(e)}"}), 500
             
     except Exception as e:
-        logger.error(f"Error general en get_clientes: {str(e)}")
+        logger.error("Error general en get_clientes: %s", e)
         return jsonify({"error": f"Error del servidor: {str(e)}"}), 500
     
 @home_bp.route('/orden/<int:orden_id>', methods=['GET'])
@@ -305,73 +681,4 @@ def obtener_orden(orden_id):
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 400
-    
-@home_bp.route('/orden/<int:orden_id>', methods=['PUT'])
-def actualizar_orden(orden_id):
-    try:
-        data = request.get_json()
-        
-        orden = Orden.query.get_or_404(orden_id)
-
-        # Validamos que existan los datos necesarios
-        required_fields = ['tipo_orden', 'interlocutor_id', 'valor_orden', 'fecha_orden', 'estado_orden']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'El campo {field} es requerido'}), 400
-
-        # Validamos el tipo de orden
-        if data['tipo_orden'] not in ['Entrada', 'Salida']:
-            return jsonify({'error': 'Tipo de orden inválido'}), 400
-
-        # Validamos el estado
-        if data['estado_orden'] not in ['Pendiente', 'Procesada', 'Cancelada', 'Completada']:
-            return jsonify({'error': 'Estado de orden inválido'}), 400
-
-        # Verificamos que el interlocutor exista según el tipo de orden
-        if data['tipo_orden'] == 'Entrada':
-            proveedor = Proveedor.query.get(data['interlocutor_id'])
-            if not proveedor:
-                return jsonify({'error': 'Proveedor no encontrado'}), 400
-            orden.cliente_id = None
-            orden.proveedor_id = data['interlocutor_id']
-        else:
-            cliente = Cliente.query.get(data['interlocutor_id'])
-            if not cliente:
-                return jsonify({'error': 'Cliente no encontrado'}), 400
-            orden.proveedor_id = None
-            orden.cliente_id = data['interlocutor_id']
-
-        # Actualizar los campos de la orden
-        orden.tipo_orden = data['tipo_orden']
-        try:
-            orden.valor_orden = float(data['valor_orden'])
-        except ValueError:
-            return jsonify({'error': 'El valor de la orden debe ser un número válido'}), 400
-            
-        try:
-            orden.fecha_orden = datetime.strptime(data['fecha_orden'], '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}), 400
-            
-        orden.estado_orden = data['estado_orden']
-        
-        db.session.commit()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Orden actualizada correctamente'
-        })
-        
-    except IntegrityError as e:
-        db.session.rollback()
-        logger.error(f"Error de integridad al manejar orden {orden_id}: {str(e)}")
-        return jsonify({'error': 'Error de integridad en los datos'}), 400
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        logger.error(f"Error SQL al manejar orden {orden_id}: {str(e)}")
-        return jsonify({'error': 'Error en la base de datos'}), 500
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error inesperado: {str(e)}")
-        return jsonify({'error': 'Error inesperado'}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 400
\ No newline at end of file
@@ -1,212 +1,303 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from models import db, Cliente, Proveedor, Orden
 from datetime import datetime
 import logging
-from sqlalchemy import or_, and_, text, func
+import json
+import shutil
+import tempfile
+from sqlalchemy import or_, and_, text, func, delete, select, exists
 from sqlalchemy.exc import SQLAlchemyError
 from decimal import Decimal
+from services.version_datos import con_etag, incrementar_version, versiones_actuales
+from services.cache_local import cache_listas, cache_calculos
+from services.estadisticas_service import EstadisticasService
+from services.busqueda_interlocutores import buscador_interlocutores, entrada_cliente, entrada_proveedor
+from services.autocompletado import autocompletado, datos_cliente, datos_proveedor
+from services.interlocutores import (TIPOS_INTERLOCUTOR, ORDENES_INTERLOCUTOR, consulta_interlocutores,
+                                     codificar_cursor_interlocutor, decodificar_cursor_interlocutor,
+                                     tiene_ordenes, ids_con_ordenes)
+from services.importacion import formato_archivo
+from services.importacion_interlocutores import importar_interlocutores
+from services.paginacion import (codificar_cursor_fecha_id, decodificar_cursor_fecha_id, codificar_cursor_id,
+                                 decodificar_cursor_id, leer_per_page, condicion_keyset)
 
-# Configuración del logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# El logging se configura de forma central en logging_config.py
 logger = logging.getLogger(__name__)
 
 interlocutor_bp = Blueprint('interlocutor', __name__, url_prefix='/api')
 
+# Campos que se pueden pedir con fields= en /api/interlocutor/lista
+CAMPOS_LISTA = ('id', 'nombre', 'empresa', 'email', 'telefono', 'rut', 'direccion')
+CAMPOS_LISTA_DEFECTO = ('id', 'nombre', 'empresa', 'email', 'telefono')
+
+def _columnas_lista(modelo, sufijo):
+    """Campo pedido -> (nombre en la respuesta, columna) para clientes o proveedores"""
+    return {
+        'id': ('id', modelo.id),
+        'nombre': (f'nombre_{sufijo}', getattr(modelo, f'nombre_{sufijo}')),
+        'empresa': (f'empresa_{sufijo}', getattr(modelo, f'empresa_{sufijo}')),
+        'email': ('email', modelo.email),
+        'telefono': ('telefono', modelo.telefono),
+        'rut': ('rut', modelo.rut),
+        'direccion': ('direccion', modelo.direccion)
+    }
+
+def _leer_campos_lista(args):
+    fields = args.get('fields')
+    if not fields:
+        return list(CAMPOS_LISTA_DEFECTO)
+    campos = []
+    for campo in fields.split(','):
+        campo = campo.strip()
+        if not campo or campo in campos:
+            continue
+        if campo not in CAMPOS_LISTA:
+            raise ValueError(f"Campo no permitido: {campo}. Campos válidos: {', '.join(CAMPOS_LISTA)}")
+        campos.append(campo)
+    # El id siempre se incluye: identifica la fila y arma el cursor
+    if 'id' not in campos:
+        campos.insert(0, 'id')
+    return campos
+
+def _pagina_lista(modelo, sufijo, campos, cursor, per_page):
+    """Una página de clientes o proveedores ordenada por id, solo con las columnas pedidas"""
+    columnas = _columnas_lista(modelo, sufijo)
+    consulta = db.session.query(*[columnas[campo][1].label(columnas[campo][0]) for campo in campos])
+    if cursor:
+        consulta = consulta.filter(modelo.id > decodificar_cursor_id(cursor))
+    filas = consulta.order_by(modelo.id).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(filas) > per_page:
+        filas = filas[:per_page]
+        next_cursor = codificar_cursor_id(filas[-1].id)
+    return [dict(fila._mapping) for fila in filas], next_cursor
+
+def _lista_unificada(tipo, campos, per_page):
+    """Una página de clientes y proveedores juntos, en una sola consulta ordenada"""
+    sort_by = request.args.get('sort_by')
+    direction = request.args.get('direction', 'asc')
+    if sort_by not in ORDENES_INTERLOCUTOR:
+        raise ValueError(f"sort_by debe ser uno de: {', '.join(ORDENES_INTERLOCUTOR)}")
+    if direction not in ['asc', 'desc']:
+        raise ValueError("direction debe ser 'asc' o 'desc'")
+
+    cursor = request.args.get('cursor')
+    despues_de = decodificar_cursor_interlocutor(cursor) if cursor else None
+    tipos = TIPOS_INTERLOCUTOR if tipo == 'todos' else (tipo.capitalize(),)
+
+    consulta = consulta_interlocutores(campos, tipos, sort_by, direction == 'desc', despues_de, per_page + 1)
+    filas = db.session.execute(consulta).all()
+
+    next_cursor = None
+    if len(filas) > per_page:
+        filas = filas[:per_page]
+        next_cursor = codificar_cursor_interlocutor(filas[-1], sort_by)
+    return {
+        'interlocutores': [dict(fila._mapping) for fila in filas],
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    }
+
 @interlocutor_bp.route('/interlocutor/lista')
+@con_etag(Cliente.__tablename__, Proveedor.__tablename__)
 def get_lista():
     try:
-        # Obtener todos los clientes y proveedores
-        clientes = Cliente.query.all()
-        proveedores = Proveedor.query.all()
-        
-        # Preparar respuesta
-        return jsonify({
-            'clientes': [{
-                'id': c.id,
-                'nombre_cliente': c.nombre_cliente,
-                'empresa_cliente': c.empresa_cliente,
-                'email': c.email,
-                'telefono': c.telefono
-            } for c in clientes],
-            'proveedores': [{
-                'id': p.id,
-                'nombre_proveedor': p.nombre_proveedor,
-                'empresa_proveedor': p.empresa_proveedor,
-                'email': p.email,
-                'telefono': p.telefono
-            } for p in proveedores]
-        })
+        tipo = request.args.get('tipo', 'todos')  # 'cliente', 'proveedor' o 'todos'
+        if tipo not in ['todos', 'cliente', 'proveedor']:
+            return jsonify({"error": "tipo debe ser 'cliente', 'proveedor' o 'todos'"}), 400
+        try:
+            per_page = leer_per_page(request.args)
+            campos = _leer_campos_lista(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Con sort_by, ambos tipos se listan juntos ordenados por esa columna
+        if 'sort_by' in request.args:
+            try:
+                return jsonify(_lista_unificada(tipo, campos, per_page))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+        # Clientes y proveedores se paginan por separado, cada uno con su cursor
+        respuesta = {'per_page': per_page}
+        try:
+            if tipo in ['todos', 'cliente']:
+                respuesta['clientes'], respuesta['next_cursor_cliente'] = _pagina_lista(
+                    Cliente, 'cliente', campos, request.args.get('cursor_cliente'), per_page)
+            if tipo in ['todos', 'proveedor']:
+                respuesta['proveedores'], respuesta['next_cursor_proveedor'] = _pagina_lista(
+                    Proveedor, 'proveedor', campos, request.args.get('cursor_proveedor'), per_page)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(respuesta)
     except Exception as e:
-        logger.error(f"Error obteniendo lista de interlocutores: {str(e)}")
+        logger.error("Error obteniendo lista de interlocutores: %s", e)
         return jsonify({"error": str(e)}), 500
     
+# Ids aceptados por petición en la eliminación en lote
+MAX_ELIMINAR_LOTE = 1000
+
+# Órdenes incluidas por defecto en cada página del detalle de un interlocutor
+PER_PAGE_DETALLE = 10
+
+def _info_cliente(cliente):
+    return {
+        'id': cliente.id,
+        'nombre': cliente.nombre_cliente,
+        'empresa': cliente.empresa_cliente,
+        'tipo': 'Cliente',
+        'email': cliente.email,
+        'telefono': cliente.telefono,
+        'direccion': cliente.direccion
+    }
+
+def _info_proveedor(proveedor):
+    return {
+        'id': proveedor.id,
+        'nombre': proveedor.nombre_proveedor,
+        'empresa': proveedor.empresa_proveedor,
+        'tipo': 'Proveedor',
+        'email': proveedor.email,
+        'telefono': proveedor.telefono,
+        'direccion': proveedor.direccion
+    }
+
+def _consulta_ordenes_interlocutor(columna_fk, interlocutor_id):
+    """Órdenes de un interlocutor en orden estable (fecha_orden, id) descendente"""
+    return db.session.query(
+        Orden.id,
+        Orden.valor_orden,
+        Orden.fecha_orden,
+        Orden.estado_orden,
+        Orden.tipo_orden
+    ).filter(columna_fk == interlocutor_id)\
+     .order_by(Orden.fecha_orden.desc(), Orden.id.desc())
+
+def _serializar_ordenes_interlocutor(ordenes):
+    return [{
+        'id': orden.id,
+        'tipo': orden.tipo_orden,
+        'valor': float(orden.valor_orden),
+        'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
+        'estado': orden.estado_orden
+    } for orden in ordenes]
+
+def _pagina_ordenes_interlocutor(columna_fk, interlocutor_id, cursor, per_page):
+    """Una página por cursor sobre (fecha_orden, id): cuesta lo mismo en cualquier profundidad.
+
+    Devuelve (órdenes serializadas, next_cursor); next_cursor es None en la última página.
+    """
+    consulta = _consulta_ordenes_interlocutor(columna_fk, interlocutor_id)
+    if cursor:
+        ultima_fecha, ultimo_id = decodificar_cursor_fecha_id(cursor)
+        consulta = consulta.filter(condicion_keyset([Orden.fecha_orden, Orden.id], [ultima_fecha, ultimo_id], True))
+
+    ordenes = consulta.limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(ordenes) > per_page:
+        ordenes = ordenes[:per_page]
+        next_cursor = codificar_cursor_fecha_id(ordenes[-1].fecha_orden, ordenes[-1].id)
+    return _serializar_ordenes_interlocutor(ordenes), next_cursor
+
+def _detalle_interlocutor(info, columna_fk, interlocutor_id):
+    """Respuesta de detalle: estadísticas precalculadas y una página de órdenes.
+
+    Las órdenes se paginan por cursor sobre (fecha_orden, id) descendente con los
+    parámetros cursor y per_page; next_cursor es None en la última página.
+    """
+    per_page = leer_per_page(request.args, defecto=PER_PAGE_DETALLE)
+    ordenes, next_cursor = _pagina_ordenes_interlocutor(columna_fk, interlocutor_id, request.args.get('cursor'), per_page)
+
+    return {
+        'info_interlocutor': info,
+        'estadisticas': EstadisticasService.obtener(info['tipo'], interlocutor_id),
+        'ordenes': ordenes,
+        'next_cursor': next_cursor
+    }
+
 @interlocutor_bp.route('/cliente/<int:cliente_id>')
 def get_cliente_detail(cliente_id):
     try:
         cliente = Cliente.query.get_or_404(cliente_id)
+        return jsonify(_detalle_interlocutor(_info_cliente(cliente), Orden.cliente_id, cliente_id))
         
-        # Obtener todas las órdenes del cliente
-        ordenes = db.session.query(
-            Orden.id,
-            Orden.valor_orden,
-            Orden.fecha_orden,
-            Orden.estado_orden,
-            Orden.tipo_orden
-        ).filter(Orden.cliente_id == cliente_id).all()
-        
-        # Calcular estadísticas
-        total_ordenes = len(ordenes)
-        valor_total = sum(float(orden.valor_orden) for orden in ordenes) if ordenes else 0
-        ultima_orden = max((orden.fecha_orden for orden in ordenes), default=None)
-        
-        # Preparar respuesta
-        cliente_data = {
-            'info_interlocutor': {
-                'id': cliente.id,
-                'nombre': cliente.nombre_cliente,
-                'empresa': cliente.empresa_cliente,
-                'tipo': 'Cliente',
-                'email': cliente.email,
-                'telefono': cliente.telefono,
-                'direccion': cliente.direccion
-            },
-            'estadisticas': {
-                'total_ordenes': total_ordenes,
-                'valor_total': valor_total,
-                'ultima_orden': ultima_orden.strftime('%Y-%m-%d') if ultima_orden else None
-            },
-            'ordenes': [{
-                'id': orden.id,
-                'tipo': orden.tipo_orden,
-                'valor': float(orden.valor_orden),
-                'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                'estado': orden.estado_orden
-            } for orden in ordenes]
-        }
-        
-        return jsonify(cliente_data)
-        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error obteniendo detalles del cliente {cliente_id}: {str(e)}")
+        logger.error("Error obteniendo detalles del cliente %s: %s", cliente_id, e)
         return jsonify({"error": str(e)}), 500
 
 @interlocutor_bp.route('/proveedor/<int:proveedor_id>')
 def get_proveedor_detail(proveedor_id):
     try:
         proveedor = Proveedor.query.get_or_404(proveedor_id)
+        return jsonify(_detalle_interlocutor(_info_proveedor(proveedor), Orden.proveedor_id, proveedor_id))
         
-        # Obtener todas las órdenes del proveedor
-        ordenes = db.session.query(
-            Orden.id,
-            Orden.valor_orden,
-            Orden.fecha_orden,
-            Orden.estado_orden,
-            Orden.tipo_orden
-        ).filter(Orden.proveedor_id == proveedor_id).all()
-        
-        # Calcular estadísticas
-        total_ordenes = len(ordenes)
-        valor_total = sum(float(orden.valor_orden) for orden in ordenes) if ordenes else 0
-        ultima_orden = max((orden.fecha_orden for orden in ordenes), default=None)
-        
-        # Preparar respuesta
-        proveedor_data = {
-            'info_interlocutor': {
-                'id': proveedor.id,
-                'nombre': proveedor.nombre_proveedor,
-                'empresa': proveedor.empresa_proveedor,
-                'tipo': 'Proveedor',
-                'email': proveedor.email,
-                'telefono': proveedor.telefono,
-                'direccion': proveedor.direccion
-            },
-            'estadisticas': {
-                'total_ordenes': total_ordenes,
-                'valor_total': valor_total,
-                'ultima_orden': ultima_orden.strftime('%Y-%m-%d') if ultima_orden else None
-            },
-            'ordenes': [{
-                'id': orden.id,
-                'tipo': orden.tipo_orden,
-                'valor': float(orden.valor_orden),
-                'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                'estado': orden.estado_orden
-            } for orden in ordenes]
-        }
-        
-        return jsonify(proveedor_data)
-        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error obteniendo detalles del proveedor {proveedor_id}: {str(e)}")
+        logger.error("Error obteniendo detalles del proveedor %s: %s", proveedor_id, e)
         return jsonify({"error": str(e)}), 500
 
+def _ordenes_interlocutor(modelo, tipo, columna_fk, interlocutor_id):
+    """Órdenes de un interlocutor sin COUNT(*) por página.
+
+    Por defecto se mantiene la respuesta por número de página (page y per_page)
+    con total_pages, current_page y total_items; el total sale de las
+    estadísticas precalculadas. Si se envía el parámetro cursor (vacío para la
+    primera página) se pagina por cursor sobre (fecha_orden, id) y la respuesta
+    es {ordenes, next_cursor, per_page}, con total_items solo si se pide
+    incluir_total=1.
+    """
+    if not db.session.query(exists().where(modelo.id == interlocutor_id)).scalar():
+        return jsonify({"error": f"{tipo} no encontrado"}), 404
+
+    try:
+        per_page = leer_per_page(request.args, defecto=PER_PAGE_DETALLE)
+
+        if 'cursor' not in request.args:
+            page = request.args.get('page', 1, type=int)
+            if page < 1:
+                raise ValueError('page debe ser un entero positivo')
+
+            total = EstadisticasService.obtener(tipo, interlocutor_id)['total_ordenes']
+            ordenes = _consulta_ordenes_interlocutor(columna_fk, interlocutor_id)\
+                .offset((page - 1) * per_page)\
+                .limit(per_page)\
+                .all()
+            return jsonify({
+                'ordenes': _serializar_ordenes_interlocutor(ordenes),
+                'total_pages': -(-total // per_page),
+                'current_page': page,
+                'total_items': total
+            })
+
+        ordenes, next_cursor = _pagina_ordenes_interlocutor(columna_fk, interlocutor_id, request.args['cursor'], per_page)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    respuesta = {'ordenes': ordenes, 'next_cursor': next_cursor, 'per_page': per_page}
+    if request.args.get('incluir_total') in ['1', 'true']:
+        respuesta['total_items'] = EstadisticasService.obtener(tipo, interlocutor_id)['total_ordenes']
+    return jsonify(respuesta)
+
 @interlocutor_bp.route('/cliente/ordenes/<int:cliente_id>')
 def get_cliente_ordenes(cliente_id):
     try:
-        # Verificar que el cliente existe
-        cliente = Cliente.query.get_or_404(cliente_id)
-        
-        # Obtener órdenes con paginación
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
-        ordenes = Orden.query.filter_by(cliente_id=cliente_id)\
-            .paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Preparar respuesta
-        ordenes_data = {
-            'ordenes': [{
-                'id': orden.id,
-                'tipo': orden.tipo_orden,
-                'valor': float(orden.valor_orden),
-                'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                'estado': orden.estado_orden
-            } for orden in ordenes.items],
-            'total_pages': ordenes.pages,
-            'current_page': page,
-            'total_items': ordenes.total
-        }
-        
-        return jsonify(ordenes_data)
-        
+        return _ordenes_interlocutor(Cliente, 'Cliente', Orden.cliente_id, cliente_id)
     except Exception as e:
-        logger.error(f"Error obteniendo órdenes del cliente {cliente_id}: {str(e)}")
+        logger.error("Error obteniendo órdenes del cliente %s: %s", cliente_id, e)
         return jsonify({"error": str(e)}), 500
 
 @interlocutor_bp.route('/proveedor/ordenes/<int:proveedor_id>')
 def get_proveedor_ordenes(proveedor_id):
     try:
-        # Verificar que el proveedor existe
-        proveedor = Proveedor.query.get_or_404(proveedor_id)
-        
-        # Obtener órdenes con paginación
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
-        ordenes = Orden.query.filter_by(proveedor_id=proveedor_id)\
-            .paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Preparar respuesta
-        ordenes_data = {
-            'ordenes': [{
-                'id': orden.id,
-                'tipo': orden.tipo_orden,
-                'valor': float(orden.valor_orden),
-                'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                'estado': orden.estado_orden
-            } for orden in ordenes.items],
-            'total_pages': ordenes.pages,
-            'current_page': page,
-            'total_items': ordenes.total
-        }
-        
-        return jsonify(ordenes_data)
-        
+        return _ordenes_interlocutor(Proveedor, 'Proveedor', Orden.proveedor_id, proveedor_id)
     except Exception as e:
-        logger.error(f"Error obteniendo órdenes del proveedor {proveedor_id}: {str(e)}")
+        logger.error("Error obteniendo órdenes del proveedor %s: %s", proveedor_id, e)
         return jsonify({"error": str(e)}), 500
 
 @interlocutor_bp.route('/buscar')
@@ -214,93 +305,80 @@ def buscar_interlocutores():
     try:
         termino = request.args.get('q', '')
         tipo = request.args.get('tipo', 'todos')  # 'cliente', 'proveedor' o 'todos'
-        
-        resultados = []
-        
-        if tipo in ['todos', 'cliente']:
-            clientes = Cliente.query.filter(
-                or_(
-                    Cliente.nombre_cliente.ilike(f'%{termino}%'),
-                    Cliente.empresa_cliente.ilike(f'%{termino}%')
-                )
-            ).all()
-            
-            resultados.extend([{
-                'id': cliente.id,
-                'nombre': cliente.nombre_cliente,
-                'empresa': cliente.empresa_cliente,
-                'tipo': 'Cliente'
-            } for cliente in clientes])
-            
-        if tipo in ['todos', 'proveedor']:
-            proveedores = Proveedor.query.filter(
-                or_(
-                    Proveedor.nombre_proveedor.ilike(f'%{termino}%'),
-                    Proveedor.empresa_proveedor.ilike(f'%{termino}%')
-                )
-            ).all()
-            
-            resultados.extend([{
-                'id': proveedor.id,
-                'nombre': proveedor.nombre_proveedor,
-                'empresa': proveedor.empresa_proveedor,
-                'tipo': 'Proveedor'
-            } for proveedor in proveedores])
-        
+        limite = request.args.get('limite', current_app.config.get('BUSQUEDA_LIMITE', 20), type=int)
+        if limite is None or limite < 1:
+            return jsonify({"error": "limite debe ser un entero positivo"}), 400
+        limite = min(limite, current_app.config.get('BUSQUEDA_LIMITE_MAXIMO', 100))
+
+        # Índice de trigramas en memoria: busca subcadenas sin recorrer las tablas
+        resultados = buscador_interlocutores.buscar(termino, tipo, limite)
         return jsonify(resultados)
         
     except Exception as e:
-        logger.error(f"Error en la búsqueda de interlocutores: {str(e)}")
+        logger.error("Error en la búsqueda de interlocutores: %s", e)
         return jsonify({"error": str(e)}), 500
 
+def _calcular_estadisticas():
+    """Totales y top 5 de clientes y proveedores por valor de órdenes"""
+    total_clientes = Cliente.query.count()
+    total_proveedores = Proveedor.query.count()
+    
+    # Top 5 clientes por valor total de órdenes
+    top_clientes = db.session.query(
+        Cliente.id,
+        Cliente.nombre_cliente,
+        Cliente.empresa_cliente,
+        func.sum(Orden.valor_orden).label('total_valor')
+    ).join(Orden).group_by(Cliente.id)\
+     .order_by(func.sum(Orden.valor_orden).desc())\
+     .limit(5).all()
+    
+    # Top 5 proveedores por valor total de órdenes
+    top_proveedores = db.session.query(
+        Proveedor.id,
+        Proveedor.nombre_proveedor,
+        Proveedor.empresa_proveedor,
+        func.sum(Orden.valor_orden).label('total_valor')
+    ).join(Orden).group_by(Proveedor.id)\
+     .order_by(func.sum(Orden.valor_orden).desc())\
+     .limit(5).all()
+    
+    return {
+        'totales': {
+            'clientes': total_clientes,
+            'proveedores': total_proveedores
+        },
+        'top_clientes': [{
+            'id': cliente.id,
+            'nombre': cliente.nombre_cliente,
+            'empresa': cliente.empresa_cliente,
+            'total_valor': float(cliente.total_valor)
+        } for cliente in top_clientes],
+        'top_proveedores': [{
+            'id': proveedor.id,
+            'nombre': proveedor.nombre_proveedor,
+            'empresa': proveedor.empresa_proveedor,
+            'total_valor': float(proveedor.total_valor)
+        } for proveedor in top_proveedores]
+    }
+
 @interlocutor_bp.route('/estadisticas')
 def get_estadisticas():
     try:
-        # Estadísticas generales
-        total_clientes = Cliente.query.count()
-        total_proveedores = Proveedor.query.count()
-        
-        # Top 5 clientes por valor total de órdenes
-        top_clientes = db.session.query(
-            Cliente.id,
-            Cliente.nombre_cliente,
-            Cliente.empresa_cliente,
-            func.sum(Orden.valor_orden).label('total_valor')
-        ).join(Orden).group_by(Cliente.id)\
-         .order_by(func.sum(Orden.valor_orden).desc())\
-         .limit(5).all()
-        
-        # Top 5 proveedores por valor total de órdenes
-        top_proveedores = db.session.query(
-            Proveedor.id,
-            Proveedor.nombre_proveedor,
-            Proveedor.empresa_proveedor,
-            func.sum(Orden.valor_orden).label('total_valor')
-        ).join(Orden).group_by(Proveedor.id)\
-         .order_by(func.sum(Orden.valor_orden).desc())\
-         .limit(5).all()
-        
-        return jsonify({
-            'totales': {
-                'clientes': total_clientes,
-                'proveedores': total_proveedores
-            },
-            'top_clientes': [{
-                'id': cliente.id,
-                'nombre': cliente.nombre_cliente,
-                'empresa': cliente.empresa_cliente,
-                'total_valor': float(cliente.total_valor)
-            } for cliente in top_clientes],
-            'top_proveedores': [{
-                'id': proveedor.id,
-                'nombre': proveedor.nombre_proveedor,
-                'empresa': proveedor.empresa_proveedor,
-                'total_valor': float(proveedor.total_valor)
-            } for proveedor in top_proveedores]
-        })
+        # Las escrituras de órdenes e interlocutores cambian la versión y fuerzan
+        # el recálculo; el TTL acota lo que no pasa por version_datos
+        version = versiones_actuales((Cliente.__tablename__, Proveedor.__tablename__, Orden.__tablename__))
+        estadisticas = cache_calculos.obtener(
+            'estadisticas',
+            tuple(sorted(version.items())),
+            _calcular_estadisticas,
+            ttl=current_app.config.get('ESTADISTICAS_CACHE_TTL', 60),
+            revalidar_en_fondo=current_app.config.get('ESTADISTICAS_STALE_WHILE_REVALIDATE', True)
+        )
+        return jsonify(estadisticas)
         
     except Exception as e:
-        logger.error(f"Error obteniendo estadísticas: {str(e)}")
+        logger.error("Error obteniendo estadísticas: %s", e)
         return jsonify({"error": str(e)}), 500
     
     # Añadir estas rutas nuevas al archivo existente
@@ -319,7 +397,14 @@ def create_cliente():
         )
         
         db.session.add(nuevo_cliente)
+        db.session.flush()
+        entrada = entrada_cliente(nuevo_cliente)
+        sugerencia = datos_cliente(nuevo_cliente)
         db.session.commit()
+        versiones = incrementar_version(Cliente.__tablename__)
+        cache_listas.invalidar('clientes')
+        buscador_interlocutores.indexar(versiones, entrada)
+        autocompletado.indexar(versiones, sugerencia)
         
         return jsonify({
             "success": True,
@@ -329,7 +414,7 @@ def create_cliente():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error creando cliente: {str(e)}")
+        logger.error("Error creando cliente: %s", e)
         return jsonify({"success": False, "error": str(e)}), 400
 
 # Ruta para crear proveedor
@@ -346,7 +431,14 @@ def create_proveedor():
         )
         
         db.session.add(nuevo_proveedor)
+        db.session.flush()
+        entrada = entrada_proveedor(nuevo_proveedor)
+        sugerencia = datos_proveedor(nuevo_proveedor)
         db.session.commit()
+        versiones = incrementar_version(Proveedor.__tablename__)
+        cache_listas.invalidar('proveedores')
+        buscador_interlocutores.indexar(versiones, entrada)
+        autocompletado.indexar(versiones, sugerencia)
         
         return jsonify({
             "success": True,
@@ -356,7 +448,90 @@ def create_proveedor():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error creando proveedor: {str(e)}")
+        logger.error("Error creando proveedor: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Importación masiva de clientes o proveedores desde CSV/XLSX
+@interlocutor_bp.route('/interlocutor/<tipo>/importar', methods=['POST'])
+def importar_archivo(tipo):
+    """Importa el archivo recibido en 'archivo' y responde el avance en NDJSON"""
+    if tipo not in ['cliente', 'proveedor']:
+        return jsonify({"success": False, "error": "tipo debe ser 'cliente' o 'proveedor'"}), 400
+    archivo = request.files.get('archivo')
+    if archivo is None or not archivo.filename:
+        return jsonify({"success": False, "error": "Debe enviar el archivo en el campo 'archivo'"}), 400
+    try:
+        formato = formato_archivo(archivo.filename, request.args.get('formato'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    tamano_lote = current_app.config.get('IMPORTACION_LOTE', 1000)
+
+    # Flask cierra los archivos de la petición al salir de la vista, antes de
+    # enviar la respuesta en streaming: se trabaja sobre una copia en disco
+    copia = tempfile.TemporaryFile()
+    shutil.copyfileobj(archivo.stream, copia)
+    copia.seek(0)
+
+    def generar():
+        try:
+            for evento in importar_interlocutores(copia, formato, tipo.capitalize(), tamano_lote):
+                yield json.dumps(evento, ensure_ascii=False) + '\n'
+        except Exception as e:
+            # La respuesta ya comenzó: el error se informa como último evento
+            logger.error("Error importando %s: %s", tipo, e)
+            yield json.dumps({'evento': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+        finally:
+            copia.close()
+
+    return Response(stream_with_context(generar()), mimetype='application/x-ndjson')
+
+# Eliminación en lote: {"ids": [...]}; los que tienen órdenes no se eliminan
+@interlocutor_bp.route('/interlocutor/<tipo>/eliminar', methods=['POST'])
+def eliminar_lote(tipo):
+    if tipo not in ['cliente', 'proveedor']:
+        return jsonify({"success": False, "error": "tipo debe ser 'cliente' o 'proveedor'"}), 400
+    modelo, tipo_interlocutor = (Cliente, 'Cliente') if tipo == 'cliente' else (Proveedor, 'Proveedor')
+
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"success": False, "error": "ids debe ser una lista no vacía"}), 400
+    if len(ids) > MAX_ELIMINAR_LOTE:
+        return jsonify({"success": False, "error": f"Máximo {MAX_ELIMINAR_LOTE} ids por petición"}), 400
+    if any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+        return jsonify({"success": False, "error": "Los ids deben ser enteros"}), 400
+
+    try:
+        solicitados = set(ids)
+        existentes = set(db.session.scalars(select(modelo.id).where(modelo.id.in_(solicitados))))
+        con_ordenes = ids_con_ordenes(tipo_interlocutor, existentes)
+        a_eliminar = sorted(existentes - con_ordenes)
+
+        if a_eliminar:
+            db.session.execute(
+                delete(modelo)
+                .where(modelo.id.in_(a_eliminar))
+                .execution_options(synchronize_session=False)
+            )
+            EstadisticasService.eliminar(tipo_interlocutor, a_eliminar)
+            db.session.commit()
+            versiones = incrementar_version(modelo.__tablename__, Orden.__tablename__)
+            cache_listas.invalidar('clientes' if tipo == 'cliente' else 'proveedores')
+            for interlocutor_id in a_eliminar:
+                buscador_interlocutores.quitar(versiones, tipo_interlocutor, interlocutor_id)
+                autocompletado.quitar(versiones, tipo_interlocutor, interlocutor_id)
+
+        return jsonify({
+            "success": True,
+            "eliminados": a_eliminar,
+            "con_ordenes": sorted(con_ordenes),
+            "no_encontrados": sorted(solicitados - existentes)
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error eliminando %s en lote: %s", tipo, e)
         return jsonify({"success": False, "error": str(e)}), 400
 
 # Actualizar la ruta GET/PUT/DELETE para cliente
@@ -366,42 +541,7 @@ def manage_cliente(cliente_id):
         cliente = Cliente.query.get_or_404(cliente_id)
         
         if request.method == 'GET':
-            # Obtener órdenes
-            ordenes = db.session.query(
-                Orden.id,
-                Orden.valor_orden,
-                Orden.fecha_orden,
-                Orden.estado_orden,
-                Orden.tipo_orden
-            ).filter(Orden.cliente_id == cliente_id).all()
-            
-            total_ordenes = len(ordenes)
-            valor_total = sum(float(orden.valor_orden) for orden in ordenes) if ordenes else 0
-            ultima_orden = max((orden.fecha_orden for orden in ordenes), default=None)
-            
-            return jsonify({
-                'info_interlocutor': {
-                    'id': cliente.id,
-                    'nombre': cliente.nombre_cliente,
-                    'empresa': cliente.empresa_cliente,
-                    'tipo': 'Cliente',
-                    'email': cliente.email,
-                    'telefono': cliente.telefono,
-                    'direccion': cliente.direccion
-                },
-                'estadisticas': {
-                    'total_ordenes': total_ordenes,
-                    'valor_total': valor_total,
-                    'ultima_orden': ultima_orden.strftime('%Y-%m-%d') if ultima_orden else None
-                },
-                'ordenes': [{
-                    'id': orden.id,
-                    'tipo': orden.tipo_orden,
-                    'valor': float(orden.valor_orden),
-                    'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                    'estado': orden.estado_orden
-                } for orden in ordenes]
-            })
+            return jsonify(_detalle_interlocutor(_info_cliente(cliente), Orden.cliente_id, cliente_id))
             
         elif request.method == 'PUT':
             data = request.get_json()
@@ -411,17 +551,34 @@ def manage_cliente(cliente_id):
             cliente.telefono = data.get('telefono', cliente.telefono)
             cliente.direccion = data.get('direccion', cliente.direccion)
             
+            entrada = entrada_cliente(cliente)
+            sugerencia = datos_cliente(cliente)
             db.session.commit()
+            versiones = incrementar_version(Cliente.__tablename__)
+            cache_listas.invalidar('clientes')
+            buscador_interlocutores.indexar(versiones, entrada)
+            autocompletado.indexar(versiones, sugerencia)
             return jsonify({"success": True, "message": "Cliente actualizado exitosamente"})
             
         elif request.method == 'DELETE':
+            if tiene_ordenes('Cliente', cliente_id):
+                return jsonify({
+                    "success": False,
+                    "error": "No se puede eliminar el cliente porque tiene órdenes asociadas. Por favor, elimine primero las órdenes."
+                }), 400
+
             db.session.delete(cliente)
+            EstadisticasService.eliminar('Cliente', [cliente_id])
             db.session.commit()
+            versiones = incrementar_version(Cliente.__tablename__, Orden.__tablename__)
+            cache_listas.invalidar('clientes')
+            buscador_interlocutores.quitar(versiones, 'Cliente', cliente_id)
+            autocompletado.quitar(versiones, 'Cliente', cliente_id)
             return jsonify({"success": True, "message": "Cliente eliminado exitosamente"})
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error manejando cliente {cliente_id}: {str(e)}")
+        logger.error("Error manejando cliente %s: %s", cliente_id, e)
         return jsonify({"success": False, "error": str(e)}), 400
 
 # Actualizar la ruta GET/PUT/DELETE para proveedor
@@ -431,42 +588,7 @@ def manage_proveedor(proveedor_id):
         proveedor = Proveedor.query.get_or_404(proveedor_id)
         
         if request.method == 'GET':
-            # Obtener órdenes
-            ordenes = db.session.query(
-                Orden.id,
-                Orden.valor_orden,
-                Orden.fecha_orden,
-                Orden.estado_orden,
-                Orden.tipo_orden
-            ).filter(Orden.proveedor_id == proveedor_id).all()
-            
-            total_ordenes = len(ordenes)
-            valor_total = sum(float(orden.valor_orden) for orden in ordenes) if ordenes else 0
-            ultima_orden = max((orden.fecha_orden for orden in ordenes), default=None)
-            
-            return jsonify({
-                'info_interlocutor': {
-                    'id': proveedor.id,
-                    'nombre': proveedor.nombre_proveedor,
-                    'empresa': proveedor.empresa_proveedor,
-                    'tipo': 'Proveedor',
-                    'email': proveedor.email,
-                    'telefono': proveedor.telefono,
-                    'direccion': proveedor.direccion
-                },
-                'estadisticas': {
-                    'total_ordenes': total_ordenes,
-                    'valor_total': valor_total,
-                    'ultima_orden': ultima_orden.strftime('%Y-%m-%d') if ultima_orden else None
-                },
-                'ordenes': [{
-                    'id': orden.id,
-                    'tipo': orden.tipo_orden,
-                    'valor': float(orden.valor_orden),
-                    'fecha': orden.fecha_orden.strftime('%Y-%m-%d'),
-                    'estado': orden.estado_orden
-                } for orden in ordenes]
-            })
+            return jsonify(_detalle_interlocutor(_info_proveedor(proveedor), Orden.proveedor_id, proveedor_id))
             
         elif request.method == 'PUT':
             data = request.get_json()
@@ -476,17 +598,34 @@ def manage_proveedor(proveedor_id):
             proveedor.telefono = data.get('telefono', proveedor.telefono)
             proveedor.direccion = data.get('direccion', proveedor.direccion)
             
+            entrada = entrada_proveedor(proveedor)
+            sugerencia = datos_proveedor(proveedor)
             db.session.commit()
+            versiones = incrementar_version(Proveedor.__tablename__)
+            cache_listas.invalidar('proveedores')
+            buscador_interlocutores.indexar(versiones, entrada)
+            autocompletado.indexar(versiones, sugerencia)
             return jsonify({"success": True, "message": "Proveedor actualizado exitosamente"})
             
         elif request.method == 'DELETE':
+            if tiene_ordenes('Proveedor', proveedor_id):
+                return jsonify({
+                    "success": False,
+                    "error": "No se puede eliminar el proveedor porque tiene órdenes asociadas. Por favor, elimine primero las órdenes."
+                }), 400
+
             db.session.delete(proveedor)
+            EstadisticasService.eliminar('Proveedor', [proveedor_id])
             db.session.commit()
+            versiones = incrementar_version(Proveedor.__tablename__, Orden.__tablename__)
+            cache_listas.invalidar('proveedores')
+            buscador_interlocutores.quitar(versiones, 'Proveedor', proveedor_id)
+            autocompletado.quitar(versiones, 'Proveedor', proveedor_id)
             return jsonify({"success": True, "message": "Proveedor eliminado exitosamente"})
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error manejando proveedor {proveedor_id}: {str(e)}")
+        logger.error("Error manejando proveedor %s: %s", proveedor_id, e)
         return jsonify({"success": False, "error": str(e)}), 400
     
     
@@ -496,19 +635,24 @@ def delete_cliente(cliente_id):
         cliente = Cliente.query.get_or_404(cliente_id)
         
         # Verificar si el cliente tiene órdenes asociadas
-        if cliente.ordenes:
+        if tiene_ordenes('Cliente', cliente_id):
             return jsonify({
                 "success": False, 
                 "error": "No se puede eliminar el cliente porque tiene órdenes asociadas. Por favor, elimine primero las órdenes."
             }), 400
             
         db.session.delete(cliente)
+        EstadisticasService.eliminar('Cliente', [cliente_id])
         db.session.commit()
+        versiones = incrementar_version(Cliente.__tablename__, Orden.__tablename__)
+        cache_listas.invalidar('clientes')
+        buscador_interlocutores.quitar(versiones, 'Cliente', cliente_id)
+        autocompletado.quitar(versiones, 'Cliente', cliente_id)
         return jsonify({"success": True, "message": "Cliente eliminado exitosamente"})
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error eliminando cliente {cliente_id}: {str(e)}")
+        logger.error("Error eliminando cliente %s: %s", cliente_id, e)
         return jsonify({"success": False, "error": str(e)}), 400
 
 @interlocutor_bp.route('/interlocutor/proveedor/<int:proveedor_id>', methods=['DELETE'])
@@ -517,17 +661,22 @@ def delete_proveedor(proveedor_id):
         proveedor = Proveedor.query.get_or_404(proveedor_id)
         
         # Verificar si el proveedor tiene órdenes asociadas
-        if proveedor.ordenes:
+        if tiene_ordenes('Proveedor', proveedor_id):
             return jsonify({
                 "success": False, 
                 "error": "No se puede eliminar el proveedor porque tiene órdenes asociadas. Por favor, elimine primero las órdenes."
             }), 400
             
         db.session.delete(proveedor)
+        EstadisticasService.eliminar('Proveedor', [proveedor_id])
         db.session.commit()
+        versiones = incrementar_version(Proveedor.__tablename__, Orden.__tablename__)
+        cache_listas.invalidar('proveedores')
+        buscador_interlocutores.quitar(versiones, 'Proveedor', proveedor_id)
+        autocompletado.quitar(versiones, 'Proveedor', proveedor_id)
         return jsonify({"success": True, "message": "Proveedor eliminado exitosamente"})
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error eliminando proveedor {proveedor_id}: {str(e)}")
+        logger.error("Error eliminando proveedor %s: %s", proveedor_id, e)
         return jsonify({"success": False, "error": str(e)}), 400
\ No newline at end of file
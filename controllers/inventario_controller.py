@@ -1,13 +1,25 @@
-from flask import Blueprint, jsonify, redirect, render_template, request, url_for
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for, current_app, Response, stream_with_context
 from models import db, Producto, Orden, OrdenProducto
-from datetime import datetime
+from datetime import datetime, time
+import csv
+import io
+import json
 import logging
+import shutil
+import tempfile
 from sqlalchemy import or_, and_, text, func
 from sqlalchemy.exc import SQLAlchemyError
 from decimal import Decimal
+from services.version_datos import con_etag, incrementar_version, VERSION_CATALOGO_PRODUCTOS
+from services.autocompletado import autocompletado, datos_producto
+from services.busqueda_productos import buscador_productos, entrada_producto
+from services.alertas_stock import AlertasStock
+from services.libro_stock import LibroStock
+from services.importacion import formato_archivo
+from services.importacion_productos import importar_productos, CAMPOS_IMPORTACION
+from services.paginacion import codificar_cursor, decodificar_cursor, leer_per_page, condicion_keyset
 
-# Configuración del logging
-logging.basicConfig(level=logging.DEBUG)
+# El logging se configura de forma central en logging_config.py
 logger = logging.getLogger(__name__)
 
 inventario_bp = Blueprint('inventario', __name__)
@@ -24,29 +36,89 @@ def inventario_detalle():
         return redirect(url_for('inventario.inventario'))
     return render_template('inventario-detalle.html')
 
+# Columnas por las que se puede ordenar la lista; todas son NOT NULL y tienen índice (columna, id)
+ORDENES_LISTA = {
+    'id': Producto.id,
+    'nombre': Producto.nombre,
+    'tipo_prenda': Producto.tipo_prenda,
+    'valor_venta': Producto.valor_venta
+}
+# Filtros por igualdad aceptados en la lista
+FILTROS_LISTA = ('tipo_prenda', 'marca', 'talla', 'color', 'estado')
+
+def _codificar_cursor_lista(producto, sort_by):
+    if sort_by == 'id':
+        return codificar_cursor([producto.id])
+    valor = getattr(producto, sort_by)
+    return codificar_cursor([str(valor) if isinstance(valor, Decimal) else valor, producto.id])
+
+def _decodificar_cursor_lista(token, sort_by):
+    """Devuelve los valores (columna de orden, id) guardados en el cursor"""
+    valores = decodificar_cursor(token)
+    try:
+        if sort_by == 'id':
+            if len(valores) != 1:
+                raise ValueError
+            return [int(valores[0])]
+        if len(valores) != 2 or not isinstance(valores[0], str):
+            raise ValueError
+        valor = Decimal(valores[0]) if sort_by == 'valor_venta' else valores[0]
+        return [valor, int(valores[1])]
+    except (ArithmeticError, TypeError, ValueError):
+        raise ValueError('Cursor inválido')
+
 # Rutas API
 @inventario_bp.route('/api/inventario/lista', methods=['GET'])
+@con_etag(Producto.__tablename__)
 def get_lista():
-    try:
-        # Aplicar filtros si existen
-        query = Producto.query
-
-        # Filtrar por estado si se especifica
-        estado = request.args.get('estado')
-        if estado:
-            query = query.filter(Producto.estado == estado)
+    """Lista de productos paginada por cursor sobre (sort_by, id).
 
-        # Ordenar por columna si se especifica
+    Parámetros: sort_by (una de ORDENES_LISTA), direction, cursor, per_page y
+    los filtros de FILTROS_LISTA. next_cursor es None en la última página.
+    """
+    try:
         sort_by = request.args.get('sort_by', 'id')
         direction = request.args.get('direction', 'asc')
-        
-        if hasattr(Producto, sort_by):
-            order_column = getattr(Producto, sort_by)
-            if direction == 'desc':
-                order_column = order_column.desc()
-            query = query.order_by(order_column)
+        if sort_by not in ORDENES_LISTA:
+            return jsonify({"error": f"sort_by debe ser uno de: {', '.join(ORDENES_LISTA)}"}), 400
+        if direction not in ['asc', 'desc']:
+            return jsonify({"error": "direction debe ser 'asc' o 'desc'"}), 400
+        descendente = direction == 'desc'
+
+        condiciones = []
+        for filtro in FILTROS_LISTA:
+            valor = request.args.get(filtro)
+            if valor:
+                condiciones.append(getattr(Producto, filtro) == valor)
+
+        columnas_orden = [Producto.id] if sort_by == 'id' else [ORDENES_LISTA[sort_by], Producto.id]
+        try:
+            per_page = leer_per_page(request.args)
+            cursor = request.args.get('cursor')
+            if cursor:
+                valores = _decodificar_cursor_lista(cursor, sort_by)
+                condiciones.append(condicion_keyset(columnas_orden, valores, descendente))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        productos = query.all()
+        orden_sql = [columna.desc() if descendente else columna.asc() for columna in columnas_orden]
+        productos = db.session.query(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.tipo_prenda,
+            Producto.valor_venta,
+            Producto.stock_actual,
+            Producto.estado
+        ).filter(*condiciones)\
+         .order_by(*orden_sql)\
+         .limit(per_page + 1)\
+         .all()
+
+        next_cursor = None
+        if len(productos) > per_page:
+            productos = productos[:per_page]
+            next_cursor = _codificar_cursor_lista(productos[-1], sort_by)
         
         return jsonify({
             'productos': [{
@@ -56,10 +128,12 @@ def get_lista():
                 'tipo_prenda': p.tipo_prenda,
                 'stock_actual': p.stock_actual,
                 'estado': p.estado
-            } for p in productos]
+            } for p in productos],
+            'next_cursor': next_cursor,
+            'per_page': per_page
         })
     except Exception as e:
-        logger.error(f"Error obteniendo lista de productos: {str(e)}")
+        logger.error("Error obteniendo lista de productos: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @inventario_bp.route('/api/inventario/producto/<int:producto_id>')
@@ -114,7 +188,7 @@ def get_producto_detail(producto_id):
             } for orden in ordenes_relacionadas]
         })
     except Exception as e:
-        logger.error(f"Error obteniendo detalles del producto {producto_id}: {str(e)}")
+        logger.error("Error obteniendo detalles del producto %s: %s", producto_id, e)
         return jsonify({"error": str(e)}), 500
 
 @inventario_bp.route('/api/inventario/producto', methods=['POST'])
@@ -144,8 +218,23 @@ def create_producto():
             estado=data.get('estado', 'Activo')
         )
         
+        AlertasStock.actualizar_producto(nuevo_producto)
         db.session.add(nuevo_producto)
+        if nuevo_producto.stock_actual:
+            # El stock inicial es el primer movimiento del libro
+            db.session.flush()
+            LibroStock.registrar([{
+                'producto_id': nuevo_producto.id,
+                'origen': 'Alta',
+                'cantidad': nuevo_producto.stock_actual
+            }])
+        db.session.flush()
+        sugerencia = datos_producto(nuevo_producto)
+        entrada = entrada_producto(nuevo_producto)
         db.session.commit()
+        versiones = incrementar_version(Producto.__tablename__, VERSION_CATALOGO_PRODUCTOS)
+        autocompletado.indexar(versiones, sugerencia)
+        buscador_productos.indexar(versiones, entrada)
         
         return jsonify({
             "success": True,
@@ -155,7 +244,7 @@ def create_producto():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error creando producto: {str(e)}")
+        logger.error("Error creando producto: %s", e)
         return jsonify({"success": False, "error": str(e)}), 400
 
 @inventario_bp.route('/api/inventario/producto/<int:producto_id>', methods=['PUT', 'DELETE'])
@@ -174,8 +263,15 @@ def manage_producto(producto_id):
                     setattr(producto, campo, data[campo])
             
             producto.fecha_actualizacion = datetime.utcnow()
+            # Un cambio de stock_minimo puede meter o sacar al producto de las alertas
+            AlertasStock.actualizar_producto(producto)
             
+            sugerencia = datos_producto(producto)
+            entrada = entrada_producto(producto)
             db.session.commit()
+            versiones = incrementar_version(Producto.__tablename__, VERSION_CATALOGO_PRODUCTOS)
+            autocompletado.indexar(versiones, sugerencia)
+            buscador_productos.indexar(versiones, entrada)
             return jsonify({
                 "success": True,
                 "message": "Producto actualizado exitosamente"
@@ -191,6 +287,9 @@ def manage_producto(producto_id):
                 
             db.session.delete(producto)
             db.session.commit()
+            versiones = incrementar_version(Producto.__tablename__, VERSION_CATALOGO_PRODUCTOS)
+            autocompletado.quitar(versiones, 'Producto', producto_id)
+            buscador_productos.quitar(versiones, producto_id)
             return jsonify({
                 "success": True,
                 "message": "Producto eliminado exitosamente"
@@ -198,21 +297,144 @@ def manage_producto(producto_id):
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error manejando producto {producto_id}: {str(e)}")
+        logger.error("Error manejando producto %s: %s", producto_id, e)
         return jsonify({"success": False, "error": str(e)}), 400
 
+@inventario_bp.route('/api/inventario/producto/<int:producto_id>/stock')
+@con_etag(Producto.__tablename__)
+def get_stock_en_fecha(producto_id):
+    """Stock del producto en una fecha (parámetro fecha: YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS).
+
+    Una fecha sin hora se toma al cierre del día. Sin fecha devuelve el stock actual.
+    Las fechas anteriores a la apertura del libro de stock responden 400.
+    """
+    try:
+        actual = db.session.query(Producto.stock_actual).filter(Producto.id == producto_id).first()
+        if actual is None:
+            return jsonify({"error": "Producto no encontrado"}), 404
+
+        fecha = request.args.get('fecha')
+        if not fecha:
+            return jsonify({'producto_id': producto_id, 'fecha': None, 'stock': actual.stock_actual or 0})
+        try:
+            if len(fecha) == 10:
+                fecha = datetime.combine(datetime.strptime(fecha, '%Y-%m-%d').date(), time.max)
+            else:
+                fecha = datetime.strptime(fecha, '%Y-%m-%dT%H:%M:%S')
+        except ValueError:
+            return jsonify({"error": "Formato de fecha inválido. Use YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS"}), 400
+
+        try:
+            resultado = LibroStock.stock_en(producto_id, fecha)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        punto_control = resultado['punto_control']
+        return jsonify({
+            'producto_id': producto_id,
+            'fecha': fecha.strftime('%Y-%m-%dT%H:%M:%S'),
+            'stock': resultado['stock'],
+            'punto_control': punto_control.strftime('%Y-%m-%dT%H:%M:%S') if punto_control else None,
+            'movimientos_aplicados': resultado['movimientos_aplicados']
+        })
+    except Exception as e:
+        logger.error("Error obteniendo el stock del producto %s en fecha: %s", producto_id, e)
+        return jsonify({"error": str(e)}), 500
+
+@inventario_bp.route('/api/inventario/alertas')
+@con_etag(Producto.__tablename__)
+def get_alertas():
+    """Cola de reposición: productos bajo el stock mínimo, los de mayor faltante primero.
+
+    Se recorre el índice (bajo_stock, faltante, id), que mantienen las órdenes y
+    las escrituras de inventario, y se pagina por cursor sobre (faltante, id)
+    descendente. Parámetros: cursor, per_page, estado e incluir_total=1 para
+    agregar el total de productos en la cola.
+    """
+    try:
+        try:
+            per_page = leer_per_page(request.args)
+
+            condiciones = [Producto.bajo_stock.is_(True)]
+            estado = request.args.get('estado')
+            if estado:
+                condiciones.append(Producto.estado == estado)
+
+            cursor = request.args.get('cursor')
+            if cursor:
+                valores = decodificar_cursor(cursor)
+                if len(valores) != 2 or not all(isinstance(v, int) and not isinstance(v, bool) for v in valores):
+                    raise ValueError('Cursor inválido')
+                condiciones_pagina = condiciones + [
+                    condicion_keyset([Producto.faltante, Producto.id], valores, True)
+                ]
+            else:
+                condiciones_pagina = condiciones
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Se pide una fila extra para saber si existe una página siguiente
+        productos = db.session.query(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.faltante,
+            Producto.estado
+        ).filter(*condiciones_pagina)\
+         .order_by(Producto.faltante.desc(), Producto.id.desc())\
+         .limit(per_page + 1)\
+         .all()
+
+        next_cursor = None
+        if len(productos) > per_page:
+            productos = productos[:per_page]
+            next_cursor = codificar_cursor([productos[-1].faltante, productos[-1].id])
+
+        respuesta = {
+            'alertas': [{
+                'id': p.id,
+                'codigo': p.codigo,
+                'nombre': p.nombre,
+                'stock_actual': p.stock_actual,
+                'stock_minimo': p.stock_minimo,
+                'faltante': p.faltante,
+                'estado': p.estado
+            } for p in productos],
+            'next_cursor': next_cursor,
+            'per_page': per_page
+        }
+        if request.args.get('incluir_total') in ['1', 'true']:
+            respuesta['total'] = db.session.query(func.count(Producto.id)).filter(*condiciones).scalar()
+        return jsonify(respuesta)
+    except Exception as e:
+        logger.error("Error obteniendo alertas de stock: %s", e)
+        return jsonify({"error": str(e)}), 500
+
 @inventario_bp.route('/api/inventario/buscar')
 def buscar_productos():
     try:
         termino = request.args.get('q', '')
-        
-        productos = Producto.query.filter(
-            or_(
-                Producto.nombre.ilike(f'%{termino}%'),
-                Producto.codigo.ilike(f'%{termino}%'),
-                Producto.tipo_prenda.ilike(f'%{termino}%')
-            )
-        ).order_by(Producto.nombre).all()
+        limite = request.args.get('limite', current_app.config.get('BUSQUEDA_LIMITE', 20), type=int)
+        if limite is None or limite < 1:
+            return jsonify({"error": "limite debe ser un entero positivo"}), 400
+        limite = min(limite, current_app.config.get('BUSQUEDA_LIMITE_MAXIMO', 100))
+
+        # El índice en memoria da los ids por relevancia; stock y estado se leen
+        # de la base de datos por clave primaria para que estén al día
+        ids = buscador_productos.buscar(termino, limite)
+        if not ids:
+            return jsonify([])
+        filas = db.session.query(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.tipo_prenda,
+            Producto.stock_actual,
+            Producto.estado
+        ).filter(Producto.id.in_(ids)).all()
+        por_id = {p.id: p for p in filas}
+        productos = [por_id[producto_id] for producto_id in ids if producto_id in por_id]
         
         return jsonify([{
             'id': p.id,
@@ -224,5 +446,85 @@ def buscar_productos():
         } for p in productos])
         
     except Exception as e:
-        logger.error(f"Error en la búsqueda de productos: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        logger.error("Error en la búsqueda de productos: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+# Importación masiva de productos desde CSV/XLSX, actualizando por código
+@inventario_bp.route('/api/inventario/importar', methods=['POST'])
+def importar_archivo():
+    """Importa el archivo recibido en 'archivo' y responde el avance en NDJSON"""
+    archivo = request.files.get('archivo')
+    if archivo is None or not archivo.filename:
+        return jsonify({"success": False, "error": "Debe enviar el archivo en el campo 'archivo'"}), 400
+    try:
+        formato = formato_archivo(archivo.filename, request.args.get('formato'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    tamano_lote = current_app.config.get('IMPORTACION_LOTE', 1000)
+
+    # Flask cierra los archivos de la petición al salir de la vista, antes de
+    # enviar la respuesta en streaming: se trabaja sobre una copia en disco
+    copia = tempfile.TemporaryFile()
+    shutil.copyfileobj(archivo.stream, copia)
+    copia.seek(0)
+
+    def generar():
+        try:
+            for evento in importar_productos(copia, formato, tamano_lote):
+                yield json.dumps(evento, ensure_ascii=False) + '\n'
+        except Exception as e:
+            # La respuesta ya comenzó: el error se informa como último evento
+            logger.error("Error importando productos: %s", e)
+            yield json.dumps({'evento': 'error', 'error': str(e)}, ensure_ascii=False) + '\n'
+        finally:
+            copia.close()
+
+    return Response(stream_with_context(generar()), mimetype='application/x-ndjson')
+
+# Filas que se leen por vuelta del cursor del servidor al exportar
+EXPORTACION_YIELD_PER = 1000
+
+def _stream_productos_csv(condiciones):
+    """Genera el CSV del catálogo por bloques, leyendo con un cursor del lado del servidor"""
+    try:
+        productos = db.session.query(*[getattr(Producto, campo) for campo in CAMPOS_IMPORTACION])\
+            .filter(*condiciones)\
+            .order_by(Producto.id)\
+            .execution_options(stream_results=True)\
+            .yield_per(EXPORTACION_YIELD_PER)
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(CAMPOS_IMPORTACION)
+        total = 0
+        for producto in productos:
+            escritor.writerow(['' if valor is None else valor for valor in producto])
+            total += 1
+            if total % EXPORTACION_YIELD_PER == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        logger.info("Exportación de productos completada: %s productos", total)
+    except SQLAlchemyError as e:
+        # La respuesta ya comenzó, solo se puede registrar el error y cortar el stream
+        logger.error("Error en la exportación de productos: %s", e)
+
+@inventario_bp.route('/api/inventario/exportar')
+def exportar_productos():
+    """Exporta el catálogo en CSV con las mismas columnas que acepta la importación.
+
+    Acepta los filtros de FILTROS_LISTA.
+    """
+    condiciones = []
+    for filtro in FILTROS_LISTA:
+        valor = request.args.get(filtro)
+        if valor:
+            condiciones.append(getattr(Producto, filtro) == valor)
+
+    return Response(
+        stream_with_context(_stream_productos_csv(condiciones)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=productos.csv'}
+    )
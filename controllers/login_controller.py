@@ -8,8 +8,7 @@ from functools import wraps
 from datetime import datetime, timedelta
 import jwt
 
-# Configuración de logging
-logging.basicConfig(level=logging.INFO)
+# El logging se configura de forma central en logging_config.py
 logger = logging.getLogger(__name__)
 
 # Crear el Blueprint para login
@@ -40,7 +39,7 @@ def generate_token(user_id):
             algorithm='HS256'
         )
     except Exception as e:
-        logger.error(f"Error generando token: {e}")
+        logger.error("Error generando token: %s", e)
         raise
 
 def login_required(f):
@@ -67,7 +66,7 @@ def login_required(f):
 def login_consulta():
     try:
         data = request.get_json()
-        logger.info(f"Datos recibidos: {data}")
+        logger.info("Datos recibidos: %s", data)
 
         nombre_usuario = data.get('nombre_usuario', '').strip()
         contraseña = data.get('contraseña', '').strip()
@@ -122,7 +121,7 @@ def login_consulta():
         }), 200
 
     except Exception as e:
-        logger.error(f"Error general: {str(e)}")
+        logger.error("Error general: %s", e)
         db.session.rollback()
         return jsonify({"error": "Error en el servidor"}), 500
 
@@ -149,7 +148,7 @@ def recuperar_password():
         cuenta = Cuenta.query.join(Cuenta.usuario).filter_by(email=email).first()
         
         if not cuenta:
-            logger.warning(f"Email no encontrado para recuperación de contraseña: {email}")
+            logger.warning("Email no encontrado para recuperación de contraseña: %s", email)
             return jsonify({"error": "No se encontró una cuenta asociada a este email"}), 404
 
         # Aquí deberías implementar la lógica de envío de email
@@ -159,7 +158,7 @@ def recuperar_password():
         }), 200
 
     except Exception as e:
-        logger.error(f"Error en recuperación de contraseña: {str(e)}")
+        logger.error("Error en recuperación de contraseña: %s", e)
         return jsonify({"error": "Error en el servidor"}), 500
 
 # Función para cerrar sesión (opcional, ya que con JWT el cierre de sesión se maneja del lado del cliente)
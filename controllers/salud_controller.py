@@ -0,0 +1,44 @@
+from flask import Blueprint, jsonify
+import logging
+from services.monitor_pool import monitor_pool
+from services.estimador_filas import estimador_filas
+
+# El logging se configura de forma central en logging_config.py
+logger = logging.getLogger(__name__)
+
+salud_bp = Blueprint('salud', __name__)
+
+@salud_bp.route('/healthz')
+def healthz():
+    """Liveness: el proceso responde. No toca la base de datos."""
+    return jsonify({'estado': 'ok'})
+
+@salud_bp.route('/readyz')
+def readyz():
+    """Readiness: usa el último estado del monitor del pool y las filas estimadas en caché.
+
+    Si el monitor está desactivado o aún no tiene una revisión, se hace una
+    revisión puntual (SELECT 1); si tampoco es posible, la base de datos se
+    informa como "desconocido".
+    """
+    estado_pool = monitor_pool.estado()
+    if not monitor_pool.activo() or estado_pool['ultima_revision'] is None:
+        try:
+            estado_pool = monitor_pool.revisar()
+        except Exception as e:
+            logger.error("Error revisando la base de datos en /readyz: %s", e)
+            estado_pool = dict(estado_pool, base_datos='desconocido', error=str(e))
+    listo = estado_pool['base_datos'] == 'activa'
+
+    respuesta = {
+        'estado': 'listo' if listo else 'no_listo',
+        'base_datos': estado_pool['base_datos'],
+        'ultima_revision': estado_pool['ultima_revision'],
+        'pool': estado_pool['pool'],
+        'conexiones_invalidadas': estado_pool['conexiones_invalidadas'],
+        'tablas': estimador_filas.estimaciones()
+    }
+    if not listo:
+        respuesta['error'] = estado_pool['error']
+        return jsonify(respuesta), 503
+    return jsonify(respuesta)
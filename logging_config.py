@@ -0,0 +1,74 @@
+import atexit
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar solo una fracción de los eventos marcados con extra={'muestreo': True}.
+
+    Se usa para los eventos DEBUG por fila (por ejemplo, cada orden procesada),
+    que en listas grandes generarían miles de líneas por petición.
+    """
+
+    def __init__(self, tasa):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record):
+        if not getattr(record, 'muestreo', False):
+            return True
+        return self.tasa >= 1 or random.random() < self.tasa
+
+
+class FormateadorJSON(logging.Formatter):
+    """Escribe cada evento como un objeto JSON en una sola línea"""
+
+    def format(self, record):
+        evento = {
+            'fecha': self.formatTime(record),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage()
+        }
+        if record.exc_info:
+            evento['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+def configurar_logging(app):
+    """Configura el logging de toda la aplicación según el entorno.
+
+    Los controladores solo escriben en una cola en memoria; un QueueListener en
+    un hilo aparte formatea y escribe los eventos, así la E/S de logs no ocurre
+    en el hilo de la petición.
+    """
+    nivel = app.config.get('LOG_LEVEL', 'INFO')
+    tasa_muestreo = app.config.get('LOG_DEBUG_SAMPLE_RATE', 1.0)
+
+    consola = logging.StreamHandler()
+    if app.config.get('LOG_FORMAT') == 'json':
+        consola.setFormatter(FormateadorJSON())
+    else:
+        consola.setFormatter(logging.Formatter(FORMATO_TEXTO))
+
+    cola = queue.SimpleQueue()
+    manejador_cola = QueueHandler(cola)
+    manejador_cola.addFilter(FiltroMuestreo(tasa_muestreo))
+
+    listener = QueueListener(cola, consola, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    raiz = logging.getLogger()
+    for manejador in list(raiz.handlers):
+        raiz.removeHandler(manejador)
+    raiz.addHandler(manejador_cola)
+    raiz.setLevel(nivel)
+
+    app.extensions['logging_listener'] = listener
+    return listener
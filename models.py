@@ -125,6 +125,12 @@ class Cliente(db.Model):
     # Relaciones
     ordenes = db.relationship('Orden', back_populates='cliente', passive_deletes=True)
 
+    # Lista unificada de interlocutores ordenada por nombre o empresa (keyset con id)
+    __table_args__ = (
+        db.Index('idx_cliente_nombre_id', 'nombre_cliente', 'id'),
+        db.Index('idx_cliente_empresa_id', 'empresa_cliente', 'id'),
+    )
+
     @validates('email')
     def validate_email(self, key, value):
         if value and '@' not in value:
@@ -146,6 +152,12 @@ class Proveedor(db.Model):
     # Relaciones
     ordenes = db.relationship('Orden', back_populates='proveedor', passive_deletes=True)
 
+    # Lista unificada de interlocutores ordenada por nombre o empresa (keyset con id)
+    __table_args__ = (
+        db.Index('idx_proveedor_nombre_id', 'nombre_proveedor', 'id'),
+        db.Index('idx_proveedor_empresa_id', 'empresa_proveedor', 'id'),
+    )
+
     @validates('email')
     def validate_email(self, key, value):
         if value and '@' not in value:
@@ -168,6 +180,16 @@ class Orden(db.Model):
     cliente = db.relationship('Cliente', back_populates='ordenes')
     proveedor = db.relationship('Proveedor', back_populates='ordenes')
 
+    # Índices para la paginación por cursor sobre (fecha_orden, id) con filtros
+    __table_args__ = (
+        db.Index('idx_orden_fecha_id', 'fecha_orden', 'id'),
+        db.Index('idx_orden_tipo_fecha_id', 'tipo_orden', 'fecha_orden', 'id'),
+        db.Index('idx_orden_estado_fecha_id', 'estado_orden', 'fecha_orden', 'id'),
+        # Órdenes de un interlocutor (detalle y estadísticas)
+        db.Index('idx_orden_cliente_fecha_id', 'cliente_id', 'fecha_orden', 'id'),
+        db.Index('idx_orden_proveedor_fecha_id', 'proveedor_id', 'fecha_orden', 'id'),
+    )
+
     @validates('tipo_orden', 'cliente_id', 'proveedor_id')
     def validate_orden(self, key, value):
         if key == 'tipo_orden':
@@ -196,6 +218,13 @@ class Producto(db.Model):
     valor_venta = db.Column(db.Numeric(10, 2), nullable=False)
     stock_actual = db.Column(db.Integer, default=0)
     stock_minimo = db.Column(db.Integer, default=5)
+    # stock_actual < stock_minimo; lo mantienen StockService y las escrituras de inventario
+    bajo_stock = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    # Cruzó el mínimo y la alerta aún no se emitió
+    alerta_pendiente = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    # Unidades que faltan para llegar al mínimo; columna generada por la base de
+    # datos para ordenar la cola de reposición con índice
+    faltante = db.Column(db.Integer, db.Computed('COALESCE(stock_minimo, 0) - COALESCE(stock_actual, 0)', persisted=True))
     estado = db.Column(db.Enum('Activo', 'Inactivo', 'Descontinuado'), default='Activo')
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -203,6 +232,18 @@ class Producto(db.Model):
     # Relaciones
     ordenes = db.relationship('OrdenProducto', back_populates='producto', cascade='all, delete-orphan')
 
+    # Lista de inventario: cada columna ordenable tiene su índice (columna, id)
+    __table_args__ = (
+        db.Index('idx_producto_nombre_id', 'nombre', 'id'),
+        db.Index('idx_producto_tipo_prenda_id', 'tipo_prenda', 'id'),
+        db.Index('idx_producto_valor_venta_id', 'valor_venta', 'id'),
+        db.Index('idx_producto_estado_nombre_id', 'estado', 'nombre', 'id'),
+        db.Index('idx_producto_marca', 'marca'),
+        # Cola de reposición (por faltante, con cursor) y alertas por emitir
+        db.Index('idx_producto_bajo_stock_faltante_id', 'bajo_stock', 'faltante', 'id'),
+        db.Index('idx_producto_alerta_pendiente', 'alerta_pendiente'),
+    )
+
     @validates('valor_compra', 'valor_venta')
     def validate_valores(self, key, value):
         if value < 0:
@@ -240,6 +281,71 @@ class OrdenProducto(db.Model):
             raise ValueError('El precio unitario no puede ser negativo')
         return value
 
+class MovimientoStock(db.Model):
+    """Cambio de stock de un producto; solo se insertan filas, nunca se modifican"""
+    __tablename__ = 'movimiento_stock'
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), nullable=False)
+    orden_id = db.Column(db.Integer, db.ForeignKey('orden.id', ondelete='SET NULL'), nullable=True)
+    origen = db.Column(db.Enum('Orden', 'Alta', 'Importacion'), nullable=False)
+    # Positiva para entradas, negativa para salidas
+    cantidad = db.Column(db.Integer, nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Cola de movimientos de un producto después de su punto de control
+        db.Index('idx_movimiento_stock_producto_fecha', 'producto_id', 'fecha'),
+        # Productos con movimientos desde el último punto de control
+        db.Index('idx_movimiento_stock_fecha', 'fecha'),
+    )
+
+class SaldoStock(db.Model):
+    """Punto de control: stock de un producto al cierre de una fecha de corte"""
+    __tablename__ = 'saldo_stock'
+
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), primary_key=True)
+    fecha = db.Column(db.DateTime, primary_key=True)
+    saldo = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_saldo_stock_fecha', 'fecha'),
+    )
+
+class AperturaLibroStock(db.Model):
+    """Fecha desde la que el libro de stock tiene la historia completa (una sola fila)"""
+    __tablename__ = 'apertura_libro_stock'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False)
+
+class ResumenOrdenes(db.Model):
+    """Totales diarios de órdenes por tipo y estado, mantenidos en cada escritura de órdenes"""
+    __tablename__ = 'resumen_ordenes'
+
+    fecha = db.Column(db.Date, primary_key=True)
+    tipo_orden = db.Column(db.Enum('Entrada', 'Salida'), primary_key=True)
+    estado_orden = db.Column(db.Enum('Pendiente', 'Procesada', 'Cancelada', 'Completada'), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class EstadisticaInterlocutor(db.Model):
+    """Totales de órdenes de cada cliente o proveedor, mantenidos en cada escritura de órdenes"""
+    __tablename__ = 'estadistica_interlocutor'
+
+    tipo = db.Column(db.Enum('Cliente', 'Proveedor'), primary_key=True)
+    interlocutor_id = db.Column(db.Integer, primary_key=True)
+    total_ordenes = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    ultima_orden = db.Column(db.Date)
+
+class VersionDatos(db.Model):
+    """Versión de los datos de cada tabla, se incrementa en cada escritura (ETags y cachés)"""
+    __tablename__ = 'version_datos'
+
+    tabla = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
 def init_app(app):
     db.init_app(app)
     with app.app_context():
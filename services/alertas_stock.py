@@ -0,0 +1,158 @@
+import logging
+import threading
+
+from sqlalchemy import and_, case, func, not_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Producto
+from services.version_datos import incrementar_version
+from services.tareas_fondo import iniciar_al_servir
+
+logger = logging.getLogger(__name__)
+
+
+class AlertasStock:
+    """Mantiene los indicadores bajo_stock y alerta_pendiente de los productos.
+
+    bajo_stock marca el conjunto de reposición (stock_actual < stock_minimo) y
+    tiene índice, así la lista de alertas no recorre el catálogo.
+    alerta_pendiente marca los productos que cruzaron el mínimo y todavía no se
+    informaron; el emisor periódico solo lee esos.
+    """
+
+    @staticmethod
+    def evaluar(stock_actual, stock_minimo, bajo_anterior, pendiente_anterior):
+        """Devuelve (bajo_stock, alerta_pendiente) después de un cambio de stock o de mínimo"""
+        bajo = (stock_actual or 0) < (stock_minimo or 0)
+        if not bajo:
+            return False, False
+        return True, bool(pendiente_anterior) or not bajo_anterior
+
+    @staticmethod
+    def actualizar_producto(producto):
+        """Recalcula los indicadores de un producto cargado en la sesión (antes del commit)"""
+        producto.bajo_stock, producto.alerta_pendiente = AlertasStock.evaluar(
+            producto.stock_actual,
+            producto.stock_minimo,
+            producto.bajo_stock,
+            producto.alerta_pendiente
+        )
+
+    @staticmethod
+    def emitir_pendientes():
+        """Informa los productos que cruzaron el mínimo desde la última emisión.
+
+        Los productos se reservan con FOR UPDATE SKIP LOCKED para que dos workers
+        no emitan la misma alerta.
+        """
+        productos = db.session.query(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.stock_actual,
+            Producto.stock_minimo
+        ).filter(Producto.alerta_pendiente.is_(True))\
+         .order_by(Producto.id)\
+         .with_for_update(skip_locked=True)\
+         .all()
+        if not productos:
+            db.session.rollback()
+            return []
+
+        db.session.execute(
+            update(Producto)
+            .where(Producto.id.in_([p.id for p in productos]))
+            .values(alerta_pendiente=False, fecha_actualizacion=Producto.fecha_actualizacion)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        alertas = []
+        for producto in productos:
+            logger.warning(
+                "Producto %s (%s) bajo el stock mínimo: %s de %s",
+                producto.nombre, producto.codigo, producto.stock_actual, producto.stock_minimo
+            )
+            alertas.append({
+                'id': producto.id,
+                'codigo': producto.codigo,
+                'nombre': producto.nombre,
+                'stock_actual': producto.stock_actual,
+                'stock_minimo': producto.stock_minimo
+            })
+        return alertas
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula los indicadores de todo el catálogo (carga inicial o corrección)"""
+        bajo = func.coalesce(Producto.stock_actual, 0) < func.coalesce(Producto.stock_minimo, 0)
+        # alerta_pendiente va primero: MySQL asigna de izquierda a derecha y debe
+        # ver el bajo_stock anterior
+        resultado = db.session.execute(
+            update(Producto)
+            .ordered_values(
+                (Producto.alerta_pendiente, case(
+                    (not_(bajo), False),
+                    (and_(bajo, Producto.bajo_stock.is_(False)), True),
+                    else_=Producto.alerta_pendiente
+                )),
+                (Producto.bajo_stock, case((bajo, True), else_=False)),
+                (Producto.fecha_actualizacion, Producto.fecha_actualizacion)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        incrementar_version(Producto.__tablename__)
+        return db.session.query(func.count(Producto.id)).filter(Producto.bajo_stock.is_(True)).scalar()
+
+
+class EmisorAlertasStock:
+    """Emite en un hilo de fondo las alertas de stock pendientes cada cierto intervalo"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.intervalo = 60
+        self._detener = threading.Event()
+        self._hilo = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.intervalo = app.config.get('ALERTAS_STOCK_INTERVAL', 60)
+        app.extensions['emisor_alertas_stock'] = self
+
+        if self.intervalo:
+            iniciar_al_servir(app, self.iniciar)
+
+    def iniciar(self):
+        """Arranca el hilo de emisión si aún no está corriendo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name='emisor-alertas-stock', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def emitir(self):
+        with self.app.app_context():
+            try:
+                return AlertasStock.emitir_pendientes()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error("No se pudieron emitir las alertas de stock: %s", e)
+                return []
+            finally:
+                db.session.remove()
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.emitir()
+            except Exception as e:
+                logger.error("Error inesperado en el emisor de alertas de stock: %s", e)
+
+
+emisor_alertas_stock = EmisorAlertasStock()
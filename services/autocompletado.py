@@ -0,0 +1,153 @@
+import bisect
+
+from models import db, Cliente, Proveedor, Producto
+from services.indices_memoria import IndiceSincronizado
+from services.indice_trigramas import normalizar
+from services.version_datos import VERSION_CATALOGO_PRODUCTOS
+
+# Filas leídas por vuelta al construir el índice
+LOTE_CONSTRUCCION = 5000
+# Marca mayor que cualquier carácter: acota el rango de claves con un prefijo
+_FIN_PREFIJO = '\U0010ffff'
+
+TIPOS_AUTOCOMPLETADO = ('Cliente', 'Proveedor', 'Producto')
+
+
+class IndicePrefijos:
+    """Nombres de un tipo de entidad en arrays ordenados, buscables por prefijo con bisect.
+
+    `_nombres` guarda (nombre normalizado, id) y `_palabras` las colas del nombre
+    que empiezan en la segunda palabra o siguientes, para que "perez" encuentre
+    "José Pérez". Las coincidencias del nombre completo se devuelven primero.
+    """
+
+    def __init__(self):
+        self._nombres = []
+        self._palabras = []
+        self._por_id = {}
+
+    def __len__(self):
+        return len(self._por_id)
+
+    @staticmethod
+    def _claves(nombre):
+        texto = normalizar(nombre)
+        palabras = texto.split(' ')
+        colas = [' '.join(palabras[i:]) for i in range(1, len(palabras))]
+        return texto, colas
+
+    def cargar(self, entradas):
+        """Carga (id, nombre, datos) en un índice vacío ordenando una sola vez.
+
+        Para construir el índice completo; agregar() con insort en cada alta
+        sería cuadrático. Los ids deben ser únicos.
+        """
+        for entidad_id, nombre, datos in entradas:
+            texto, colas = self._claves(nombre)
+            self._nombres.append((texto, entidad_id))
+            self._palabras.extend((cola, entidad_id) for cola in colas)
+            self._por_id[entidad_id] = (texto, colas, datos)
+        self._nombres.sort()
+        self._palabras.sort()
+
+    def agregar(self, entidad_id, nombre, datos):
+        """Agrega o reemplaza una entidad (actualizaciones incrementales)"""
+        self.eliminar(entidad_id)
+        texto, colas = self._claves(nombre)
+        bisect.insort(self._nombres, (texto, entidad_id))
+        for cola in colas:
+            bisect.insort(self._palabras, (cola, entidad_id))
+        self._por_id[entidad_id] = (texto, colas, datos)
+
+    def eliminar(self, entidad_id):
+        actual = self._por_id.pop(entidad_id, None)
+        if actual is None:
+            return
+        texto, colas, _ = actual
+        self._quitar(self._nombres, (texto, entidad_id))
+        for cola in colas:
+            self._quitar(self._palabras, (cola, entidad_id))
+
+    @staticmethod
+    def _quitar(lista, clave):
+        posicion = bisect.bisect_left(lista, clave)
+        if posicion < len(lista) and lista[posicion] == clave:
+            del lista[posicion]
+
+    def buscar(self, prefijo, limite):
+        """Devuelve hasta `limite` tuplas (orden, texto, id) con el prefijo dado"""
+        resultados = []
+        vistos = set()
+        for orden, lista in enumerate((self._nombres, self._palabras)):
+            inicio = bisect.bisect_left(lista, (prefijo,))
+            fin = bisect.bisect_left(lista, (prefijo + _FIN_PREFIJO,), lo=inicio)
+            for texto, entidad_id in lista[inicio:fin]:
+                if len(resultados) >= limite:
+                    return resultados
+                if entidad_id in vistos:
+                    continue
+                vistos.add(entidad_id)
+                resultados.append((orden, texto, entidad_id))
+        return resultados
+
+    def datos(self, entidad_id):
+        return self._por_id[entidad_id][2]
+
+
+def datos_cliente(cliente):
+    return {'id': cliente.id, 'nombre': cliente.nombre_cliente, 'tipo': 'Cliente'}
+
+
+def datos_proveedor(proveedor):
+    return {'id': proveedor.id, 'nombre': proveedor.nombre_proveedor, 'tipo': 'Proveedor'}
+
+
+def datos_producto(producto):
+    return {'id': producto.id, 'nombre': producto.nombre, 'codigo': producto.codigo, 'tipo': 'Producto'}
+
+
+class Autocompletado(IndiceSincronizado):
+    """Índice de prefijos de nombres de clientes, proveedores y productos"""
+
+    tablas = (Cliente.__tablename__, Proveedor.__tablename__, VERSION_CATALOGO_PRODUCTOS)
+    nombre = 'autocompletado'
+
+    def construir(self):
+        indices = {tipo: IndicePrefijos() for tipo in TIPOS_AUTOCOMPLETADO}
+        consultas = (
+            ('Cliente', db.session.query(Cliente.id, Cliente.nombre_cliente), datos_cliente),
+            ('Proveedor', db.session.query(Proveedor.id, Proveedor.nombre_proveedor), datos_proveedor),
+            ('Producto', db.session.query(Producto.id, Producto.nombre, Producto.codigo), datos_producto)
+        )
+        for tipo, consulta, datos in consultas:
+            filas = consulta.execution_options(stream_results=True).yield_per(LOTE_CONSTRUCCION)
+            entradas = (datos(fila) for fila in filas)
+            indices[tipo].cargar((entrada['id'], entrada['nombre'], entrada) for entrada in entradas)
+        return indices
+
+    def sugerir(self, prefijo, tipos=TIPOS_AUTOCOMPLETADO, limite=10):
+        """Las `limite` mejores sugerencias de los tipos pedidos para el prefijo"""
+        prefijo = normalizar(prefijo)
+        if not prefijo:
+            return []
+
+        def consulta(indices):
+            candidatos = []
+            for tipo in tipos:
+                indice = indices[tipo]
+                for orden, texto, entidad_id in indice.buscar(prefijo, limite):
+                    candidatos.append((orden, texto, tipo, entidad_id, indice.datos(entidad_id)))
+            candidatos.sort(key=lambda c: c[:4])
+            return [c[4] for c in candidatos[:limite]]
+
+        return self.consultar(consulta)
+
+    def indexar(self, versiones, datos):
+        """Agrega o actualiza una entidad después del commit de su escritura"""
+        self.aplicar(versiones, lambda indices: indices[datos['tipo']].agregar(datos['id'], datos['nombre'], datos))
+
+    def quitar(self, versiones, tipo, entidad_id):
+        self.aplicar(versiones, lambda indices: indices[tipo].eliminar(entidad_id))
+
+
+autocompletado = Autocompletado()
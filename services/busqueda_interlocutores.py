@@ -0,0 +1,133 @@
+from models import db, Cliente, Proveedor
+from services.autocompletado import IndicePrefijos
+from services.indices_memoria import IndiceSincronizado
+from services.indice_trigramas import IndiceTrigramas, MINIMO_CARACTERES, normalizar, puntaje
+
+# Filas leídas por vuelta al construir el índice
+LOTE_CONSTRUCCION = 5000
+
+TIPOS_INTERLOCUTOR = ('Cliente', 'Proveedor')
+
+
+def entrada_cliente(cliente):
+    """(clave, campos, datos) de un cliente para el índice de búsqueda"""
+    return ('Cliente', cliente.id), (cliente.nombre_cliente, cliente.empresa_cliente), {
+        'id': cliente.id,
+        'nombre': cliente.nombre_cliente,
+        'empresa': cliente.empresa_cliente,
+        'tipo': 'Cliente'
+    }
+
+
+def entrada_proveedor(proveedor):
+    """(clave, campos, datos) de un proveedor para el índice de búsqueda"""
+    return ('Proveedor', proveedor.id), (proveedor.nombre_proveedor, proveedor.empresa_proveedor), {
+        'id': proveedor.id,
+        'nombre': proveedor.nombre_proveedor,
+        'empresa': proveedor.empresa_proveedor,
+        'tipo': 'Proveedor'
+    }
+
+
+class BuscadorInterlocutores(IndiceSincronizado):
+    """Índice de búsqueda sobre nombre y empresa de clientes y proveedores.
+
+    Los términos con alguna palabra de MINIMO_CARACTERES letras se resuelven con
+    el índice de trigramas. Una sola palabra más corta ("Li", "JC") se busca como
+    prefijo de palabra en arrays ordenados de nombres y empresas, uno por tipo,
+    que solo entregan los primeros candidatos del rango en lugar de recorrer
+    todos los documentos que empiezan con esas letras.
+    """
+
+    tablas = (Cliente.__tablename__, Proveedor.__tablename__)
+    nombre = 'busqueda-interlocutores'
+
+    def construir(self):
+        indices = {
+            'textos': IndiceTrigramas(),
+            'prefijos': {tipo: {'nombre': [], 'empresa': []} for tipo in TIPOS_INTERLOCUTOR}
+        }
+        clientes = db.session.query(Cliente.id, Cliente.nombre_cliente, Cliente.empresa_cliente)\
+            .execution_options(stream_results=True)\
+            .yield_per(LOTE_CONSTRUCCION)
+        for cliente in clientes:
+            self._cargar(indices, entrada_cliente(cliente))
+        proveedores = db.session.query(Proveedor.id, Proveedor.nombre_proveedor, Proveedor.empresa_proveedor)\
+            .execution_options(stream_results=True)\
+            .yield_per(LOTE_CONSTRUCCION)
+        for proveedor in proveedores:
+            self._cargar(indices, entrada_proveedor(proveedor))
+
+        # Los prefijos se cargan en bloque (un solo ordenamiento); _agregar queda
+        # para las actualizaciones incrementales
+        for campos in indices['prefijos'].values():
+            for campo, entradas in campos.items():
+                campos[campo] = IndicePrefijos()
+                campos[campo].cargar(entradas)
+        return indices
+
+    @staticmethod
+    def _cargar(indices, entrada):
+        (tipo, interlocutor_id), (nombre, empresa), datos = entrada
+        indices['textos'].agregar(*entrada)
+        prefijos = indices['prefijos'][tipo]
+        for campo, texto in (('nombre', nombre), ('empresa', empresa)):
+            if texto:
+                prefijos[campo].append((interlocutor_id, texto, datos))
+
+    @staticmethod
+    def _agregar(indices, entrada):
+        (tipo, interlocutor_id), (nombre, empresa), datos = entrada
+        indices['textos'].agregar(*entrada)
+        prefijos = indices['prefijos'][tipo]
+        for campo, texto in (('nombre', nombre), ('empresa', empresa)):
+            if texto:
+                prefijos[campo].agregar(interlocutor_id, texto, datos)
+            else:
+                prefijos[campo].eliminar(interlocutor_id)
+
+    @staticmethod
+    def _quitar(indices, tipo, interlocutor_id):
+        indices['textos'].eliminar((tipo, interlocutor_id))
+        for indice in indices['prefijos'][tipo].values():
+            indice.eliminar(interlocutor_id)
+
+    @staticmethod
+    def _buscar_prefijo(indices, prefijo, tipos, limite):
+        """Hasta `limite` interlocutores con una palabra de nombre o empresa que empieza con prefijo"""
+        candidatos = {}
+        for tipo in tipos:
+            for indice in indices['prefijos'][tipo].values():
+                for _, _, interlocutor_id in indice.buscar(prefijo, limite):
+                    candidatos[(tipo, interlocutor_id)] = indice.datos(interlocutor_id)
+        resultados = []
+        for datos in candidatos.values():
+            nombre = normalizar(datos['nombre'])
+            relevancia = puntaje((nombre, normalizar(datos['empresa'])), prefijo)
+            resultados.append((relevancia, len(nombre), nombre, datos['tipo'], datos['id'], datos))
+        resultados.sort(key=lambda r: r[:5])
+        return [r[5] for r in resultados[:limite]]
+
+    def buscar(self, termino, tipo='todos', limite=20):
+        """Busca por subcadena o prefijo; tipo es 'cliente', 'proveedor' o 'todos'"""
+        filtro = None
+        tipos = TIPOS_INTERLOCUTOR
+        if tipo in ['cliente', 'proveedor']:
+            tipo_buscado = tipo.capitalize()
+            filtro = lambda datos: datos['tipo'] == tipo_buscado
+            tipos = (tipo_buscado,)
+
+        prefijo = normalizar(termino)
+        if prefijo and ' ' not in prefijo and len(prefijo) < MINIMO_CARACTERES:
+            return self.consultar(lambda indices: self._buscar_prefijo(indices, prefijo, tipos, limite))
+        return self.consultar(lambda indices: indices['textos'].buscar(termino, limite, filtro))
+
+    def indexar(self, versiones, entrada):
+        """Agrega o actualiza un interlocutor después del commit de su escritura"""
+        self.aplicar(versiones, lambda indices: self._agregar(indices, entrada))
+
+    def quitar(self, versiones, tipo, interlocutor_id):
+        self.aplicar(versiones, lambda indices: self._quitar(indices, tipo, interlocutor_id))
+
+
+buscador_interlocutores = BuscadorInterlocutores()
@@ -0,0 +1,93 @@
+from models import db, Producto
+from services.autocompletado import IndicePrefijos
+from services.indice_trigramas import IndiceTrigramas, normalizar
+from services.indices_memoria import IndiceSincronizado
+from services.version_datos import VERSION_CATALOGO_PRODUCTOS
+
+# Filas leídas por vuelta al construir el índice
+LOTE_CONSTRUCCION = 5000
+
+
+def entrada_producto(producto):
+    """(id, código, campos de texto) de un producto para el índice de búsqueda"""
+    return producto.id, producto.codigo, (
+        producto.nombre,
+        producto.marca,
+        producto.tipo_prenda,
+        producto.descripcion
+    )
+
+
+class BuscadorProductos(IndiceSincronizado):
+    """Índice de búsqueda de productos.
+
+    El código se busca exacto o por prefijo en un array ordenado; nombre, marca,
+    tipo de prenda y descripción, por palabras y trigramas. Los resultados se
+    ordenan por código exacto, prefijo de código y luego relevancia del texto.
+    El índice solo guarda ids: stock y estado se leen de la base de datos al
+    responder, así el índice no depende de los movimientos de stock.
+    """
+
+    tablas = (VERSION_CATALOGO_PRODUCTOS,)
+    nombre = 'busqueda-productos'
+
+    def construir(self):
+        indices = {'codigos': IndicePrefijos(), 'textos': IndiceTrigramas()}
+        productos = db.session.query(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.marca,
+            Producto.tipo_prenda,
+            Producto.descripcion
+        ).execution_options(stream_results=True).yield_per(LOTE_CONSTRUCCION)
+        # Los códigos se cargan en bloque (un solo ordenamiento); _agregar queda
+        # para las actualizaciones incrementales
+        codigos = []
+        for producto in productos:
+            producto_id, codigo, campos = entrada_producto(producto)
+            if codigo:
+                codigos.append((producto_id, codigo, producto_id))
+            indices['textos'].agregar(producto_id, campos, producto_id)
+        indices['codigos'].cargar(codigos)
+        return indices
+
+    @staticmethod
+    def _agregar(indices, entrada):
+        producto_id, codigo, campos = entrada
+        if codigo:
+            indices['codigos'].agregar(producto_id, codigo, producto_id)
+        else:
+            indices['codigos'].eliminar(producto_id)
+        indices['textos'].agregar(producto_id, campos, producto_id)
+
+    @staticmethod
+    def _quitar(indices, producto_id):
+        indices['codigos'].eliminar(producto_id)
+        indices['textos'].eliminar(producto_id)
+
+    def buscar(self, termino, limite=20):
+        """Ids de los productos que coinciden, del más al menos relevante"""
+        prefijo = normalizar(termino)
+        if not prefijo:
+            return []
+
+        def consulta(indices):
+            mejores = {}
+            for _, codigo, producto_id in indices['codigos'].buscar(prefijo, limite):
+                mejores[producto_id] = (0, 0) if codigo == prefijo else (1, 0)
+            for relevancia, producto_id in indices['textos'].buscar_con_puntaje(termino, limite):
+                mejores.setdefault(producto_id, (2, relevancia))
+            return sorted(mejores, key=lambda producto_id: mejores[producto_id])[:limite]
+
+        return self.consultar(consulta)
+
+    def indexar(self, versiones, entrada):
+        """Agrega o actualiza un producto después del commit de su escritura"""
+        self.aplicar(versiones, lambda indices: self._agregar(indices, entrada))
+
+    def quitar(self, versiones, producto_id):
+        self.aplicar(versiones, lambda indices: self._quitar(indices, producto_id))
+
+
+buscador_productos = BuscadorProductos()
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class CacheVersionada:
+    """Caché en memoria del proceso cuyas entradas valen mientras no cambie la versión de datos.
+
+    Cada entrada guarda la versión (de version_datos) con la que se calculó; si
+    otro worker escribe, la versión compartida cambia y la entrada deja de servir
+    sin necesidad de avisar a los demás procesos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = {}
+
+    def obtener(self, clave, version):
+        """Devuelve el valor guardado para la clave si se calculó con esa versión"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if entrada and entrada[0] == version:
+            return entrada[1]
+        return None
+
+    def guardar(self, clave, version, valor):
+        with self._lock:
+            self._entradas[clave] = (version, valor)
+
+    def invalidar(self, *claves):
+        """Descarta las entradas indicadas (o todas si no se indica ninguna)"""
+        with self._lock:
+            if not claves:
+                self._entradas.clear()
+            for clave in claves:
+                self._entradas.pop(clave, None)
+
+
+class CacheCalculada:
+    """Caché de cálculos costosos con TTL, versión de datos y cálculo único (single-flight).
+
+    Una entrada sirve mientras no cambie la versión de datos ni venza su TTL. Si
+    cambió la versión (hubo escrituras) se recalcula en la petición; si solo
+    venció el TTL y se pide revalidar en segundo plano, se entrega el valor
+    anterior mientras un hilo lo recalcula. En ambos casos, las peticiones
+    concurrentes comparten un único cálculo en vez de repetirlo.
+    """
+
+    def __init__(self, espera_maxima=30):
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._en_curso = {}
+
+    def obtener(self, clave, version, calcular, ttl, revalidar_en_fondo=False):
+        """Devuelve el valor de la clave, llamando a calcular() solo si hace falta"""
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            with self._lock:
+                entrada = self._entradas.get(clave)
+                if entrada and entrada[0] == version:
+                    if time.monotonic() < entrada[2]:
+                        return entrada[1]
+                    if revalidar_en_fondo:
+                        if clave not in self._en_curso:
+                            self._en_curso[clave] = threading.Event()
+                            self._revalidar(clave, version, calcular, ttl)
+                        return entrada[1]
+
+                evento = self._en_curso.get(clave)
+                calcula_esta_peticion = evento is None
+                if calcula_esta_peticion:
+                    evento = self._en_curso[clave] = threading.Event()
+
+            if calcula_esta_peticion:
+                return self._calcular(clave, version, calcular, ttl, evento)
+
+            # Otra petición ya está calculando: se espera su resultado. Si no sirve
+            # para esta versión (hubo una escritura entremedio) se vuelve a elegir
+            # quién calcula, así las peticiones concurrentes siguen compartiendo
+            # un único cálculo
+            restante = limite - time.monotonic()
+            if restante <= 0 or not evento.wait(restante):
+                # El cálculo en curso no terminó a tiempo
+                return calcular()
+
+    def invalidar(self, *claves):
+        """Descarta las entradas indicadas (o todas si no se indica ninguna)"""
+        with self._lock:
+            if not claves:
+                self._entradas.clear()
+            for clave in claves:
+                self._entradas.pop(clave, None)
+
+    def _calcular(self, clave, version, calcular, ttl, evento):
+        try:
+            valor = calcular()
+            with self._lock:
+                self._entradas[clave] = (version, valor, time.monotonic() + ttl)
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    def _revalidar(self, clave, version, calcular, ttl):
+        app = current_app._get_current_object()
+        evento = self._en_curso[clave]
+
+        def tarea():
+            try:
+                with app.app_context():
+                    self._calcular(clave, version, calcular, ttl, evento)
+            except Exception as e:
+                logger.error("Error revalidando la caché %s: %s", clave, e)
+
+        threading.Thread(target=tarea, name=f'revalidar-{clave}', daemon=True).start()
+
+
+# JSON serializado de las listas de clientes y proveedores (/home/clientes, /home/proveedores)
+cache_listas = CacheVersionada()
+
+# Resultados de agregaciones costosas (por ejemplo /api/estadisticas)
+cache_calculos = CacheCalculada()
@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+from sqlalchemy import case, delete, func, insert, literal, or_, select, update
+
+from models import db, Orden, EstadisticaInterlocutor
+from services.upsert import sentencia_upsert
+from services.version_datos import incrementar_version
+
+# Columna de la orden que apunta a cada tipo de interlocutor
+COLUMNAS_INTERLOCUTOR = {
+    'Cliente': Orden.cliente_id,
+    'Proveedor': Orden.proveedor_id
+}
+
+
+def _interlocutor_de(orden):
+    """Devuelve (tipo, id) del interlocutor de una orden (objeto o dict), o None"""
+    if isinstance(orden, dict):
+        cliente_id, proveedor_id = orden.get('cliente_id'), orden.get('proveedor_id')
+        valor, fecha = orden['valor_orden'], orden['fecha_orden']
+    else:
+        cliente_id, proveedor_id = orden.cliente_id, orden.proveedor_id
+        valor, fecha = orden.valor_orden, orden.fecha_orden
+    if cliente_id is not None:
+        return ('Cliente', cliente_id), valor, fecha
+    if proveedor_id is not None:
+        return ('Proveedor', proveedor_id), valor, fecha
+    return None, valor, fecha
+
+
+class EstadisticasService:
+    @staticmethod
+    def registrar(altas=(), bajas=()):
+        """Aplica a las estadísticas por interlocutor las órdenes creadas y eliminadas.
+
+        Una modificación o reasignación se registra como baja de los datos
+        anteriores y alta de los nuevos. Debe llamarse dentro de la transacción de
+        la escritura, antes del commit. La fecha de la última orden solo se
+        recalcula para los interlocutores que perdieron órdenes, con un MAX que
+        resuelve el índice (fk, fecha_orden, id).
+        """
+        deltas = {}
+        con_bajas = set()
+        for signo, ordenes in ((1, altas), (-1, bajas)):
+            for orden in ordenes:
+                clave, valor, fecha = _interlocutor_de(orden)
+                if clave is None:
+                    continue
+                cantidad, total, ultima = deltas.get(clave, (0, Decimal('0'), None))
+                if signo > 0 and (ultima is None or fecha > ultima):
+                    ultima = fecha
+                if signo < 0:
+                    con_bajas.add(clave)
+                deltas[clave] = (cantidad + signo, total + signo * Decimal(str(valor or 0)), ultima)
+
+        if not deltas:
+            return
+
+        # Las órdenes eliminadas o modificadas deben estar escritas antes de recalcular
+        db.session.flush()
+
+        filas = [{
+            'tipo': tipo,
+            'interlocutor_id': interlocutor_id,
+            'total_ordenes': cantidad,
+            'valor_total': total,
+            'ultima_orden': ultima
+        } for (tipo, interlocutor_id), (cantidad, total, ultima) in sorted(deltas.items())]
+
+        stmt = sentencia_upsert(
+            EstadisticaInterlocutor,
+            ['tipo', 'interlocutor_id'],
+            lambda columnas, nuevos: {
+                'total_ordenes': columnas.total_ordenes + nuevos.total_ordenes,
+                'valor_total': columnas.valor_total + nuevos.valor_total,
+                'ultima_orden': case(
+                    (or_(columnas.ultima_orden.is_(None), nuevos.ultima_orden > columnas.ultima_orden),
+                     func.coalesce(nuevos.ultima_orden, columnas.ultima_orden)),
+                    else_=columnas.ultima_orden
+                )
+            }
+        )
+        db.session.execute(stmt, filas)
+
+        for tipo, columna in COLUMNAS_INTERLOCUTOR.items():
+            ids = sorted(i for (t, i) in con_bajas if t == tipo)
+            if not ids:
+                continue
+            ultima = select(func.max(Orden.fecha_orden))\
+                .where(columna == EstadisticaInterlocutor.interlocutor_id)\
+                .scalar_subquery()
+            db.session.execute(
+                update(EstadisticaInterlocutor)
+                .where(EstadisticaInterlocutor.tipo == tipo, EstadisticaInterlocutor.interlocutor_id.in_(ids))
+                .values(ultima_orden=ultima)
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def obtener(tipo, interlocutor_id):
+        """Estadísticas precalculadas de un interlocutor (ceros si no tiene órdenes)"""
+        fila = db.session.get(EstadisticaInterlocutor, (tipo, interlocutor_id))
+        if not fila:
+            return {'total_ordenes': 0, 'valor_total': 0.0, 'ultima_orden': None}
+        return {
+            'total_ordenes': fila.total_ordenes,
+            'valor_total': float(fila.valor_total),
+            'ultima_orden': fila.ultima_orden.strftime('%Y-%m-%d') if fila.ultima_orden else None
+        }
+
+    @staticmethod
+    def eliminar(tipo, interlocutor_ids):
+        """Borra las estadísticas de interlocutores eliminados (antes del commit)"""
+        db.session.execute(
+            delete(EstadisticaInterlocutor)
+            .where(EstadisticaInterlocutor.tipo == tipo, EstadisticaInterlocutor.interlocutor_id.in_(interlocutor_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula todas las estadísticas desde la tabla orden (carga inicial o corrección)"""
+        db.session.execute(delete(EstadisticaInterlocutor))
+        for tipo, columna in COLUMNAS_INTERLOCUTOR.items():
+            agregados = select(
+                literal(tipo),
+                columna,
+                func.count(Orden.id),
+                func.coalesce(func.sum(Orden.valor_orden), 0),
+                func.max(Orden.fecha_orden)
+            ).where(columna.isnot(None)).group_by(columna)
+            db.session.execute(
+                insert(EstadisticaInterlocutor).from_select(
+                    ['tipo', 'interlocutor_id', 'total_ordenes', 'valor_total', 'ultima_orden'],
+                    agregados
+                )
+            )
+        db.session.commit()
+        incrementar_version(EstadisticaInterlocutor.__tablename__)
+        return db.session.query(func.count()).select_from(EstadisticaInterlocutor).scalar()
@@ -0,0 +1,107 @@
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Orden, Cliente, Proveedor, Producto
+from services.tareas_fondo import iniciar_al_servir
+
+logger = logging.getLogger(__name__)
+
+# Tablas cuyo tamaño aproximado se informa en /readyz
+TABLAS_ESTIMADAS = [Orden, Cliente, Proveedor, Producto]
+
+
+class EstimadorFilas:
+    """Mantiene en memoria una estimación del número de filas de las tablas principales.
+
+    En MySQL la estimación se lee de information_schema.TABLES (sin recorrer las
+    tablas); en otros motores se usa COUNT(*). Se refresca en un hilo de fondo,
+    así las peticiones solo leen el último valor calculado.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.intervalo = 300
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._estimaciones = {}
+        self._ultima_actualizacion = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.intervalo = app.config.get('ROW_ESTIMATE_INTERVAL', 300)
+        app.extensions['estimador_filas'] = self
+
+        if self.intervalo:
+            iniciar_al_servir(app, self.iniciar)
+
+    def iniciar(self):
+        """Arranca el hilo de actualización si aún no está corriendo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name='estimador-filas', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def estimaciones(self):
+        """Devuelve la última estimación calculada, sin consultar la base de datos"""
+        with self._lock:
+            return {
+                'filas': dict(self._estimaciones),
+                'actualizado': self._ultima_actualizacion
+            }
+
+    def actualizar(self):
+        """Recalcula la estimación de filas de cada tabla"""
+        with self.app.app_context():
+            try:
+                if db.engine.dialect.name == 'mysql':
+                    estimaciones = self._desde_information_schema()
+                else:
+                    estimaciones = {
+                        modelo.__tablename__: db.session.query(func.count()).select_from(modelo).scalar()
+                        for modelo in TABLAS_ESTIMADAS
+                    }
+            except SQLAlchemyError as e:
+                logger.error("No se pudo actualizar la estimación de filas: %s", e)
+                return self.estimaciones()
+            finally:
+                db.session.remove()
+
+        with self._lock:
+            self._estimaciones = estimaciones
+            self._ultima_actualizacion = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        return self.estimaciones()
+
+    def _desde_information_schema(self):
+        tablas = [modelo.__tablename__ for modelo in TABLAS_ESTIMADAS]
+        filas = db.session.execute(
+            text(
+                'SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tablas'
+            ).bindparams(bindparam('tablas', expanding=True)),
+            {'tablas': tablas}
+        ).all()
+        estimaciones = {tabla: None for tabla in tablas}
+        estimaciones.update({fila[0]: int(fila[1] or 0) for fila in filas})
+        return estimaciones
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            try:
+                self.actualizar()
+            except Exception as e:
+                logger.error("Error inesperado en el estimador de filas: %s", e)
+            self._detener.wait(self.intervalo)
+
+
+estimador_filas = EstimadorFilas()
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+from itertools import islice
+
+FORMATOS_IMPORTACION = ('csv', 'xlsx')
+
+
+def formato_archivo(nombre_archivo, formato=None):
+    """Formato de importación indicado o deducido de la extensión del archivo"""
+    formato = (formato or os.path.splitext(nombre_archivo or '')[1].lstrip('.')).lower()
+    if formato not in FORMATOS_IMPORTACION:
+        raise ValueError(f"Formato no soportado: use {' o '.join(FORMATOS_IMPORTACION)}")
+    return formato
+
+
+def _normalizar_encabezado(encabezado):
+    return str(encabezado or '').strip().lower()
+
+
+def _fila(encabezados, valores):
+    """Asocia cada encabezado con su valor; las celdas que faltan quedan vacías"""
+    return {
+        encabezado: '' if i >= len(valores) or valores[i] is None else valores[i]
+        for i, encabezado in enumerate(encabezados)
+    }
+
+
+def _vacia(valores):
+    return all(valor is None or str(valor).strip() == '' for valor in valores)
+
+
+def abrir_filas(archivo, formato):
+    """Abre un archivo binario CSV o XLSX y devuelve (encabezados, filas).
+
+    `filas` es un generador de (número de fila, dict encabezado -> valor) que lee
+    el archivo de a poco; las filas vacías se omiten. Los encabezados se
+    normalizan a minúsculas y sin espacios en los extremos.
+    """
+    if formato == 'xlsx':
+        return _abrir_xlsx(archivo)
+    return _abrir_csv(archivo)
+
+
+def _abrir_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    primera = texto.readline()
+    # Excel en español exporta CSV separados por punto y coma
+    delimitador = ';' if primera.count(';') > primera.count(',') else ','
+    encabezados = [_normalizar_encabezado(e) for e in next(csv.reader([primera], delimiter=delimitador), [])]
+
+    def filas():
+        for numero, valores in enumerate(csv.reader(texto, delimiter=delimitador), start=2):
+            if _vacia(valores):
+                continue
+            yield numero, _fila(encabezados, valores)
+
+    return encabezados, filas()
+
+
+def _abrir_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Para importar archivos XLSX se necesita instalar openpyxl')
+
+    # read_only lee la hoja por partes en vez de cargarla completa
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    iterador = libro.active.iter_rows(values_only=True)
+    encabezados = [_normalizar_encabezado(e) for e in next(iterador, ())]
+
+    def filas():
+        try:
+            for numero, valores in enumerate(iterador, start=2):
+                if _vacia(valores):
+                    continue
+                yield numero, _fila(encabezados, valores)
+        finally:
+            libro.close()
+
+    return encabezados, filas()
+
+
+def en_lotes(iterable, tamano):
+    """Agrupa un iterable en listas de hasta `tamano` elementos"""
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
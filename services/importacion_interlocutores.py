@@ -0,0 +1,120 @@
+import logging
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Cliente, Proveedor
+from services.cache_local import cache_listas
+from services.importacion import abrir_filas, en_lotes
+from services.upsert import sentencia_upsert
+from services.version_datos import incrementar_version
+
+logger = logging.getLogger(__name__)
+
+# Campo -> largo máximo de la columna
+CAMPOS_IMPORTACION = {
+    'nombre': 100,
+    'empresa': 100,
+    'rut': 20,
+    'email': 100,
+    'telefono': 15,
+    'direccion': 200
+}
+CAMPOS_REQUERIDOS = ('nombre', 'empresa', 'rut')
+
+
+def _campo(encabezado, sufijo):
+    """Acepta tanto 'nombre' como 'nombre_cliente' / 'nombre_proveedor'"""
+    if encabezado.endswith('_' + sufijo):
+        return encabezado[:-len(sufijo) - 1]
+    return encabezado
+
+
+def _columna(campo, sufijo):
+    return f'{campo}_{sufijo}' if campo in ['nombre', 'empresa'] else campo
+
+
+def validar_fila(datos, sufijo):
+    """Valida una fila del archivo y la convierte en valores de columna"""
+    fila = {}
+    for encabezado, valor in datos.items():
+        campo = _campo(encabezado, sufijo)
+        if campo in CAMPOS_IMPORTACION:
+            fila[campo] = str(valor).strip()
+
+    for campo in CAMPOS_REQUERIDOS:
+        if not fila.get(campo):
+            raise ValueError(f'El campo {campo} es requerido')
+    for campo, valor in fila.items():
+        if len(valor) > CAMPOS_IMPORTACION[campo]:
+            raise ValueError(f'El campo {campo} supera los {CAMPOS_IMPORTACION[campo]} caracteres')
+    if fila.get('email') and '@' not in fila['email']:
+        raise ValueError('Formato de email inválido')
+
+    return {_columna(campo, sufijo): valor or None for campo, valor in fila.items()}
+
+
+def importar_interlocutores(archivo, formato, tipo, tamano_lote=1000):
+    """Importa clientes o proveedores desde un archivo CSV/XLSX, actualizando por rut.
+
+    Es un generador de eventos para informar el avance: uno por cada fila con
+    error, uno de progreso por lote y uno final con los totales. Cada lote se
+    guarda con un único INSERT ... ON DUPLICATE KEY UPDATE y su propio commit,
+    así un lote con errores de base de datos no descarta los anteriores.
+    """
+    modelo, sufijo = (Cliente, 'cliente') if tipo == 'Cliente' else (Proveedor, 'proveedor')
+    clave_cache = 'clientes' if tipo == 'Cliente' else 'proveedores'
+    totales = {'procesadas': 0, 'creadas': 0, 'actualizadas': 0, 'errores': 0}
+
+    encabezados, filas = abrir_filas(archivo, formato)
+    campos = {_campo(encabezado, sufijo) for encabezado in encabezados}
+    faltantes = [campo for campo in CAMPOS_REQUERIDOS if campo not in campos]
+    if faltantes:
+        yield {'evento': 'error', 'fila': 1, 'error': f"Faltan columnas: {', '.join(faltantes)}"}
+        yield dict(totales, evento='fin')
+        return
+
+    # Solo se actualizan las columnas que trae el archivo
+    columnas = [_columna(campo, sufijo) for campo in campos if campo in CAMPOS_IMPORTACION and campo != 'rut']
+    stmt = sentencia_upsert(
+        modelo,
+        ['rut'],
+        lambda tabla, nuevos: {columna: nuevos[columna] for columna in columnas}
+    )
+
+    for lote in en_lotes(filas, tamano_lote):
+        validas = {}
+        numeros = []
+        for numero, datos in lote:
+            totales['procesadas'] += 1
+            try:
+                fila = validar_fila(datos, sufijo)
+            except ValueError as e:
+                totales['errores'] += 1
+                yield {'evento': 'error', 'fila': numero, 'error': str(e)}
+                continue
+            # Si un rut se repite en el lote, queda la última fila
+            validas[fila['rut']] = fila
+            numeros.append(numero)
+
+        if validas:
+            try:
+                existentes = {
+                    rut for (rut,) in db.session.query(modelo.rut).filter(modelo.rut.in_(list(validas)))
+                }
+                db.session.execute(stmt, list(validas.values()))
+                db.session.commit()
+                incrementar_version(modelo.__tablename__)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error("Error importando un lote de %s: %s", modelo.__tablename__, e)
+                totales['errores'] += len(numeros)
+                yield {'evento': 'error', 'filas': numeros, 'error': f'Error guardando el lote: {e}'}
+            else:
+                totales['actualizadas'] += len(existentes)
+                totales['creadas'] += len(validas) - len(existentes)
+                cache_listas.invalidar(clave_cache)
+
+        yield dict(totales, evento='progreso')
+
+    logger.info("Importación de %s completada: %s", modelo.__tablename__, totales)
+    yield dict(totales, evento='fin')
@@ -0,0 +1,206 @@
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Producto
+from services.alertas_stock import AlertasStock
+from services.importacion import abrir_filas, en_lotes
+from services.libro_stock import LibroStock
+from services.upsert import sentencia_upsert
+from services.version_datos import incrementar_version, VERSION_CATALOGO_PRODUCTOS
+
+logger = logging.getLogger(__name__)
+
+# Campo de texto -> largo máximo de la columna (None: sin límite)
+CAMPOS_TEXTO = {
+    'codigo': 50,
+    'nombre': 100,
+    'descripcion': None,
+    'tipo_prenda': 50,
+    'talla': 20,
+    'color': 30,
+    'marca': 50
+}
+CAMPOS_DECIMALES = ('valor_compra', 'valor_venta')
+CAMPOS_ENTEROS = ('stock_actual', 'stock_minimo')
+CAMPOS_IMPORTACION = tuple(CAMPOS_TEXTO) + CAMPOS_DECIMALES + CAMPOS_ENTEROS + ('estado',)
+CAMPOS_REQUERIDOS = ('codigo', 'nombre', 'tipo_prenda', 'valor_compra', 'valor_venta')
+ESTADOS_PRODUCTO = tuple(Producto.__table__.c.estado.type.enums)
+
+
+def _numero(valor):
+    """Convierte el valor de una celda en Decimal; acepta coma decimal (CSV de Excel en español)"""
+    texto = str(valor).strip()
+    if ',' in texto and '.' not in texto:
+        texto = texto.replace(',', '.')
+    numero = Decimal(texto)
+    if not numero.is_finite():
+        raise InvalidOperation
+    return numero
+
+
+def validar_fila(datos):
+    """Valida una fila del archivo y la convierte en valores de columna.
+
+    Los campos vacíos de stock y estado quedan en None (se conserva el valor
+    actual o el por defecto). Los montos y el stock pasan por los validadores
+    del modelo Producto.
+    """
+    fila = {}
+    for campo in CAMPOS_IMPORTACION:
+        if campo not in datos:
+            continue
+        valor = datos[campo]
+        fila[campo] = None if valor is None or str(valor).strip() == '' else valor
+
+    for campo in CAMPOS_REQUERIDOS:
+        if fila.get(campo) is None:
+            raise ValueError(f'El campo {campo} es requerido')
+
+    for campo, largo in CAMPOS_TEXTO.items():
+        if fila.get(campo) is not None:
+            fila[campo] = str(fila[campo]).strip()
+            if largo and len(fila[campo]) > largo:
+                raise ValueError(f'El campo {campo} supera los {largo} caracteres')
+    for campo in CAMPOS_DECIMALES:
+        try:
+            fila[campo] = _numero(fila[campo]).quantize(Decimal('0.01'))
+        except (ArithmeticError, ValueError):
+            raise ValueError(f'El campo {campo} debe ser un número válido')
+    for campo in CAMPOS_ENTEROS:
+        if fila.get(campo) is not None:
+            try:
+                numero = _numero(fila[campo])
+                if numero != numero.to_integral_value():
+                    raise ValueError
+            except (ArithmeticError, ValueError):
+                raise ValueError(f'El campo {campo} debe ser un entero')
+            fila[campo] = int(numero)
+    if fila.get('estado') is not None:
+        fila['estado'] = str(fila['estado']).strip().capitalize()
+        if fila['estado'] not in ESTADOS_PRODUCTO:
+            raise ValueError(f"El estado debe ser uno de: {', '.join(ESTADOS_PRODUCTO)}")
+
+    # Los validadores del modelo se aplican al asignar los atributos
+    Producto(**{campo: fila[campo] for campo in CAMPOS_DECIMALES + CAMPOS_ENTEROS if fila.get(campo) is not None})
+    return fila
+
+
+def importar_productos(archivo, formato, tamano_lote=1000):
+    """Importa productos desde un archivo CSV/XLSX, actualizando por código.
+
+    Es un generador de eventos con el mismo formato que importar_interlocutores.
+    Por lote se hace una sola consulta IN por los códigos (con bloqueo, para
+    calcular los cambios de stock), un único INSERT ... ON DUPLICATE KEY UPDATE
+    y un commit. Los cambios de stock quedan en el libro de movimientos y los
+    indicadores de bajo stock se recalculan en la misma escritura.
+    """
+    totales = {'procesadas': 0, 'creadas': 0, 'actualizadas': 0, 'errores': 0}
+
+    encabezados, filas = abrir_filas(archivo, formato)
+    faltantes = [campo for campo in CAMPOS_REQUERIDOS if campo not in encabezados]
+    if faltantes:
+        yield {'evento': 'error', 'fila': 1, 'error': f"Faltan columnas: {', '.join(faltantes)}"}
+        yield dict(totales, evento='fin')
+        return
+
+    # Solo se actualizan las columnas que trae el archivo, más los indicadores de stock
+    columnas = [campo for campo in CAMPOS_IMPORTACION if campo in encabezados and campo != 'codigo']
+    columnas += ['bajo_stock', 'alerta_pendiente', 'fecha_actualizacion']
+    stmt = sentencia_upsert(
+        Producto,
+        ['codigo'],
+        lambda tabla, nuevos: {columna: nuevos[columna] for columna in columnas}
+    )
+    # Todas las filas del executemany llevan las mismas columnas; el stock va
+    # siempre porque define los indicadores de las filas nuevas
+    opcionales = [campo for campo in CAMPOS_IMPORTACION if campo in encabezados and campo not in CAMPOS_REQUERIDOS]
+    campos_insercion = list(dict.fromkeys(
+        CAMPOS_REQUERIDOS + tuple(opcionales) + CAMPOS_ENTEROS
+        + ('bajo_stock', 'alerta_pendiente', 'fecha_actualizacion')
+    ))
+
+    for lote in en_lotes(filas, tamano_lote):
+        validas = {}
+        numeros = []
+        for numero, datos in lote:
+            totales['procesadas'] += 1
+            try:
+                fila = validar_fila(datos)
+            except ValueError as e:
+                totales['errores'] += 1
+                yield {'evento': 'error', 'fila': numero, 'error': str(e)}
+                continue
+            # Si un código se repite en el lote, queda la última fila
+            validas[fila['codigo']] = fila
+            numeros.append(numero)
+
+        if validas:
+            try:
+                existentes = {
+                    p.codigo: p for p in db.session.query(
+                        Producto.id,
+                        Producto.codigo,
+                        Producto.stock_actual,
+                        Producto.stock_minimo,
+                        Producto.estado,
+                        Producto.bajo_stock,
+                        Producto.alerta_pendiente
+                    ).filter(Producto.codigo.in_(list(validas)))
+                     .order_by(Producto.id)
+                     .with_for_update()
+                }
+                ahora = datetime.utcnow()
+                registros = []
+                variaciones = {}
+                for codigo, fila in validas.items():
+                    actual = existentes.get(codigo)
+                    # Las celdas vacías conservan el valor actual (o el por defecto si es nuevo)
+                    if fila.get('stock_actual') is None:
+                        fila['stock_actual'] = (actual.stock_actual or 0) if actual else 0
+                    if fila.get('stock_minimo') is None:
+                        fila['stock_minimo'] = actual.stock_minimo if actual else 5
+                    if 'estado' in fila and fila['estado'] is None:
+                        fila['estado'] = actual.estado if actual else 'Activo'
+                    fila['bajo_stock'], fila['alerta_pendiente'] = AlertasStock.evaluar(
+                        fila['stock_actual'],
+                        fila['stock_minimo'],
+                        actual.bajo_stock if actual else False,
+                        actual.alerta_pendiente if actual else False
+                    )
+                    fila['fecha_actualizacion'] = ahora
+                    variacion = fila['stock_actual'] - ((actual.stock_actual or 0) if actual else 0)
+                    if variacion:
+                        variaciones[codigo] = variacion
+                    registros.append({campo: fila.get(campo) for campo in campos_insercion})
+                db.session.execute(stmt, registros)
+
+                if variaciones:
+                    nuevos = [codigo for codigo in variaciones if codigo not in existentes]
+                    ids = {codigo: p.id for codigo, p in existentes.items()}
+                    if nuevos:
+                        ids.update(db.session.query(Producto.codigo, Producto.id).filter(Producto.codigo.in_(nuevos)))
+                    LibroStock.registrar([{
+                        'producto_id': ids[codigo],
+                        'origen': 'Importacion',
+                        'cantidad': variacion,
+                        'fecha': ahora
+                    } for codigo, variacion in variaciones.items()])
+
+                db.session.commit()
+                incrementar_version(Producto.__tablename__, VERSION_CATALOGO_PRODUCTOS)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error("Error importando un lote de productos: %s", e)
+                totales['errores'] += len(numeros)
+                yield {'evento': 'error', 'filas': numeros, 'error': f'Error guardando el lote: {e}'}
+            else:
+                totales['actualizadas'] += len(existentes)
+                totales['creadas'] += len(validas) - len(existentes)
+
+        yield dict(totales, evento='progreso')
+
+    logger.info("Importación de productos completada: %s", totales)
+    yield dict(totales, evento='fin')
@@ -0,0 +1,155 @@
+import heapq
+import unicodedata
+from array import array
+
+
+# Largo mínimo de la palabra más larga de un término: con menos, la única
+# lista disponible sería la de un prefijo de 1 o 2 letras, que abarca buena
+# parte de los documentos y obligaría a verificarlos todos
+MINIMO_CARACTERES = 3
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con los espacios colapsados"""
+    if not texto:
+        return ''
+    texto = str(texto)
+    if texto.isascii():
+        # Sin tildes posibles: se evita la descomposición Unicode (construcción de índices)
+        return ' '.join(texto.lower().split())
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.split())
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _gramas_documento(campos):
+    """Trigramas de cada campo más los prefijos de 1 y 2 letras de cada palabra"""
+    gramas = set()
+    for campo in campos:
+        gramas |= trigramas(campo)
+        for palabra in campo.split():
+            gramas.add('^' + palabra[:1])
+            gramas.add('^' + palabra[:2])
+    return gramas
+
+
+def puntaje(campos, termino):
+    """Relevancia de un documento (menor es mejor), o None si no contiene el término.
+
+    0: un campo es igual al término; 1: un campo empieza con él; 2: una palabra
+    empieza con él; 3: lo contiene en cualquier posición.
+    """
+    mejor = None
+    for campo in campos:
+        if campo == termino:
+            return 0
+        if campo.startswith(termino):
+            actual = 1
+        elif (' ' + termino) in campo:
+            actual = 2
+        elif termino in campo:
+            actual = 3
+        else:
+            continue
+        if mejor is None or actual < mejor:
+            mejor = actual
+    return mejor
+
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas para búsquedas por subcadena y prefijo.
+
+    Cada documento tiene una clave, uno o más campos de texto y los datos que se
+    devuelven al encontrarlo. Las listas de apariciones son arrays compactos de
+    enteros; al modificar o eliminar un documento no se limpian, porque cada
+    candidato se verifica contra el texto actual antes de devolverlo.
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._campos = []
+        self._datos = []
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def agregar(self, clave, campos, datos):
+        """Agrega o reemplaza un documento"""
+        normalizados = tuple(normalizar(campo) for campo in campos)
+        gramas = _gramas_documento(normalizados)
+
+        slot = self._slots.get(clave)
+        if slot is None:
+            slot = len(self._campos)
+            self._slots[clave] = slot
+            self._campos.append(normalizados)
+            self._datos.append(datos)
+        else:
+            if self._campos[slot] is not None:
+                gramas -= _gramas_documento(self._campos[slot])
+            self._campos[slot] = normalizados
+            self._datos[slot] = datos
+
+        for grama in gramas:
+            lista = self._postings.get(grama)
+            if lista is None:
+                lista = self._postings[grama] = array('I')
+            lista.append(slot)
+
+    def eliminar(self, clave):
+        slot = self._slots.pop(clave, None)
+        if slot is not None:
+            self._campos[slot] = None
+            self._datos[slot] = None
+
+    def buscar(self, termino, limite, filtro=None):
+        """Devuelve hasta `limite` datos ordenados por relevancia"""
+        return [datos for _, datos in self.buscar_con_puntaje(termino, limite, filtro)]
+
+    def buscar_con_puntaje(self, termino, limite, filtro=None):
+        """Como buscar(), pero devuelve pares (relevancia, datos).
+
+        Si el término completo no aparece tal cual, un documento igual coincide
+        cuando cada palabra del término aparece en alguno de sus campos; esas
+        coincidencias van después (relevancia 4 a 7). Los términos sin ninguna
+        palabra de MINIMO_CARACTERES letras no devuelven resultados.
+        """
+        termino = normalizar(termino)
+        if not termino:
+            return []
+        palabras = termino.split(' ')
+        if max(len(palabra) for palabra in palabras) < MINIMO_CARACTERES:
+            return []
+
+        # Palabras de 1 o 2 letras se buscan como prefijo de palabra
+        gramas = set()
+        for palabra in palabras:
+            gramas |= trigramas(palabra) if len(palabra) >= 3 else {'^' + palabra}
+        listas = [self._postings.get(grama) for grama in gramas]
+        if not listas or any(lista is None for lista in listas):
+            return []
+
+        # Se recorre solo la lista más corta y se verifica cada candidato
+        resultados = []
+        for slot in set(min(listas, key=len)):
+            campos = self._campos[slot]
+            if campos is None:
+                continue
+            datos = self._datos[slot]
+            if filtro and not filtro(datos):
+                continue
+            relevancia = puntaje(campos, termino)
+            if relevancia is None and len(palabras) > 1:
+                por_palabra = [puntaje(campos, palabra) for palabra in palabras]
+                if None not in por_palabra:
+                    relevancia = 4 + max(por_palabra)
+            if relevancia is None:
+                continue
+            resultados.append((relevancia, len(campos[0]), campos[0], slot))
+
+        return [(r[0], self._datos[r[3]]) for r in heapq.nsmallest(limite, resultados)]
@@ -0,0 +1,99 @@
+import logging
+import threading
+
+from flask import current_app
+
+from services.version_datos import obtener_versiones
+
+logger = logging.getLogger(__name__)
+
+
+class IndiceSincronizado:
+    """Base de los índices en memoria que se mantienen al día con version_datos.
+
+    La primera consulta construye el índice leyendo la base de datos. Las
+    escrituras hechas por este proceso se aplican de forma incremental con
+    aplicar(); si la versión compartida muestra que otro worker escribió, el
+    índice se reconstruye en segundo plano y mientras tanto se sigue usando el
+    anterior.
+    """
+
+    # Tablas de version_datos de las que depende el índice
+    tablas = ()
+    nombre = 'indice'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._construccion = threading.Lock()
+        self._estructura = None
+        self._versiones = None
+        self._reconstruyendo = False
+
+    def construir(self):
+        """Crea la estructura completa desde la base de datos (la implementa cada índice)"""
+        raise NotImplementedError
+
+    def consultar(self, funcion):
+        """Ejecuta funcion(estructura) sobre un índice al día y devuelve su resultado"""
+        versiones = obtener_versiones(self.tablas)
+
+        if self._estructura is None:
+            # Primera carga: se construye en la petición, las concurrentes esperan
+            with self._construccion:
+                if self._estructura is None:
+                    estructura = self.construir()
+                    with self._lock:
+                        self._estructura = estructura
+                        self._versiones = dict(versiones)
+                    logger.info("Índice %s construido", self.nombre)
+
+        with self._lock:
+            if versiones != self._versiones and not self._reconstruyendo:
+                self._reconstruir_en_fondo(versiones)
+            return funcion(self._estructura)
+
+    def aplicar(self, versiones_nuevas, cambio):
+        """Aplica cambio(estructura) por una escritura ya confirmada en este proceso.
+
+        versiones_nuevas es lo que devolvió incrementar_version en esa escritura;
+        si ninguna otra escritura se intercaló, el índice queda al día sin
+        reconstruirse.
+        """
+        with self._lock:
+            if self._estructura is None:
+                return
+            cambio(self._estructura)
+            for tabla in self.tablas:
+                nueva = versiones_nuevas.get(tabla)
+                if nueva is not None and self._versiones.get(tabla) == nueva - 1:
+                    self._versiones[tabla] = nueva
+
+    def invalidar(self):
+        """Descarta el índice; se reconstruye en la próxima consulta"""
+        with self._lock:
+            self._estructura = None
+            self._versiones = None
+
+    def _reconstruir_en_fondo(self, versiones):
+        self._reconstruyendo = True
+        app = current_app._get_current_object()
+        hilo = threading.Thread(
+            target=self._reconstruir,
+            args=(app, dict(versiones)),
+            name=f'reconstruir-{self.nombre}',
+            daemon=True
+        )
+        hilo.start()
+
+    def _reconstruir(self, app, versiones):
+        try:
+            with app.app_context():
+                estructura = self.construir()
+            with self._lock:
+                self._estructura = estructura
+                self._versiones = versiones
+            logger.info("Índice %s reconstruido", self.nombre)
+        except Exception as e:
+            logger.error("Error reconstruyendo el índice %s: %s", self.nombre, e)
+        finally:
+            self._reconstruyendo = False
@@ -0,0 +1,100 @@
+from sqlalchemy import exists, literal, select, union_all
+
+from models import db, Cliente, Proveedor
+from services.estadisticas_service import COLUMNAS_INTERLOCUTOR
+from services.paginacion import codificar_cursor, decodificar_cursor, condicion_keyset
+
+TIPOS_INTERLOCUTOR = ('Cliente', 'Proveedor')
+CAMPOS_INTERLOCUTOR = ('tipo', 'id', 'nombre', 'empresa', 'email', 'telefono', 'rut', 'direccion')
+# Columnas por las que se puede ordenar: no nulas y con índice (columna, id) en ambas tablas
+ORDENES_INTERLOCUTOR = ('nombre', 'empresa')
+
+
+def columnas_interlocutor(tipo):
+    """Columnas de Cliente o Proveedor con los nombres comunes de la relación unificada"""
+    modelo, sufijo = (Cliente, 'cliente') if tipo == 'Cliente' else (Proveedor, 'proveedor')
+    return {
+        'tipo': literal(tipo),
+        'id': modelo.id,
+        'nombre': getattr(modelo, f'nombre_{sufijo}'),
+        'empresa': getattr(modelo, f'empresa_{sufijo}'),
+        'email': modelo.email,
+        'telefono': modelo.telefono,
+        'rut': modelo.rut,
+        'direccion': modelo.direccion
+    }
+
+
+def tiene_ordenes(tipo, interlocutor_id):
+    """EXISTS sobre el índice (cliente_id|proveedor_id, fecha_orden, id) sin cargar las órdenes"""
+    columna = COLUMNAS_INTERLOCUTOR[tipo]
+    return db.session.query(exists().where(columna == interlocutor_id)).scalar()
+
+
+def ids_con_ordenes(tipo, interlocutor_ids):
+    """Ids de la lista que tienen al menos una orden, con una sola consulta agrupada"""
+    if not interlocutor_ids:
+        return set()
+    columna = COLUMNAS_INTERLOCUTOR[tipo]
+    filas = db.session.query(columna).filter(columna.in_(list(interlocutor_ids))).group_by(columna)
+    return {interlocutor_id for (interlocutor_id,) in filas}
+
+
+def _condicion_rama(columna, columna_id, tipo, despues_de, descendente):
+    """Parte de (orden, tipo, id) > cursor que le toca a la rama de un tipo fijo"""
+    valor, tipo_cursor, id_cursor = despues_de
+    if tipo == tipo_cursor:
+        return condicion_keyset([columna, columna_id], [valor, id_cursor], descendente)
+    # Con distinto tipo, los empates en la columna de orden van antes o después del cursor
+    incluye_iguales = (tipo > tipo_cursor) != descendente
+    if descendente:
+        return columna <= valor if incluye_iguales else columna < valor
+    return columna >= valor if incluye_iguales else columna > valor
+
+
+def consulta_interlocutores(campos=CAMPOS_INTERLOCUTOR, tipos=TIPOS_INTERLOCUTOR, orden='nombre',
+                            descendente=False, despues_de=None, limite=None):
+    """SELECT sobre clientes y proveedores como una sola relación (UNION ALL) con columna tipo.
+
+    Ordena por (orden, tipo, id). Cada rama aplica el cursor y el límite antes de
+    unirse, así recorre su propio índice (columna, id) y la consulta exterior
+    solo ordena las filas que ya llegan acotadas. tipo, id y la columna de orden
+    se incluyen siempre en el resultado porque forman el cursor.
+    """
+    seleccion = ['tipo', 'id', orden] + [campo for campo in campos if campo not in ('tipo', 'id', orden)]
+
+    def ordenar(columna):
+        return columna.desc() if descendente else columna.asc()
+
+    ramas = []
+    for tipo in tipos:
+        columnas = columnas_interlocutor(tipo)
+        rama = select(*[columnas[campo].label(campo) for campo in seleccion])
+        if despues_de is not None:
+            rama = rama.where(_condicion_rama(columnas[orden], columnas['id'], tipo, despues_de, descendente))
+        if limite is not None:
+            rama = rama.order_by(ordenar(columnas[orden]), ordenar(columnas['id'])).limit(limite)
+        # Cada rama va en su propia subconsulta para que ORDER BY/LIMIT sean válidos en la unión
+        subrama = rama.subquery()
+        ramas.append(select(*[subrama.c[campo] for campo in seleccion]))
+
+    unidas = (ramas[0] if len(ramas) == 1 else union_all(*ramas)).subquery('interlocutor')
+    consulta = select(*[unidas.c[campo] for campo in seleccion])\
+        .order_by(ordenar(unidas.c[orden]), ordenar(unidas.c.tipo), ordenar(unidas.c.id))
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    return consulta
+
+
+def codificar_cursor_interlocutor(fila, orden):
+    return codificar_cursor([getattr(fila, orden), fila.tipo, fila.id])
+
+
+def decodificar_cursor_interlocutor(token):
+    """Devuelve (valor de orden, tipo, id) a partir del cursor de la lista unificada"""
+    valores = decodificar_cursor(token)
+    if (len(valores) != 3 or not isinstance(valores[0], str)
+            or valores[1] not in TIPOS_INTERLOCUTOR
+            or isinstance(valores[2], bool) or not isinstance(valores[2], int)):
+        raise ValueError('Cursor inválido')
+    return tuple(valores)
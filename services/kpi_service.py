@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select
+
+from models import db, Orden, ResumenOrdenes
+from services.upsert import sentencia_upsert
+from services.version_datos import incrementar_version
+
+
+def datos_kpi(orden):
+    """Extrae de una orden (objeto o dict) los campos que afectan al resumen"""
+    if isinstance(orden, dict):
+        return orden['fecha_orden'], orden['tipo_orden'], orden['estado_orden'], orden['valor_orden']
+    return orden.fecha_orden, orden.tipo_orden, orden.estado_orden, orden.valor_orden
+
+
+class KpiService:
+    @staticmethod
+    def registrar(altas=(), bajas=()):
+        """Aplica al resumen diario las órdenes creadas (altas) y eliminadas (bajas).
+
+        Una modificación se registra como baja de los datos anteriores y alta de
+        los nuevos. Debe llamarse dentro de la transacción de la escritura, antes
+        del commit, para que el resumen nunca se desincronice de la tabla orden.
+        """
+        deltas = {}
+        for signo, ordenes in ((1, altas), (-1, bajas)):
+            for orden in ordenes:
+                fecha, tipo, estado, valor = datos_kpi(orden)
+                cantidad, total = deltas.get((fecha, tipo, estado), (0, Decimal('0')))
+                deltas[(fecha, tipo, estado)] = (cantidad + signo, total + signo * Decimal(str(valor or 0)))
+
+        filas = [{
+            'fecha': fecha,
+            'tipo_orden': tipo,
+            'estado_orden': estado,
+            'cantidad': cantidad,
+            'valor_total': total
+        } for (fecha, tipo, estado), (cantidad, total) in sorted(deltas.items()) if cantidad or total]
+        if not filas:
+            return
+
+        stmt = sentencia_upsert(
+            ResumenOrdenes,
+            ['fecha', 'tipo_orden', 'estado_orden'],
+            lambda columnas, nuevos: {
+                'cantidad': columnas.cantidad + nuevos.cantidad,
+                'valor_total': columnas.valor_total + nuevos.valor_total
+            }
+        )
+        db.session.execute(stmt, filas)
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula todo el resumen desde la tabla orden (carga inicial o corrección)"""
+        db.session.execute(delete(ResumenOrdenes))
+        agregados = select(
+            Orden.fecha_orden,
+            Orden.tipo_orden,
+            Orden.estado_orden,
+            func.count(Orden.id),
+            func.coalesce(func.sum(Orden.valor_orden), 0)
+        ).group_by(Orden.fecha_orden, Orden.tipo_orden, Orden.estado_orden)
+        db.session.execute(
+            insert(ResumenOrdenes).from_select(
+                ['fecha', 'tipo_orden', 'estado_orden', 'cantidad', 'valor_total'],
+                agregados
+            )
+        )
+        db.session.commit()
+        incrementar_version(ResumenOrdenes.__tablename__)
+        return db.session.query(func.count()).select_from(ResumenOrdenes).scalar()
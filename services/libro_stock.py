@@ -0,0 +1,196 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Producto, MovimientoStock, SaldoStock, AperturaLibroStock
+from services.tareas_fondo import iniciar_al_servir
+
+logger = logging.getLogger(__name__)
+
+# Productos por consulta al generar puntos de control
+TAMANO_LOTE_SALDOS = 1000
+
+
+class LibroStock:
+    """Historial de stock: movimientos inmutables y puntos de control periódicos.
+
+    El stock de un producto en una fecha es el saldo de su último punto de
+    control anterior más los movimientos posteriores hasta esa fecha, así la
+    consulta nunca recorre toda la historia del producto.
+    """
+
+    @staticmethod
+    def registrar(movimientos):
+        """Inserta los movimientos ({producto_id, cantidad, origen, orden_id?, fecha?}) en lote.
+
+        Debe llamarse en la misma transacción que modifica stock_actual.
+        """
+        filas = [{
+            'producto_id': m['producto_id'],
+            'orden_id': m.get('orden_id'),
+            'origen': m['origen'],
+            'cantidad': m['cantidad'],
+            'fecha': m.get('fecha') or datetime.utcnow()
+        } for m in movimientos if m['cantidad']]
+        if filas:
+            db.session.execute(insert(MovimientoStock), filas)
+
+    @staticmethod
+    def inicio():
+        """Fecha de apertura del libro o None si aún no se abrió"""
+        return db.session.query(func.min(AperturaLibroStock.fecha)).scalar()
+
+    @staticmethod
+    def abrir():
+        """Abre el libro si aún no tiene fecha de apertura, con un punto de control de todo el catálogo.
+
+        El stock anterior al libro no tiene movimientos: sin este punto las
+        consultas por fecha sumarían solo los movimientos y darían 0 de base.
+        La apertura se registra aparte de los puntos de control, así queda
+        abierto aunque el catálogo esté vacío (los productos creados después
+        tienen toda su historia en los movimientos). Devuelve los puntos creados.
+        """
+        if LibroStock.inicio() is not None:
+            return 0
+        total = LibroStock.generar_saldos(margen=0)
+        # Si ya había puntos de control, el libro se abrió con el primero
+        fecha = db.session.query(func.min(SaldoStock.fecha)).scalar()\
+            or datetime.utcnow().replace(microsecond=0)
+        db.session.add(AperturaLibroStock(fecha=fecha))
+        db.session.commit()
+        return total
+
+    @staticmethod
+    def stock_en(producto_id, fecha):
+        """Devuelve el stock del producto en la fecha indicada y cómo se obtuvo.
+
+        Antes del primer punto de control el stock no se puede reconstruir: lanza
+        ValueError.
+        """
+        inicio = LibroStock.inicio()
+        if inicio is None:
+            raise ValueError('El historial de stock aún no tiene fecha de apertura')
+        if fecha < inicio:
+            raise ValueError(f"El historial de stock comienza el {inicio.strftime('%Y-%m-%dT%H:%M:%S')}")
+
+        punto = db.session.query(SaldoStock.fecha, SaldoStock.saldo)\
+            .filter(SaldoStock.producto_id == producto_id, SaldoStock.fecha <= fecha)\
+            .order_by(SaldoStock.fecha.desc())\
+            .first()
+
+        condiciones = [MovimientoStock.producto_id == producto_id, MovimientoStock.fecha <= fecha]
+        if punto:
+            condiciones.append(MovimientoStock.fecha > punto.fecha)
+        variacion, cantidad = db.session.query(
+            func.coalesce(func.sum(MovimientoStock.cantidad), 0),
+            func.count(MovimientoStock.id)
+        ).filter(*condiciones).one()
+
+        return {
+            'stock': (punto.saldo if punto else 0) + int(variacion),
+            'punto_control': punto.fecha if punto else None,
+            'movimientos_aplicados': cantidad
+        }
+
+    @staticmethod
+    def generar_saldos(margen=300):
+        """Crea un punto de control para cada producto con movimientos desde el corte anterior.
+
+        El saldo al corte se calcula como stock_actual menos los movimientos
+        posteriores al corte, en una sola lectura. El corte queda `margen`
+        segundos en el pasado para que no falten movimientos de transacciones
+        aún abiertas. La primera ejecución crea puntos para todo el catálogo.
+        """
+        corte = datetime.utcnow().replace(microsecond=0) - timedelta(seconds=margen)
+        corte_anterior = db.session.query(func.max(SaldoStock.fecha)).scalar()
+        if corte_anterior is not None and corte <= corte_anterior:
+            return 0
+
+        if corte_anterior is None:
+            ids = select(Producto.id)
+        else:
+            ids = select(MovimientoStock.producto_id)\
+                .where(MovimientoStock.fecha > corte_anterior, MovimientoStock.fecha <= corte)\
+                .distinct()
+        ids = sorted(db.session.execute(ids).scalars())
+
+        posteriores = select(func.coalesce(func.sum(MovimientoStock.cantidad), 0))\
+            .where(MovimientoStock.producto_id == Producto.id, MovimientoStock.fecha > corte)\
+            .correlate(Producto)\
+            .scalar_subquery()
+
+        total = 0
+        for inicio in range(0, len(ids), TAMANO_LOTE_SALDOS):
+            lote = ids[inicio:inicio + TAMANO_LOTE_SALDOS]
+            saldos = db.session.query(
+                Producto.id,
+                (func.coalesce(Producto.stock_actual, 0) - posteriores).label('saldo')
+            ).filter(Producto.id.in_(lote)).all()
+            if saldos:
+                db.session.execute(insert(SaldoStock), [
+                    {'producto_id': s.id, 'fecha': corte, 'saldo': s.saldo} for s in saldos
+                ])
+                total += len(saldos)
+        db.session.commit()
+        return total
+
+
+class GeneradorSaldosStock:
+    """Genera en un hilo de fondo los puntos de control de stock cada cierto intervalo"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.intervalo = 3600
+        self.margen = 300
+        self._detener = threading.Event()
+        self._hilo = None
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.intervalo = app.config.get('SALDOS_STOCK_INTERVAL', 3600)
+        self.margen = app.config.get('SALDOS_STOCK_MARGEN', 300)
+        app.extensions['generador_saldos_stock'] = self
+
+        if self.intervalo:
+            iniciar_al_servir(app, self.iniciar)
+
+    def iniciar(self):
+        """Arranca el hilo de generación si aún no está corriendo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name='generador-saldos-stock', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def generar(self):
+        with self.app.app_context():
+            try:
+                # Abre el libro si la migración aún no lo hizo
+                LibroStock.abrir()
+                return LibroStock.generar_saldos(self.margen)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error("No se pudieron generar los puntos de control de stock: %s", e)
+                return 0
+            finally:
+                db.session.remove()
+
+    def _ciclo(self):
+        # La primera generación se hace al arrancar, sin esperar un intervalo
+        while not self._detener.is_set():
+            try:
+                self.generar()
+            except Exception as e:
+                logger.error("Error inesperado en el generador de saldos de stock: %s", e)
+            self._detener.wait(self.intervalo)
+
+
+generador_saldos_stock = GeneradorSaldosStock()
@@ -0,0 +1,97 @@
+import logging
+
+from sqlalchemy import exists, inspect, update
+from sqlalchemy.schema import CreateColumn
+
+from models import db, Producto, Orden, ResumenOrdenes, EstadisticaInterlocutor
+from services.estadisticas_service import EstadisticasService
+from services.kpi_service import KpiService
+from services.libro_stock import LibroStock
+from services.version_datos import incrementar_version
+
+logger = logging.getLogger(__name__)
+
+
+def _agregar_columna(conexion, modelo, nombre):
+    """Agrega al esquema existente una columna del modelo si aún no está; devuelve si la creó"""
+    tabla = modelo.__table__
+    existentes = {columna['name'] for columna in inspect(conexion).get_columns(tabla.name)}
+    if nombre in existentes:
+        return False
+    definicion = CreateColumn(tabla.c[nombre]).compile(dialect=conexion.dialect)
+    conexion.exec_driver_sql(f'ALTER TABLE {tabla.name} ADD COLUMN {definicion}')
+    logger.info("Columna %s.%s agregada", tabla.name, nombre)
+    return True
+
+
+def migrar_esquema():
+    """Lleva una base de datos existente al esquema de models.py.
+
+    db.create_all() solo crea las tablas que faltan; las columnas e índices
+    agregados a tablas existentes se crean aquí (ALTER TABLE / CREATE INDEX)
+    y se completan los datos de las columnas nuevas.
+    Se puede ejecutar varias veces: cada paso revisa primero el esquema actual.
+    Devuelve la lista de cambios aplicados.
+    """
+    cambios = []
+    tablas_previas = set(inspect(db.engine).get_table_names())
+    db.create_all()
+
+    with db.engine.begin() as conexion:
+        # Indicadores de bajo stock (alertas de reposición)
+        bajo_stock_nuevo = _agregar_columna(conexion, Producto, 'bajo_stock')
+        if bajo_stock_nuevo:
+            cambios.append('productos.bajo_stock')
+        if _agregar_columna(conexion, Producto, 'alerta_pendiente'):
+            cambios.append('productos.alerta_pendiente')
+        # Faltante para ordenar la cola de reposición (columna generada, se
+        # calcula para las filas existentes al agregarla)
+        if _agregar_columna(conexion, Producto, 'faltante'):
+            cambios.append('productos.faltante')
+
+    if bajo_stock_nuevo:
+        # Los productos que ya estaban bajo el mínimo entran a la lista de
+        # reposición, pero no se emiten como alertas nuevas
+        db.session.execute(
+            update(Producto)
+            .where(db.func.coalesce(Producto.stock_actual, 0) < db.func.coalesce(Producto.stock_minimo, 0))
+            .values(bajo_stock=True, fecha_actualizacion=Producto.fecha_actualizacion)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        incrementar_version(Producto.__tablename__)
+        cambios.append('productos.bajo_stock completado')
+
+    # El resumen diario de /home/kpis se carga desde las órdenes si es nuevo o
+    # quedó vacío habiendo órdenes
+    if ResumenOrdenes.__tablename__ not in tablas_previas or (
+        not db.session.query(exists().select_from(ResumenOrdenes)).scalar()
+        and db.session.query(exists().select_from(Orden)).scalar()
+    ):
+        filas = KpiService.reconstruir()
+        cambios.append(f'{ResumenOrdenes.__tablename__} completada ({filas} filas)')
+
+    # Las estadísticas por interlocutor se mantienen con cada escritura de
+    # órdenes; si la tabla es nueva se cargan desde las órdenes existentes
+    if EstadisticaInterlocutor.__tablename__ not in tablas_previas:
+        filas = EstadisticasService.reconstruir()
+        cambios.append(f'{EstadisticaInterlocutor.__tablename__} completada ({filas} filas)')
+
+    # Apertura del libro de stock, con un punto de control del stock vigente
+    if LibroStock.inicio() is None:
+        puntos = LibroStock.abrir()
+        cambios.append(f'libro de stock abierto ({puntos} puntos de control)')
+
+    # Índices declarados en los modelos (paginación por cursor, filtros,
+    # alertas...); create_all no los agrega a tablas que ya existían
+    with db.engine.begin() as conexion:
+        inspector = inspect(conexion)
+        for tabla in db.metadata.sorted_tables:
+            existentes = {indice['name'] for indice in inspector.get_indexes(tabla.name)}
+            for indice in tabla.indexes:
+                if indice.name not in existentes:
+                    indice.create(conexion)
+                    logger.info("Índice %s creado", indice.name)
+                    cambios.append(indice.name)
+
+    return cambios
@@ -0,0 +1,119 @@
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db
+from services.tareas_fondo import iniciar_al_servir
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorPool:
+    """Revisa en un hilo de fondo la salud del pool de conexiones a la base de datos.
+
+    Las peticiones ya no verifican la conexión con SELECT 1: una conexión caída se
+    descarta una sola vez, ya sea por el reciclaje del pool, por SQLAlchemy al
+    detectar la desconexión o por esta revisión periódica, que vacía el pool si
+    la base de datos no responde.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.intervalo = 30
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._invalidadas = 0
+        self._estado = {
+            'base_datos': 'desconocido',
+            'pool': {},
+            'conexiones_invalidadas': 0,
+            'ultima_revision': None,
+            'error': None
+        }
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.intervalo = app.config.get('POOL_HEALTH_INTERVAL', 30)
+        app.extensions['monitor_pool'] = self
+
+        with app.app_context():
+            event.listen(db.engine, 'invalidate', self._al_invalidar)
+
+        if self.intervalo:
+            iniciar_al_servir(app, self.iniciar)
+
+    def iniciar(self):
+        """Arranca el hilo de revisión si aún no está corriendo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name='monitor-pool', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def activo(self):
+        """Indica si el hilo de revisión está corriendo"""
+        return bool(self._hilo and self._hilo.is_alive())
+
+    def estado(self):
+        """Devuelve una copia del último estado registrado del pool"""
+        with self._lock:
+            return dict(self._estado, pool=dict(self._estado['pool']))
+
+    def revisar(self):
+        """Hace una revisión del pool y actualiza el estado expuesto"""
+        with self.app.app_context():
+            engine = db.engine
+            error = None
+            try:
+                with engine.connect() as conexion:
+                    conexion.exec_driver_sql('SELECT 1')
+                base_datos = 'activa'
+            except SQLAlchemyError as e:
+                # Las conexiones en reposo probablemente también están muertas
+                engine.dispose()
+                base_datos = 'caida'
+                error = str(e)
+                logger.error("Revisión del pool fallida: %s", error)
+
+            pool = engine.pool
+            estado_pool = {
+                'tipo': type(pool).__name__,
+                'tamano': pool.size() if hasattr(pool, 'size') else None,
+                'en_uso': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+                'libres': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+                'overflow': pool.overflow() if hasattr(pool, 'overflow') else None
+            }
+
+        with self._lock:
+            self._estado = {
+                'base_datos': base_datos,
+                'pool': estado_pool,
+                'conexiones_invalidadas': self._invalidadas,
+                'ultima_revision': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'error': error
+            }
+        return self.estado()
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            try:
+                self.revisar()
+            except Exception as e:
+                logger.error("Error inesperado en el monitor del pool: %s", e)
+            self._detener.wait(self.intervalo)
+
+    def _al_invalidar(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._invalidadas += 1
+
+
+monitor_pool = MonitorPool()
@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+# Límites de tamaño de página para los endpoints paginados por cursor
+PER_PAGE_DEFECTO = 50
+PER_PAGE_MAXIMO = 500
+
+
+def codificar_cursor(valores):
+    """Convierte los valores de la última fila entregada en un token opaco"""
+    crudo = json.dumps(valores, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token):
+    """Obtiene los valores de la última fila a partir del token recibido"""
+    try:
+        relleno = '=' * (-len(token) % 4)
+        crudo = base64.urlsafe_b64decode((token + relleno).encode('ascii'))
+        valores = json.loads(crudo.decode('utf-8'))
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list):
+        raise ValueError('Cursor inválido')
+    return valores
+
+
+def codificar_cursor_fecha_id(fecha, id_):
+    """Cursor para listas ordenadas por (fecha, id)"""
+    return codificar_cursor([fecha.strftime('%Y-%m-%d'), id_])
+
+
+def decodificar_cursor_fecha_id(token):
+    """Devuelve (fecha, id) a partir de un cursor creado con codificar_cursor_fecha_id"""
+    valores = decodificar_cursor(token)
+    if len(valores) != 2:
+        raise ValueError('Cursor inválido')
+    try:
+        return datetime.strptime(valores[0], '%Y-%m-%d').date(), int(valores[1])
+    except (TypeError, ValueError):
+        raise ValueError('Cursor inválido')
+
+
+def codificar_cursor_id(id_):
+    """Cursor para listas ordenadas solo por id"""
+    return codificar_cursor([id_])
+
+
+def decodificar_cursor_id(token):
+    """Devuelve el id a partir de un cursor creado con codificar_cursor_id"""
+    valores = decodificar_cursor(token)
+    if len(valores) != 1 or isinstance(valores[0], bool) or not isinstance(valores[0], int):
+        raise ValueError('Cursor inválido')
+    return valores[0]
+
+
+def leer_per_page(args, defecto=PER_PAGE_DEFECTO, maximo=PER_PAGE_MAXIMO):
+    """Lee el tamaño de página de los parámetros de la petición y lo acota"""
+    per_page = args.get('per_page', defecto, type=int)
+    if per_page is None or per_page < 1:
+        raise ValueError('per_page debe ser un entero positivo')
+    return min(per_page, maximo)
+
+
+def condicion_keyset(columnas, valores, descendente):
+    """Construye la condición de búsqueda (seek) para continuar después de la última fila.
+
+    Equivale a (c1, c2, ...) > (v1, v2, ...) (o < en orden descendente), expandida
+    en OR/AND para que el optimizador pueda usar el índice compuesto.
+    """
+    condiciones = []
+    for i, columna in enumerate(columnas):
+        iguales = [columnas[j] == valores[j] for j in range(i)]
+        siguiente = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
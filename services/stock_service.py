@@ -0,0 +1,197 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import case, func, insert, update
+
+from models import db, Producto, OrdenProducto
+from services.alertas_stock import AlertasStock
+from services.libro_stock import LibroStock
+
+
+class StockService:
+    @staticmethod
+    def validar_lineas(lineas):
+        """Valida las líneas de productos recibidas y las normaliza"""
+        if not isinstance(lineas, list):
+            raise ValueError('Los productos de la orden deben ser una lista')
+
+        normalizadas = []
+        for linea in lineas:
+            if not isinstance(linea, dict):
+                raise ValueError('Cada producto de la orden debe ser un objeto')
+            try:
+                producto_id = int(linea['producto_id'])
+                cantidad = int(linea['cantidad'])
+            except KeyError as e:
+                raise ValueError(f'El campo {e.args[0]} es requerido en cada producto')
+            except (TypeError, ValueError):
+                raise ValueError('producto_id y cantidad deben ser enteros')
+            if cantidad <= 0:
+                raise ValueError('La cantidad debe ser mayor a 0')
+
+            precio_unitario = None
+            if linea.get('precio_unitario') not in (None, ''):
+                try:
+                    precio_unitario = Decimal(str(linea['precio_unitario']))
+                except InvalidOperation:
+                    raise ValueError('El precio unitario debe ser un número válido')
+                if not precio_unitario.is_finite() or precio_unitario < 0:
+                    raise ValueError('El precio unitario no puede ser negativo')
+
+            normalizadas.append({
+                'producto_id': producto_id,
+                'cantidad': cantidad,
+                'precio_unitario': precio_unitario
+            })
+        return normalizadas
+
+    @staticmethod
+    def _bloquear_productos(ids):
+        """Lee y bloquea (FOR UPDATE) los productos, en orden de id para evitar deadlocks"""
+        productos = db.session.query(
+            Producto.id,
+            Producto.nombre,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.bajo_stock,
+            Producto.alerta_pendiente,
+            Producto.valor_compra,
+            Producto.valor_venta
+        ).filter(Producto.id.in_(sorted(ids)))\
+         .order_by(Producto.id)\
+         .with_for_update()\
+         .all()
+        return {p.id: p for p in productos}
+
+    @staticmethod
+    def _ajustar_stock(productos, variaciones, orden_id):
+        """Aplica las variaciones {producto_id: cantidad} a productos ya bloqueados.
+
+        Verifica que ningún stock quede negativo, registra los movimientos en el
+        libro y actualiza stock e indicadores de bajo stock con un único UPDATE.
+        """
+        variaciones = {producto_id: variacion for producto_id, variacion in variaciones.items() if variacion}
+        if not variaciones:
+            return
+
+        # Los indicadores se calculan aquí (los productos están bloqueados) para
+        # no depender del orden en que MySQL asigna las columnas del UPDATE
+        bajo_stock = {}
+        alerta_pendiente = {}
+        for producto_id, variacion in variaciones.items():
+            producto = productos[producto_id]
+            nuevo_stock = (producto.stock_actual or 0) + variacion
+            if nuevo_stock < 0:
+                raise ValueError(f'Stock insuficiente para el producto {producto.nombre}')
+            bajo_stock[producto_id], alerta_pendiente[producto_id] = AlertasStock.evaluar(
+                nuevo_stock, producto.stock_minimo, producto.bajo_stock, producto.alerta_pendiente
+            )
+
+        ids = sorted(variaciones)
+        ahora = datetime.utcnow()
+        LibroStock.registrar([{
+            'producto_id': producto_id,
+            'orden_id': orden_id,
+            'origen': 'Orden',
+            'cantidad': variaciones[producto_id],
+            'fecha': ahora
+        } for producto_id in ids])
+
+        db.session.execute(
+            update(Producto)
+            .where(Producto.id.in_(ids))
+            .values(
+                stock_actual=func.coalesce(Producto.stock_actual, 0) + case(variaciones, value=Producto.id, else_=0),
+                bajo_stock=case(bajo_stock, value=Producto.id, else_=Producto.bajo_stock),
+                alerta_pendiente=case(alerta_pendiente, value=Producto.id, else_=Producto.alerta_pendiente),
+                fecha_actualizacion=ahora
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def aplicar_lineas(orden_id, tipo_orden, lineas):
+        """Registra las líneas de una orden y actualiza el stock de sus productos.
+
+        Debe llamarse dentro de la transacción de la orden (sin commit). Los
+        productos se bloquean en orden de id para evitar deadlocks entre órdenes
+        concurrentes, las líneas se insertan en lote y el stock de todos los
+        productos se ajusta con un único UPDATE, junto con sus indicadores de
+        bajo stock. Cada variación queda además en el libro de movimientos.
+        Devuelve el total de la orden.
+        """
+        if not lineas:
+            return Decimal('0')
+
+        # Variación de stock por producto: Entrada suma, Salida resta
+        signo = 1 if tipo_orden == 'Entrada' else -1
+        variaciones = {}
+        for linea in lineas:
+            variaciones[linea['producto_id']] = variaciones.get(linea['producto_id'], 0) + signo * linea['cantidad']
+
+        productos = StockService._bloquear_productos(variaciones)
+        faltantes = [producto_id for producto_id in sorted(variaciones) if producto_id not in productos]
+        if faltantes:
+            raise ValueError(f'Productos no encontrados: {", ".join(str(i) for i in faltantes)}')
+
+        StockService._ajustar_stock(productos, variaciones, orden_id)
+
+        filas = []
+        total = Decimal('0')
+        for linea in lineas:
+            producto = productos[linea['producto_id']]
+            precio = linea['precio_unitario']
+            if precio is None:
+                precio = producto.valor_compra if tipo_orden == 'Entrada' else producto.valor_venta
+            total += precio * linea['cantidad']
+            filas.append({
+                'orden_id': orden_id,
+                'producto_id': linea['producto_id'],
+                'cantidad': linea['cantidad'],
+                'precio_unitario': precio
+            })
+
+        db.session.execute(insert(OrdenProducto), filas)
+
+        return total
+
+    @staticmethod
+    def total_lineas(orden_id):
+        """Total de una orden calculado desde sus líneas, o None si no tiene productos"""
+        cantidad_lineas, total = db.session.query(
+            func.count(OrdenProducto.id),
+            func.sum(OrdenProducto.precio_unitario * OrdenProducto.cantidad)
+        ).filter(OrdenProducto.orden_id == orden_id).one()
+        if not cantidad_lineas:
+            return None
+        return Decimal(str(total))
+
+    @staticmethod
+    def ajustar_orden(orden_id, tipo_anterior, tipo_nuevo=None):
+        """Corrige el stock aplicado por las líneas de una orden que cambia de tipo o se elimina.
+
+        Con tipo_nuevo=None (eliminación) se revierte todo el efecto de las
+        líneas; con un tipo distinto se aplica la diferencia (una Salida que pasa
+        a Entrada devuelve y suma las cantidades). Debe llamarse en la misma
+        transacción, antes de eliminar la orden. Devuelve True si cambió el stock.
+        """
+        if tipo_nuevo == tipo_anterior:
+            return False
+        cantidades = dict(
+            db.session.query(OrdenProducto.producto_id, func.sum(OrdenProducto.cantidad))
+            .filter(OrdenProducto.orden_id == orden_id)
+            .group_by(OrdenProducto.producto_id)
+            .all()
+        )
+        if not cantidades:
+            return False
+
+        signo_anterior = 1 if tipo_anterior == 'Entrada' else -1
+        signo_nuevo = 0 if tipo_nuevo is None else (1 if tipo_nuevo == 'Entrada' else -1)
+        productos = StockService._bloquear_productos(cantidades)
+        variaciones = {
+            producto_id: (signo_nuevo - signo_anterior) * int(cantidad)
+            for producto_id, cantidad in cantidades.items() if producto_id in productos
+        }
+        StockService._ajustar_stock(productos, variaciones, orden_id)
+        return True
@@ -0,0 +1,26 @@
+import threading
+
+
+def iniciar_al_servir(app, iniciar):
+    """Registra iniciar para que corra una sola vez, con la primera petición atendida.
+
+    Así los hilos de fondo solo arrancan en el proceso que sirve peticiones: no
+    en los comandos de la CLI, ni en el proceso padre del recargador de Flask, ni
+    en las pruebas (app.testing). Con TAREAS_FONDO = False no arrancan nunca.
+    """
+    if not app.config.get('TAREAS_FONDO', True) or app.testing:
+        return
+
+    lock = threading.Lock()
+    iniciado = False
+
+    def _iniciar_una_vez():
+        nonlocal iniciado
+        if iniciado:
+            return
+        with lock:
+            if not iniciado:
+                iniciar()
+                iniciado = True
+
+    app.before_request(_iniciar_una_vez)
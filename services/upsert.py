@@ -0,0 +1,26 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import db
+
+
+def sentencia_upsert(modelo, columnas_clave, actualizar):
+    """Construye un INSERT que actualiza la fila si la clave ya existe.
+
+    En MySQL genera INSERT ... ON DUPLICATE KEY UPDATE; en PostgreSQL y SQLite,
+    INSERT ... ON CONFLICT DO UPDATE. `actualizar` recibe (columnas de la tabla,
+    valores que se intentaron insertar) y devuelve el dict de columnas a
+    actualizar. La sentencia se ejecuta con una lista de filas (executemany).
+    """
+    dialecto = db.session.get_bind().dialect.name
+    columnas = modelo.__table__.c
+
+    if dialecto == 'mysql':
+        stmt = mysql.insert(modelo)
+        return stmt.on_duplicate_key_update(actualizar(columnas, stmt.inserted))
+
+    insertar = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+    stmt = insertar(modelo)
+    return stmt.on_conflict_do_update(
+        index_elements=columnas_clave,
+        set_=actualizar(columnas, stmt.excluded)
+    )
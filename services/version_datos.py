@@ -0,0 +1,116 @@
+import hashlib
+import logging
+from functools import wraps
+
+from flask import g, make_response, request
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, VersionDatos
+from services.upsert import sentencia_upsert
+
+logger = logging.getLogger(__name__)
+
+# Clave de version_datos para los datos de catálogo de productos (código, nombre,
+# marca...). Cambia solo al crear, editar o eliminar productos, no con el stock,
+# así los índices en memoria no se reconstruyen con cada orden.
+VERSION_CATALOGO_PRODUCTOS = 'productos_catalogo'
+
+
+def _siguiente_version(columnas, nuevos):
+    siguiente = columnas.version + 1
+    if db.session.get_bind().dialect.name == 'mysql':
+        # LAST_INSERT_ID(expr) deja la nueva versión en el resultado (lastrowid)
+        return {'version': func.last_insert_id(siguiente)}
+    return {'version': siguiente}
+
+
+def incrementar_version(*tablas):
+    """Marca las tablas como modificadas; se llama justo después del commit de la escritura.
+
+    El incremento va en una transacción propia y corta, así la fila de cada
+    tabla en version_datos no queda bloqueada mientras dura la escritura y las
+    escrituras concurrentes no se serializan en ella. Entre el commit y el
+    incremento un lector puede ver los datos nuevos con la versión anterior; lo
+    peor que ocurre es que vuelva a pedirlos. Devuelve las nuevas versiones,
+    tomadas del mismo upsert, que los índices en memoria usan para aplicar la
+    escritura sin reconstruirse ({} si no se pudo incrementar).
+    """
+    es_mysql = db.session.get_bind().dialect.name == 'mysql'
+    stmt = sentencia_upsert(VersionDatos, ['tabla'], _siguiente_version)
+    if not es_mysql:
+        stmt = stmt.returning(VersionDatos.version)
+
+    versiones = {}
+    try:
+        for tabla in sorted(set(tablas)):
+            resultado = db.session.execute(stmt, {'tabla': tabla, 'version': 1})
+            if es_mysql:
+                # Sin conflicto la fila se insertó con la versión 1 y lastrowid es 0
+                versiones[tabla] = resultado.lastrowid or 1
+            else:
+                versiones[tabla] = resultado.scalar_one()
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error("No se pudo incrementar la versión de %s: %s", tablas, e)
+        return {}
+    return versiones
+
+
+def obtener_versiones(tablas):
+    """Devuelve {tabla: version} leyendo solo las filas de version_datos pedidas"""
+    filas = db.session.query(VersionDatos.tabla, VersionDatos.version)\
+        .filter(VersionDatos.tabla.in_(tablas))\
+        .all()
+    versiones = {tabla: 0 for tabla in tablas}
+    versiones.update({fila.tabla: fila.version for fila in filas})
+    return versiones
+
+
+def versiones_actuales(tablas):
+    """Versiones de la petición en curso, reutilizando las que ya leyó con_etag"""
+    leidas = g.get('versiones_datos', {})
+    if all(tabla in leidas for tabla in tablas):
+        return {tabla: leidas[tabla] for tabla in tablas}
+    return obtener_versiones(tablas)
+
+
+def calcular_etag(versiones):
+    """ETag de una respuesta: depende de la ruta, sus parámetros y las versiones de datos"""
+    partes = [request.path, request.query_string.decode('utf-8', 'replace')]
+    partes.extend(f'{tabla}={versiones[tabla]}' for tabla in sorted(versiones))
+    return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()
+
+
+def con_etag(*tablas):
+    """Decorador para listas: responde 304 si el cliente ya tiene la versión actual.
+
+    Con If-None-Match coincidente no se ejecuta la vista, así que no hay consulta
+    de la lista ni serialización; solo la lectura de las versiones.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                versiones = obtener_versiones(tablas)
+                g.versiones_datos = versiones
+                etag = calcular_etag(versiones)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.error("No se pudo leer la versión de %s: %s", tablas, e)
+                return vista(*args, **kwargs)
+
+            if request.if_none_match.contains(etag):
+                respuesta = make_response('', 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            respuesta.set_etag(etag)
+            # Que el navegador revalide siempre con If-None-Match
+            respuesta.headers['Cache-Control'] = 'no-cache'
+            return respuesta
+        return envoltura
+    return decorador
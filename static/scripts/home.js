@@ -2,6 +2,11 @@
 let data = [];
 const rowsPerPage = 10;
 let currentPage = 1;
+// Cursores de paginación: cursors[i] es el cursor para pedir la página i + 1
+let cursors = [null];
+let nextCursor = null;
+// Filtros enviados al servidor (estado, tipo, fecha_desde, fecha_hasta, q)
+let filtros = {};
 let editMode = false;
 let currentOrderId = null;
 const API_BASE = '/home';
@@ -43,26 +48,32 @@ async function deleteOrder() {
     }
 }
 
-async function fetchData() {
+async function fetchData(page = 1) {
   try {
-      console.log('Iniciando fetchData...');
-      const response = await fetch(`${API_BASE}/ordenes`);
-      console.log('Response status:', response.status);
+      if (page === 1) {
+          cursors = [null];
+      }
+      const params = new URLSearchParams({ per_page: rowsPerPage, ...filtros });
+      if (cursors[page - 1]) {
+          params.set('cursor', cursors[page - 1]);
+      }
+
+      const response = await fetch(`${API_BASE}/ordenes?${params.toString()}`);
 
       if (!response.ok) {
           throw new Error(`HTTP error! status: ${response.status}`);
       }
 
       const result = await response.json();
-      console.log('Datos recibidos:', result);
 
-      // Asegurarse de que result sea un array
-      if (!Array.isArray(result)) {
-          console.error('Los datos recibidos no son un array:', result);
+      // Asegurarse de que la respuesta traiga la lista de órdenes
+      if (!Array.isArray(result.ordenes)) {
+          console.error('Los datos recibidos no contienen órdenes:', result);
           data = [];
+          nextCursor = null;
       } else {
           // Mapear los datos para asegurar la estructura correcta
-          data = result.map(orden => ({
+          data = result.ordenes.map(orden => ({
               ID: orden.ID,
               Interlocutor: orden.Interlocutor || 'Sin asignar',
               Empresa: orden.Empresa || 'Sin asignar',
@@ -71,24 +82,27 @@ async function fetchData() {
               Estado: orden.Estado || 'Pendiente',
               tipo: orden.tipo || ''
           }));
+          nextCursor = result.next_cursor;
+          cursors[page] = nextCursor;
       }
 
-      console.log('Datos procesados:', data);
-      
+      currentPage = page;
+
       // Actualizar la UI
-      if (data.length > 0) {
-          console.log('Actualizando UI con datos...');
+      if (page === 1) {
           updateGanancias();
-          renderTable(1); // Empezar en la primera página
+      }
+      if (data.length > 0) {
+          renderTable();
           renderPagination();
       } else {
-          console.log('No hay datos para mostrar');
           const tableBody = document.querySelector("#data-table tbody");
           tableBody.innerHTML = `
               <tr>
                   <td colspan="6" class="text-center">No hay datos disponibles</td>
               </tr>
           `;
+          document.querySelector("#pagination").innerHTML = "";
       }
   } catch (error) {
       console.error('Error en fetchData:', error);
@@ -190,7 +204,7 @@ function closeModal() {
 }
 console.log(data)
 // Render Functions
-function renderTable(page) {
+function renderTable() {
     const tableBody = document.querySelector("#data-table tbody");
     tableBody.innerHTML = "";
     
@@ -201,11 +215,8 @@ function renderTable(page) {
         return;
     }
 
-    const startIndex = (page - 1) * rowsPerPage;
-    const endIndex = startIndex + rowsPerPage;
-    const rows = data.slice(startIndex, endIndex);
-
-    rows.forEach(row => {
+    // El servidor ya entrega solo las filas de la página actual
+    data.forEach(row => {
         const tr = document.createElement("tr");
         tr.setAttribute('data-id', row.ID);
         
@@ -230,7 +241,6 @@ function renderTable(page) {
 }
 
 function renderPagination() {
-    const totalPages = Math.ceil(data.length / rowsPerPage) || 1;
     const pagination = document.querySelector("#pagination");
     pagination.innerHTML = "";
 
@@ -240,53 +250,48 @@ function renderPagination() {
     prevButton.disabled = currentPage === 1;
     prevButton.onclick = () => {
         if (currentPage > 1) {
-            currentPage--;
-            renderTable(currentPage);
-            renderPagination();
+            fetchData(currentPage - 1);
         }
     };
     pagination.appendChild(prevButton);
 
-    // Botones de página
-    for (let i = 1; i <= totalPages; i++) {
-        const button = document.createElement("button");
-        button.textContent = i;
-        button.classList.toggle("active", i === currentPage);
-        button.onclick = () => {
-            currentPage = i;
-            renderTable(currentPage);
-            renderPagination();
-        };
-        pagination.appendChild(button);
-    }
+    // Página actual
+    const pageButton = document.createElement("button");
+    pageButton.textContent = currentPage;
+    pageButton.classList.add("active");
+    pagination.appendChild(pageButton);
 
     // Botón siguiente
     const nextButton = document.createElement("button");
     nextButton.textContent = "Siguiente";
-    nextButton.disabled = currentPage === totalPages;
+    nextButton.disabled = !nextCursor;
     nextButton.onclick = () => {
-        if (currentPage < totalPages) {
-            currentPage++;
-            renderTable(currentPage);
-            renderPagination();
+        if (nextCursor) {
+            fetchData(currentPage + 1);
         }
     };
     pagination.appendChild(nextButton);
 }
 
-function updateGanancias() {
-  const total = data.reduce((sum, orden) => {
-      const valor = parseFloat(orden.Valor_de_Orden) || 0;
-      // Si es una orden de entrada (proveedor) resta, si es de salida (cliente) suma
-      return orden.tipo === 'Entrada' ? sum - valor : sum + valor;
-  }, 0);
-  
-  const totalFormateado = total.toLocaleString('es-CL', {
-      minimumFractionDigits: 2,
-      maximumFractionDigits: 2
-  });
-  
-  document.getElementById('gananciaTotal').textContent = `$${totalFormateado}`;
+// El total se lee del resumen de órdenes del servidor, no de la página cargada
+async function updateGanancias() {
+  try {
+      const response = await fetch(`${API_BASE}/kpis`);
+      if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const kpis = await response.json();
+      const total = kpis.ganancia || 0;
+
+      const totalFormateado = total.toLocaleString('es-CL', {
+          minimumFractionDigits: 2,
+          maximumFractionDigits: 2
+      });
+
+      document.getElementById('gananciaTotal').textContent = `$${totalFormateado}`;
+  } catch (error) {
+      console.error('Error cargando indicadores:', error);
+  }
 }
 
 // Event Listeners
@@ -332,22 +337,16 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 function handleSearch(searchTerm) {
-  if (!searchTerm) {
-      fetchData(); // Si no hay término de búsqueda, mostrar todos los datos
-      return;
+  // La búsqueda se resuelve en el servidor para cubrir todas las órdenes,
+  // no solo las de la página cargada
+  const termino = searchTerm.trim();
+  if (termino) {
+      filtros.q = termino;
+  } else {
+      delete filtros.q;
   }
-
-  const filteredData = data.filter(orden => 
-      orden.Interlocutor.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      orden.Empresa.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      orden.Estado.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
-  data = filteredData;
   currentPage = 1;
-  renderTable(currentPage);
-  renderPagination();
-  updateGanancias();
+  fetchData(1);
 }
 
 // Modificar la función saveOrder para manejar tanto creación como edición
@@ -3,6 +3,10 @@ let currentInterlocutorData = null;
 let ordenesData = [];
 const rowsPerPage = 10;
 let currentPage = 1;
+// Cursores de paginación: cursors[i] es el cursor para pedir la página i + 1
+let cursors = [null];
+let nextCursor = null;
+let interlocutorActual = null;
 const API_BASE = '/api';
 
 document.addEventListener('DOMContentLoaded', function() {
@@ -30,11 +34,18 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// Función para obtener los datos del interlocutor
-async function fetchInterlocutorData(id, tipo) {
+// Función para obtener los datos del interlocutor y una página de sus órdenes
+async function fetchInterlocutorData(id, tipo, page = 1) {
     try {
-        console.log(`Fetching data for ${tipo} ${id}`);
-        const url = `${API_BASE}/${tipo}/${id}`;
+        interlocutorActual = { id, tipo };
+        if (page === 1) {
+            cursors = [null];
+        }
+        const params = new URLSearchParams({ per_page: rowsPerPage });
+        if (cursors[page - 1]) {
+            params.set('cursor', cursors[page - 1]);
+        }
+        const url = `${API_BASE}/${tipo}/${id}?${params.toString()}`;
         
         const response = await fetch(url);
         if (!response.ok) {
@@ -42,14 +53,16 @@ async function fetchInterlocutorData(id, tipo) {
         }
         
         const data = await response.json();
-        console.log('Received data:', data);
         
         currentInterlocutorData = data;
         ordenesData = data.ordenes || [];
+        nextCursor = data.next_cursor || null;
+        cursors[page] = nextCursor;
+        currentPage = page;
         
         updateInterlocutorInfo();
         updateEstadisticas();
-        renderOrdenesTable(1);
+        renderOrdenesTable();
         renderPagination();
         
     } catch (error) {
@@ -88,8 +101,8 @@ function updateEstadisticas() {
     document.getElementById('ultimaOrden').textContent = ultimaOrden;
 }
 
-// Función para renderizar la tabla de órdenes
-function renderOrdenesTable(page) {
+// Función para renderizar la tabla de órdenes (el servidor entrega solo la página actual)
+function renderOrdenesTable() {
     const tableBody = document.querySelector("#data-table tbody");
     if (!tableBody) return;
     
@@ -102,11 +115,7 @@ function renderOrdenesTable(page) {
         return;
     }
 
-    const startIndex = (page - 1) * rowsPerPage;
-    const endIndex = Math.min(startIndex + rowsPerPage, ordenesData.length);
-    const paginatedOrdenes = ordenesData.slice(startIndex, endIndex);
-
-    paginatedOrdenes.forEach(orden => {
+    ordenesData.forEach(orden => {
         const tr = document.createElement("tr");
         tr.setAttribute('data-id', orden.id);
         
@@ -159,9 +168,7 @@ function handleSearch(searchTerm) {
         );
     }
     
-    currentPage = 1;
-    renderOrdenesTable(currentPage);
-    renderPagination();
+    renderOrdenesTable();
 }
 
 // Función para renderizar paginación
@@ -169,11 +176,10 @@ function renderPagination() {
     const pagination = document.querySelector("#pagination");
     if (!pagination) return;
     
-    const totalPages = Math.ceil(ordenesData.length / rowsPerPage);
     pagination.innerHTML = '';
 
-    // Si no hay páginas, no mostrar paginación
-    if (totalPages <= 1) return;
+    // Si hay una sola página, no mostrar paginación
+    if (currentPage === 1 && !nextCursor) return;
 
     // Botón anterior
     const prevButton = document.createElement('button');
@@ -182,37 +188,25 @@ function renderPagination() {
     prevButton.disabled = currentPage === 1;
     prevButton.onclick = () => {
         if (currentPage > 1) {
-            currentPage--;
-            renderOrdenesTable(currentPage);
-            renderPagination();
+            fetchInterlocutorData(interlocutorActual.id, interlocutorActual.tipo, currentPage - 1);
         }
     };
     pagination.appendChild(prevButton);
 
-    // Botones de página
-    for (let i = 1; i <= totalPages; i++) {
-        const button = document.createElement('button');
-        button.textContent = i;
-        button.classList.add('btn');
-        button.classList.toggle('active', i === currentPage);
-        button.onclick = () => {
-            currentPage = i;
-            renderOrdenesTable(currentPage);
-            renderPagination();
-        };
-        pagination.appendChild(button);
-    }
+    // Página actual
+    const pageButton = document.createElement('button');
+    pageButton.textContent = currentPage;
+    pageButton.classList.add('btn', 'active');
+    pagination.appendChild(pageButton);
 
     // Botón siguiente
     const nextButton = document.createElement('button');
     nextButton.textContent = 'Siguiente';
     nextButton.classList.add('btn');
-    nextButton.disabled = currentPage === totalPages;
+    nextButton.disabled = !nextCursor;
     nextButton.onclick = () => {
-        if (currentPage < totalPages) {
-            currentPage++;
-            renderOrdenesTable(currentPage);
-            renderPagination();
+        if (nextCursor) {
+            fetchInterlocutorData(interlocutorActual.id, interlocutorActual.tipo, currentPage + 1);
         }
     };
     pagination.appendChild(nextButton);
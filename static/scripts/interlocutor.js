@@ -4,6 +4,15 @@ const rowsPerPage = 10;
 let currentPage = 1;
 let editMode = false;
 let selectedInterlocutorId = null;
+// Cursores de paginación: cursors[i] es el cursor para pedir la página i + 1
+let cursors = [null];
+let hayMasPaginas = false;
+// Campos que se muestran en la tabla
+const CAMPOS_LISTA = 'id,nombre,empresa';
+const LIMITE_BUSQUEDA = 50;
+// Con varias palabras, la búsqueda del servidor necesita al menos una de 3 letras
+// (una sola palabra más corta se busca como prefijo)
+const MINIMO_CARACTERES_BUSQUEDA = 3;
 
 // Event Listeners
 document.addEventListener('DOMContentLoaded', function() {
@@ -44,35 +53,52 @@ document.addEventListener('DOMContentLoaded', function() {
 
 // Funciones de inicialización y carga de datos
 async function initializeTable() {
+    cursors = [null];
+    await fetchPage(1);
+}
+
+async function fetchPage(page) {
     try {
-        console.log('Iniciando carga de datos...');
-        const response = await fetch('/api/interlocutor/lista');
+        // Clientes y proveedores juntos, ordenados por nombre en una sola consulta
+        const params = new URLSearchParams({
+            per_page: rowsPerPage,
+            fields: CAMPOS_LISTA,
+            sort_by: 'nombre'
+        });
+        if (cursors[page - 1]) {
+            params.set('cursor', cursors[page - 1]);
+        }
+
+        const response = await fetch(`/api/interlocutor/lista?${params}`);
         if (!response.ok) {
             console.error('Error en la respuesta:', response.status);
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         
         const result = await response.json();
-        console.log('Datos recibidos:', result);
         
-        data = [...(result.clientes || []), ...(result.proveedores || [])].map(item => ({
+        data = (result.interlocutores || []).map(item => ({
             id: item.id,
-            nombre: item.nombre_cliente || item.nombre_proveedor,
-            empresa: item.empresa_cliente || item.empresa_proveedor,
-            tipo: item.nombre_cliente ? 'cliente' : 'proveedor'
+            nombre: item.nombre,
+            empresa: item.empresa,
+            tipo: item.tipo.toLowerCase()
         }));
+
+        hayMasPaginas = Boolean(result.next_cursor);
+        cursors[page] = result.next_cursor || null;
+        currentPage = page;
         
-        renderTable(1);
+        renderTable();
         renderPagination();
         
     } catch (error) {
-        console.error('Error en initializeTable:', error);
+        console.error('Error en fetchPage:', error);
         showError('Error al cargar los datos: ' + error.message);
     }
 }
 
 // Funciones de renderizado
-function renderTable(page) {
+function renderTable() {
     const tableBody = document.querySelector("#data-table tbody");
     if (!tableBody) return;
     
@@ -85,11 +111,7 @@ function renderTable(page) {
         return;
     }
 
-    const startIndex = (page - 1) * rowsPerPage;
-    const endIndex = Math.min(startIndex + rowsPerPage, data.length);
-    const paginatedData = data.slice(startIndex, endIndex);
-
-    paginatedData.forEach(item => {
+    data.forEach(item => {
         const tr = document.createElement("tr");
         tr.setAttribute('data-id', item.id);
         tr.setAttribute('data-tipo', item.tipo);
@@ -113,9 +135,11 @@ function renderPagination() {
     const pagination = document.querySelector("#pagination");
     if (!pagination) return;
     
-    const totalPages = Math.ceil(data.length / rowsPerPage);
     pagination.innerHTML = "";
 
+    // Si hay una sola página, no mostrar paginación
+    if (currentPage === 1 && !hayMasPaginas) return;
+
     // Botón anterior
     const prevButton = document.createElement("button");
     prevButton.textContent = "Anterior";
@@ -123,37 +147,25 @@ function renderPagination() {
     prevButton.disabled = currentPage === 1;
     prevButton.onclick = () => {
         if (currentPage > 1) {
-            currentPage--;
-            renderTable(currentPage);
-            renderPagination();
+            fetchPage(currentPage - 1);
         }
     };
     pagination.appendChild(prevButton);
 
-    // Botones de página
-    for (let i = 1; i <= totalPages; i++) {
-        const button = document.createElement("button");
-        button.textContent = i;
-        button.classList.add("btn");
-        button.classList.toggle("active", i === currentPage);
-        button.onclick = () => {
-            currentPage = i;
-            renderTable(currentPage);
-            renderPagination();
-        };
-        pagination.appendChild(button);
-    }
+    // Página actual
+    const pageButton = document.createElement("button");
+    pageButton.textContent = currentPage;
+    pageButton.classList.add("btn", "active");
+    pagination.appendChild(pageButton);
 
     // Botón siguiente
     const nextButton = document.createElement("button");
     nextButton.textContent = "Siguiente";
     nextButton.classList.add("btn");
-    nextButton.disabled = currentPage === totalPages;
+    nextButton.disabled = !hayMasPaginas;
     nextButton.onclick = () => {
-        if (currentPage < totalPages) {
-            currentPage++;
-            renderTable(currentPage);
-            renderPagination();
+        if (hayMasPaginas) {
+            fetchPage(currentPage + 1);
         }
     };
     pagination.appendChild(nextButton);
@@ -357,22 +369,36 @@ function showError(message) {
 }
 
 // Funciones de utilidad
-function handleSearch(searchTerm) {
-    if (!searchTerm) {
+async function handleSearch(searchTerm) {
+    const palabras = (searchTerm || '').trim().split(/\s+/);
+    if (!palabras[0] || (palabras.length > 1 && Math.max(...palabras.map(p => p.length)) < MINIMO_CARACTERES_BUSQUEDA)) {
         initializeTable();
         return;
     }
 
-    const searchLower = searchTerm.toLowerCase();
-    const filteredData = data.filter(item => 
-        item.nombre.toLowerCase().includes(searchLower) ||
-        item.empresa.toLowerCase().includes(searchLower)
-    );
-    
-    data = filteredData;
-    currentPage = 1;
-    renderTable(currentPage);
-    renderPagination();
+    // La tabla solo tiene la página actual: la búsqueda se resuelve en el servidor
+    try {
+        const params = new URLSearchParams({ q: searchTerm, limite: LIMITE_BUSQUEDA });
+        const response = await fetch(`/api/buscar?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const resultados = await response.json();
+
+        data = resultados.map(item => ({
+            id: item.id,
+            nombre: item.nombre,
+            empresa: item.empresa,
+            tipo: item.tipo.toLowerCase()
+        }));
+        currentPage = 1;
+        hayMasPaginas = false;
+        renderTable();
+        renderPagination();
+    } catch (error) {
+        console.error('Error en handleSearch:', error);
+        showError('Error al buscar: ' + error.message);
+    }
 }
 
 function adjustFormFields(tipo) {
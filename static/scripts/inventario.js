@@ -4,6 +4,12 @@ const rowsPerPage = 10;
 let currentPage = 1;
 let editMode = false;
 let selectedProductId = null;
+// Cursores de paginación: cursors[i] es el cursor para pedir la página i + 1
+let cursors = [null];
+let hayMasPaginas = false;
+// Orden y filtros de la lista (se aplican en el servidor)
+let ordenLista = { sort_by: 'nombre', direction: 'asc' };
+let filtros = {};
 
 // Event Listeners
 document.addEventListener('DOMContentLoaded', function() {
@@ -39,24 +45,40 @@ document.addEventListener('DOMContentLoaded', function() {
 
 // Funciones de inicialización y carga de datos
 async function initializeTable() {
+    cursors = [null];
+    await fetchPage(1);
+}
+
+async function fetchPage(page) {
     try {
-        const response = await fetch('/api/inventario/lista');
+        const params = new URLSearchParams({ per_page: rowsPerPage, ...ordenLista });
+        Object.entries(filtros).forEach(([campo, valor]) => {
+            if (valor) params.set(campo, valor);
+        });
+        if (cursors[page - 1]) {
+            params.set('cursor', cursors[page - 1]);
+        }
+
+        const response = await fetch(`/api/inventario/lista?${params}`);
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
         
         const result = await response.json();
         data = result.productos;
+        hayMasPaginas = Boolean(result.next_cursor);
+        cursors[page] = result.next_cursor || null;
+        currentPage = page;
         
-        renderTable(1);
+        renderTable();
         renderPagination();
         
     } catch (error) {
-        console.error('Error en initializeTable:', error);
+        console.error('Error en fetchPage:', error);
         showError('Error al cargar los datos: ' + error.message);
     }
 }
 
 // Funciones de renderizado
-function renderTable(page) {
+function renderTable() {
     const tableBody = document.querySelector("#data-table tbody");
     if (!tableBody) return;
     
@@ -69,11 +91,7 @@ function renderTable(page) {
         return;
     }
 
-    const startIndex = (page - 1) * rowsPerPage;
-    const endIndex = Math.min(startIndex + rowsPerPage, data.length);
-    const paginatedData = data.slice(startIndex, endIndex);
-
-    paginatedData.forEach(item => {
+    data.forEach(item => {
         const tr = document.createElement("tr");
         tr.setAttribute('data-id', item.id);
         
@@ -236,7 +254,8 @@ function handleSearch(searchTerm) {
         .then(result => {
             data = result;
             currentPage = 1;
-            renderTable(currentPage);
+            hayMasPaginas = false;
+            renderTable();
             renderPagination();
         })
         .catch(error => {
@@ -261,9 +280,11 @@ function renderPagination() {
     const pagination = document.querySelector("#pagination");
     if (!pagination) return;
     
-    const totalPages = Math.ceil(data.length / rowsPerPage);
     pagination.innerHTML = "";
 
+    // Si hay una sola página, no mostrar paginación
+    if (currentPage === 1 && !hayMasPaginas) return;
+
     // Botón anterior
     const prevButton = document.createElement("button");
     prevButton.textContent = "Anterior";
@@ -271,37 +292,25 @@ function renderPagination() {
     prevButton.disabled = currentPage === 1;
     prevButton.onclick = () => {
         if (currentPage > 1) {
-            currentPage--;
-            renderTable(currentPage);
-            renderPagination();
+            fetchPage(currentPage - 1);
         }
     };
     pagination.appendChild(prevButton);
 
-    // Botones de página
-    for (let i = 1; i <= totalPages; i++) {
-        const button = document.createElement("button");
-        button.textContent = i;
-        button.classList.add("btn");
-        button.classList.toggle("active", i === currentPage);
-        button.onclick = () => {
-            currentPage = i;
-            renderTable(currentPage);
-            renderPagination();
-        };
-        pagination.appendChild(button);
-    }
+    // Página actual
+    const pageButton = document.createElement("button");
+    pageButton.textContent = currentPage;
+    pageButton.classList.add("btn", "active");
+    pagination.appendChild(pageButton);
 
     // Botón siguiente
     const nextButton = document.createElement("button");
     nextButton.textContent = "Siguiente";
     nextButton.classList.add("btn");
-    nextButton.disabled = currentPage === totalPages;
+    nextButton.disabled = !hayMasPaginas;
     nextButton.onclick = () => {
-        if (currentPage < totalPages) {
-            currentPage++;
-            renderTable(currentPage);
-            renderPagination();
+        if (hayMasPaginas) {
+            fetchPage(currentPage + 1);
         }
     };
     pagination.appendChild(nextButton);